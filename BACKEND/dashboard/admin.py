@@ -1,3 +1,14 @@
 from django.contrib import admin
+from dashboard.models import SourceSchedule
 
-# Register your models here.
+
+@admin.register(SourceSchedule)
+class SourceScheduleAdmin(admin.ModelAdmin):
+    list_display = (
+        'url', 'category', 'interval', 'yield_per_hour', 'last_new_articles', 'new_articles', 'polls',
+        'last_polled_at', 'next_run_at',
+    )
+    list_filter = ('category',)
+    ordering = ('interval', 'url')
+    # The scheduler owns the statistics; interval and next_run_at can be nudged by hand
+    readonly_fields = ('yield_per_hour', 'last_new_articles', 'new_articles', 'polls', 'last_polled_at')
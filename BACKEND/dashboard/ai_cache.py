@@ -0,0 +1,94 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    is_valid INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at);
+"""
+
+
+def normalize_text(text):
+    return ' '.join(unicodedata.normalize('NFKC', text or '').casefold().split())
+
+
+class AIResultCache:
+    """
+    Gemini results keyed by a hash of the normalized title and content plus the prompt version,
+    so syndicated copies and refetched pages never pay for a second call. Rejections are cached
+    too. Entries expire after ttl seconds; past max_entries the least recently used are evicted.
+    """
+
+    def __init__(self, path, ttl, max_entries, prompt_version):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prompt_version = prompt_version
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._db = None
+        self._entries = 0
+
+    def _connection(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.executescript(SCHEMA)
+            self._entries = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        return self._db
+
+    def key(self, title, content):
+        text = f'{self.prompt_version}\0{normalize_text(title)}\0{normalize_text(content)}'
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, title, content):
+        now = time.time()
+        key = self.key(title, content)
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT result, created_at FROM results WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or row[1] + self.ttl <= now:
+                self.stats['misses'] += 1
+                return None
+            self._db.execute('UPDATE results SET accessed_at = ? WHERE key = ?', (now, key))
+            self.stats['hits'] += 1
+            return json.loads(row[0])
+
+    def set(self, title, content, result):
+        now = time.time()
+        key = self.key(title, content)
+        with self._lock:
+            db = self._connection()
+            existed = db.execute('SELECT 1 FROM results WHERE key = ?', (key,)).fetchone()
+            db.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                (key, json.dumps(result), int(bool(result.get('is_valid'))), now, now),
+            )
+            self.stats['stored'] += 1
+            if not existed:
+                self._entries += 1
+            if self._entries > self.max_entries:
+                self._evict(now)
+
+    def _evict(self, now):
+        # Expired entries go first, then the least recently used down to 90% of the limit
+        expired = self._db.execute('DELETE FROM results WHERE created_at <= ?', (now - self.ttl,)).rowcount
+        self._entries -= expired
+        excess = self._entries - int(self.max_entries * 0.9)
+        evicted = 0
+        if excess > 0:
+            evicted = self._db.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed_at LIMIT ?)', (excess,)
+            ).rowcount
+            self._entries -= evicted
+        self.stats['evicted'] += expired + evicted
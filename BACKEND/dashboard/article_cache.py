@@ -0,0 +1,93 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from dashboard.models import Article, Bookmark
+
+PREFIX = 'dashboard:articles'
+ARTICLE_CACHE_TIMEOUT = getattr(settings, 'ARTICLE_CACHE_TIMEOUT', 1200)
+USER_CACHE_TIMEOUT = getattr(settings, 'ARTICLE_USER_CACHE_TIMEOUT', 300)
+STATS_ENDPOINTS = ('list', 'detail', 'trending', 'recommended')
+# Category generations never expire, so only these may be used as generation scopes
+CATEGORIES = frozenset(category for category, _ in Article.CATEGORY_CHOICES)
+
+
+def generation(scope):
+    """
+    Version number folded into cache keys. Bumping it orphans every key built from the old
+    value, which invalidates a whole category or user at once without scanning keys.
+    """
+    return cache.get_or_set(f'{PREFIX}:generation:{scope}', time.time_ns, None)
+
+
+def bump_generation(scope):
+    try:
+        cache.incr(f'{PREFIX}:generation:{scope}')
+    except ValueError:
+        # Evicted; restart from a value that can never collide with an older generation
+        cache.set(f'{PREFIX}:generation:{scope}', time.time_ns(), None)
+
+
+def record(endpoint, outcome):
+    key = f'{PREFIX}:stats:{endpoint}:{outcome}'
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def cache_stats():
+    stats = {}
+    for endpoint in STATS_ENDPOINTS:
+        hits = cache.get(f'{PREFIX}:stats:{endpoint}:hit', 0)
+        misses = cache.get(f'{PREFIX}:stats:{endpoint}:miss', 0)
+        total = hits + misses
+        stats[endpoint] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / total, 4) if total else None}
+    return stats
+
+
+def cached_payload(endpoint, key_parts, build, timeout=ARTICLE_CACHE_TIMEOUT):
+    """Return the payload cached under key_parts, calling build() on a miss."""
+    digest = hashlib.sha1(repr(key_parts).encode('utf-8')).hexdigest()
+    key = f'{PREFIX}:{endpoint}:{digest}'
+    payload = cache.get(key)
+    if payload is None:
+        record(endpoint, 'miss')
+        payload = build()
+        cache.set(key, payload, timeout)
+    else:
+        record(endpoint, 'hit')
+    return payload
+
+
+def bookmarked_article_ids(user):
+    key = f'{PREFIX}:bookmarks:{user.id}:{generation(f"user:{user.id}")}'
+    return cache.get_or_set(
+        key,
+        lambda: set(Bookmark.objects.filter(user=user).values_list('article_id', flat=True)),
+        USER_CACHE_TIMEOUT,
+    )
+
+
+def overlay_bookmarks(articles, user):
+    """Shared payloads are cached without is_bookmarked; fill it in for the requesting user."""
+    bookmarked = bookmarked_article_ids(user)
+    return [{**article, 'is_bookmarked': article['id'] in bookmarked} for article in articles]
+
+
+def invalidate_article_feeds(categories):
+    """Called after the scraper saves articles: drops the combined feed and each touched category."""
+    bump_generation('all')
+    for category in set(categories):
+        bump_generation(category)
+
+
+def invalidate_trending():
+    bump_generation('trending')
+
+
+def invalidate_user(user):
+    """Called on bookmark writes: drops the user's bookmark set and recommendations."""
+    bump_generation(f'user:{user.id}')
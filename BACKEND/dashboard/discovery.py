@@ -0,0 +1,183 @@
+import io
+import logging
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlsplit
+
+from bs4 import BeautifulSoup, SoupStrainer
+from django.conf import settings
+from django.core.cache import cache
+from lxml import etree
+from dashboard.link_filter import normalize_url
+from dashboard.scrape_articles import extract_article_links, make_request
+
+logger = logging.getLogger(__name__)
+
+DISCOVERY_TTL = getattr(settings, 'SCRAPER_DISCOVERY_TTL', 86400)  # seconds a source's feed list is trusted
+MAX_FEED_ENTRIES = getattr(settings, 'SCRAPER_MAX_FEED_ENTRIES', 50)
+MAX_CHILD_SITEMAPS = 2
+
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml')
+ENTRY_TAGS = frozenset({'item', 'entry', 'url'})
+DATE_TAGS = frozenset({'pubDate', 'published', 'updated', 'lastmod', 'date', 'publication_date'})
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def parse_iso_date(text):
+    # Before Python 3.11 fromisoformat rejects the trailing Z that Atom and sitemap dates use
+    if text[-1:] in ('Z', 'z'):
+        text = text[:-1] + '+00:00'
+    return datetime.fromisoformat(text)
+
+
+def parse_date(text):
+    for parse in (parsedate_to_datetime, parse_iso_date):
+        try:
+            parsed = parse(text)
+        except (TypeError, ValueError, IndexError):
+            continue
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=dt_timezone.utc)
+    return None
+
+
+def feed_entry(element):
+    """Link and publication date of an RSS item, Atom entry or sitemap url element."""
+    link = published = None
+    for child in element.iter():
+        name = local_name(child.tag)
+        text = (child.text or '').strip()
+        if name == 'link' and link is None:
+            # Atom links carry the URL in href; only the alternate (default) link is the article
+            if child.get('href'):
+                if child.get('rel', 'alternate') == 'alternate':
+                    link = child.get('href')
+            elif text:
+                link = text
+        elif name == 'loc' and link is None and child.getparent() is element:
+            link = text
+        elif name in DATE_TAGS and published is None and text:
+            published = parse_date(text)
+    return {'link': link, 'published': published} if link else None
+
+
+def parse_feed(content):
+    """
+    Entries of an RSS, Atom or sitemap document plus any child sitemaps of a sitemap index.
+    Parsed incrementally with iterparse, clearing each element once read so memory stays flat.
+    """
+    entries, children = [], []
+    parser = etree.iterparse(
+        io.BytesIO(content), events=('end',), recover=True, resolve_entities=False, no_network=True,
+    )
+    try:
+        for _, element in parser:
+            name = local_name(element.tag)
+            if name in ENTRY_TAGS:
+                entry = feed_entry(element)
+                if entry:
+                    entries.append(entry)
+            elif name == 'sitemap':
+                loc = next((child.text for child in element if local_name(child.tag) == 'loc' and child.text), None)
+                if loc:
+                    children.append(loc.strip())
+            else:
+                continue
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        logger.warning(f"Could not parse feed: {e}")
+    return entries, children
+
+
+def fetch_feed_entries(feed_url, follow_children=True):
+    response = yield feed_url
+    if response is None or response.status_code != 200:
+        return []
+    entries, children = parse_feed(response.content)
+    if follow_children:
+        for child_url in children[:MAX_CHILD_SITEMAPS]:
+            entries.extend((yield from fetch_feed_entries(child_url, follow_children=False)))
+    return entries
+
+
+def find_feeds(page_url):
+    """
+    Feeds advertised by an index page (<link rel="alternate">), plus news sitemaps from robots.txt
+    for site roots. Section pages skip robots.txt since its sitemaps cover every category.
+    Returns (feed_urls, page_response) so a fallback to HTML anchors does not refetch the page.
+    """
+    feeds = []
+    page_response = yield page_url
+    if page_response is not None and page_response.status_code == 200:
+        for tag in BeautifulSoup(page_response.content, 'lxml', parse_only=SoupStrainer('link')):
+            if tag.get('type') in FEED_TYPES and 'alternate' in (tag.get('rel') or []) and tag.get('href'):
+                feeds.append(urljoin(page_url, tag['href']))
+
+    if urlsplit(page_url).path in ('', '/'):
+        robots = yield urljoin(page_url, '/robots.txt')
+        if robots is not None and robots.status_code == 200:
+            for line in robots.text.splitlines():
+                key, _, value = line.partition(':')
+                if key.strip().lower() == 'sitemap' and 'news' in value.lower():
+                    feeds.append(value.strip())
+    return list(dict.fromkeys(feeds)), page_response
+
+
+def discovery_steps(page_url):
+    """
+    Candidate article links for an index page and how they were found ('feed' or 'html').
+    Feeds and news sitemaps are preferred: a few KB of XML list the fresh articles directly.
+    The feed list per source is cached for DISCOVERY_TTL; HTML anchors are the fallback.
+
+    A generator that yields each index URL it needs, is sent the response (None on failure) and
+    returns (links, method), so the caller decides how requests are made; see advance().
+    """
+    cache_key = f'dashboard:discovery:{page_url}'
+    feeds = cache.get(cache_key)
+    page_response = None
+    if feeds is None:
+        feeds, page_response = yield from find_feeds(page_url)
+        cache.set(cache_key, feeds, DISCOVERY_TTL)
+
+    entries = []
+    for feed_url in feeds:
+        entries.extend((yield from fetch_feed_entries(feed_url)))
+        if len(entries) >= MAX_FEED_ENTRIES:
+            break
+    if entries:
+        oldest = datetime.min.replace(tzinfo=dt_timezone.utc)
+        entries.sort(key=lambda entry: entry['published'] or oldest, reverse=True)
+        return [normalize_url(urljoin(page_url, entry['link'])) for entry in entries[:MAX_FEED_ENTRIES]], 'feed'
+
+    if feeds:
+        # Advertised feeds came back empty; look for them again on the next run
+        cache.delete(cache_key)
+    if page_response is None:
+        page_response = yield page_url
+    if page_response is None:
+        return [], 'html'
+    return extract_article_links(page_url, page_response.text), 'html'
+
+
+def advance(steps, response=None):
+    """
+    Send response to discovery_steps: (next_url, None) while it needs a request, then
+    (None, (links, method)). StopIteration is not raised, as it cannot cross an asyncio future.
+    """
+    try:
+        return steps.send(response), None
+    except StopIteration as done:
+        return None, done.value
+
+
+def discover_article_links(session, page_url):
+    """discovery_steps with blocking requests through make_request."""
+    steps = discovery_steps(page_url)
+    url, result = advance(steps)
+    while url is not None:
+        url, result = advance(steps, make_request(session, url, 'index'))
+    return result
@@ -0,0 +1,90 @@
+from urllib.parse import urljoin
+
+from lxml import etree, html as lxml_html
+
+BLOCK_TAGS = frozenset({'p', 'h2', 'h3', 'h4'})
+SKIP_TAGS = frozenset({'script', 'style'})
+MIN_BLOCK_CHARS = 20  # shorter paragraphs and headings are bylines, captions or buttons
+
+
+def squash(text):
+    return ' '.join(text.split()) if text else ''
+
+
+def extract_page(markup, url, encoding=None):
+    """
+    Everything the scraper reads from an article page, gathered in a single walk over an lxml
+    tree: title, OpenGraph metadata, media URL, body text blocks and the text measurements the
+    pre-screen works from. markup may be str or bytes; bytes are decoded with `encoding`, or
+    with the charset the page declares when it is None. Returns None for unparseable markup.
+    """
+    if isinstance(markup, str):
+        markup, encoding = markup.encode('utf-8'), 'utf-8'
+    try:
+        parser = lxml_html.HTMLParser(encoding=encoding)
+    except LookupError:
+        # Unknown charset name in the headers; fall back to the one the page declares
+        parser = lxml_html.HTMLParser()
+    try:
+        root = lxml_html.document_fromstring(markup, parser=parser)
+    except (etree.ParserError, ValueError):
+        return None
+
+    title = first_h1 = item_image = featured_image = None
+    og = {}
+    blocks, paragraph_words = [], []
+    page_chars = link_chars = 0
+    in_body = False
+
+    for element in root.iter():
+        tag = element.tag
+        if not isinstance(tag, str):
+            # Comments and processing instructions; their tail is still page text
+            if in_body:
+                page_chars += len(squash(element.tail))
+            continue
+        if tag == 'body':
+            in_body = True
+        if in_body:
+            if tag not in SKIP_TAGS:
+                page_chars += len(squash(element.text))
+            page_chars += len(squash(element.tail))
+
+        if tag in BLOCK_TAGS:
+            if next(element.iter(*SKIP_TAGS), None) is None:
+                text = squash(element.text_content())
+                if len(text) > MIN_BLOCK_CHARS:
+                    blocks.append(text)
+                if tag == 'p' and in_body:
+                    paragraph_words.append(len(text.split()))
+            elif tag == 'p' and in_body:
+                paragraph_words.append(len(element.text_content().split()))
+        elif tag == 'a':
+            if in_body:
+                link_chars += len(squash(element.text_content()))
+        elif tag == 'meta':
+            prop = element.get('property') or ''
+            if prop.startswith('og:'):
+                og.setdefault(prop[3:], element.get('content') or '')
+            elif element.get('itemprop') == 'image' and item_image is None:
+                item_image = element.get('content') or element.get('src')
+        elif tag == 'title':
+            if title is None:
+                title = squash(element.text_content())
+        elif tag == 'h1':
+            if first_h1 is None:
+                first_h1 = squash(element.text_content())
+        elif tag == 'img' and featured_image is None:
+            if 'featured-image' in (element.get('class') or '').split():
+                featured_image = element.get('src')
+
+    media_url = og.get('image') or item_image or featured_image
+    return {
+        'title': title if title is not None else first_h1,
+        'content': ' '.join(blocks),
+        'media_url': urljoin(url, media_url) if media_url else None,
+        'og': og,
+        'page_chars': page_chars,
+        'link_chars': link_chars,
+        'paragraph_words': paragraph_words,
+    }
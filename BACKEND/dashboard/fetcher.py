@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HOST_CONCURRENCY = getattr(settings, 'SCRAPER_HOST_CONCURRENCY', 2)
+HOST_MIN_INTERVAL = getattr(settings, 'SCRAPER_HOST_MIN_INTERVAL', 1.0)
+SHARED_SLOT_TIMEOUT = 120  # seconds a crashed process can hold a shared host slot; above a request's retries
+SHARED_SLOT_POLL_INTERVAL = 0.2  # seconds between attempts at a host slot other processes hold
+
+
+def host_key(url):
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class HostThrottle:
+    """
+    Per-host politeness for the concurrent scraper: at most `concurrency` requests in flight
+    to one host, and request starts to that host spaced at least `min_interval` seconds apart.
+    slot() waits in the calling thread, which suits callers that run their own threads; the
+    pipeline waits in its event loop instead through AsyncHostThrottle.
+    """
+
+    shared = False  # whether the limits hold across processes; see SharedHostThrottle
+
+    def __init__(self, concurrency=HOST_CONCURRENCY, min_interval=HOST_MIN_INTERVAL):
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_start = {}
+
+    def acquire(self, host):
+        """
+        Claim one of host's slots beyond those of the caller's own semaphore, or None when all
+        are taken. Within one process the semaphore is the whole limit, so this always succeeds.
+        """
+        return True
+
+    def release(self, claim):
+        pass
+
+    def reserve(self, host):
+        """Reserve the next start time for host; returns how many seconds to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.min_interval
+        return start - now
+
+    @contextmanager
+    def slot(self, url):
+        host = host_key(url)
+        with self._lock:
+            semaphore = self._slots.setdefault(host, threading.BoundedSemaphore(self.concurrency))
+        with semaphore:
+            delay = self.reserve(host)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+
+
+class SharedHostThrottle(HostThrottle):
+    """
+    HostThrottle whose slots and start times live in `cache`, shared by every worker process.
+    A scrape run is split into one Celery task per category, and a site listed under several
+    categories must still see `concurrency` requests in flight and one start per `min_interval`
+    in total. Start times are whole multiples of min_interval, each claimed with cache.add, so
+    the reservation needs nothing more atomic than that from the cache backend. Should the cache
+    fail, the limits fall back to this process alone rather than failing the request.
+    """
+
+    shared = True
+
+    def __init__(self, cache, concurrency=HOST_CONCURRENCY, min_interval=HOST_MIN_INTERVAL):
+        super().__init__(concurrency, min_interval)
+        self.cache = cache
+
+    def key(self, host, *parts):
+        return ':'.join(('dashboard:host-throttle', host, *map(str, parts)))
+
+    def reserve(self, host):
+        if self.min_interval <= 0:
+            return 0
+        try:
+            now = time.time()
+            start = math.ceil(now / self.min_interval)
+            timeout = math.ceil(self.min_interval) + 60
+            while not self.cache.add(self.key(host, 'start', start), True, timeout):
+                start += 1
+            return max(0.0, start * self.min_interval - now)
+        except Exception as e:
+            logger.warning(f"Shared host throttle unavailable, spacing {host} within this process only: {e}")
+            return super().reserve(host)
+
+    def acquire(self, host):
+        token = uuid4().hex
+        try:
+            for index in range(self.concurrency):
+                key = self.key(host, 'slot', index)
+                if self.cache.add(key, token, SHARED_SLOT_TIMEOUT):
+                    return key, token
+        except Exception as e:
+            logger.warning(f"Shared host throttle unavailable, limiting {host} within this process only: {e}")
+            return True
+        return None
+
+    def release(self, claim):
+        if claim is True:
+            return
+        key, token = claim
+        try:
+            if self.cache.get(key) == token:
+                self.cache.delete(key)
+        except Exception as e:
+            # The slot frees itself after SHARED_SLOT_TIMEOUT
+            logger.warning(f"Could not release shared host slot {key}: {e}")
+
+    @contextmanager
+    def slot(self, url):
+        host = host_key(url)
+        with self._lock:
+            semaphore = self._slots.setdefault(host, threading.BoundedSemaphore(self.concurrency))
+        with semaphore:
+            while (claim := self.acquire(host)) is None:
+                time.sleep(SHARED_SLOT_POLL_INTERVAL)
+            try:
+                delay = self.reserve(host)
+                if delay > 0:
+                    time.sleep(delay)
+                yield
+            finally:
+                self.release(claim)
+
+
+class AsyncHostThrottle:
+    """
+    HostThrottle for asyncio callers: a request waits for its host's turn in the event loop and
+    takes a worker thread only once it may start, so pool threads never sleep and different
+    hosts never wait on each other. Start times are shared with `throttle`, so blocking callers
+    keep the same spacing. Its semaphores belong to one event loop; create one per loop. Calls
+    into a shared throttle's cache run on `executor`, since they may query the database.
+    """
+
+    def __init__(self, throttle, executor=None):
+        self.throttle = throttle
+        self.executor = executor
+        self._slots = {}
+
+    async def _call(self, function, *args):
+        if not self.throttle.shared:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    @asynccontextmanager
+    async def turn(self, url):
+        host = host_key(url)
+        semaphore = self._slots.setdefault(host, asyncio.Semaphore(self.throttle.concurrency))
+        async with semaphore:
+            while (claim := await self._call(self.throttle.acquire, host)) is None:
+                await asyncio.sleep(SHARED_SLOT_POLL_INTERVAL)
+            try:
+                delay = await self._call(self.throttle.reserve, host)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield
+            finally:
+                await self._call(self.throttle.release, claim)
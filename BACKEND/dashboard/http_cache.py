@@ -0,0 +1,178 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS responses_size ON responses (size);
+"""
+# Seconds a write waits for another worker process to release the database before giving up
+BUSY_TIMEOUT = 5
+# Share of max_bytes a process writes between checks of the size of the whole cache
+SIZE_CHECK_FRACTION = 0.05
+
+
+class ScraperHttpCache:
+    """
+    On-disk HTTP cache used only by the scraper. Fresh entries are served without a request;
+    stale ones are revalidated with If-None-Match / If-Modified-Since, so an unchanged page costs
+    a 304 instead of a download. Each URL class has its own TTL, and once the stored bodies
+    exceed max_bytes the least recently used entries are evicted. Every worker process shares the
+    file, so the size is read from the database rather than tracked per process, and a database
+    error costs the cache, never the fetch.
+    """
+
+    def __init__(self, path, max_bytes, ttls):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._db = None
+        self._unchecked_bytes = 0
+
+    def _connection(self):
+        # Opened on first use, shared by the fetch threads under the lock
+        if self._db is None:
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = Counter()
+
+    def _lookup(self, url, now, revalidate=False):
+        # Called under the lock; a fresh row is served unless the caller revalidates, so it counts as a hit
+        row = self._connection().execute(
+            'SELECT status, headers, body, size, etag, last_modified, expires_at FROM responses WHERE url = ?',
+            (url,),
+        ).fetchone()
+        if row and row[6] > now and not revalidate:
+            self._db.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (now, url))
+            self.stats['requests'] += 1
+            self.stats['hits'] += 1
+            self.stats['bytes_saved'] += row[3]
+        return row
+
+    def fresh(self, url):
+        """The cached response for url if it is still fresh, else None. Never makes a request."""
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._lookup(url, now)
+        except sqlite3.Error as e:
+            self._failed(url, e)
+            return None
+        return self._response(url, row) if row and row[6] > now else None
+
+    def get(self, url, url_class, fetch, revalidate=False):
+        """
+        Response for url, from the cache when possible. fetch(headers) performs the real GET
+        with the given conditional headers and is only called when the network is needed. With
+        revalidate, even a fresh entry is checked with the server, at the cost of a 304.
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._lookup(url, now, revalidate)
+        except sqlite3.Error as e:
+            self._failed(url, e)
+            return fetch({})
+        if row and row[6] > now and not revalidate:
+            return self._response(url, row)
+        with self._lock:
+            self.stats['requests'] += 1
+
+        headers = {}
+        if row and row[4]:
+            headers['If-None-Match'] = row[4]
+        if row and row[5]:
+            headers['If-Modified-Since'] = row[5]
+        response = fetch(headers)
+
+        with self._lock:
+            try:
+                if row and response.status_code == 304:
+                    self.stats['revalidated'] += 1
+                    self.stats['bytes_saved'] += row[3]
+                    self._db.execute(
+                        'UPDATE responses SET expires_at = ?, accessed_at = ? WHERE url = ?',
+                        (now + self.ttls[url_class], now, url),
+                    )
+                elif response.status_code == 200:
+                    self.stats['misses'] += 1
+                    self._store(url, response, now + self.ttls[url_class], now)
+                else:
+                    self.stats['misses'] += 1
+            except sqlite3.Error as e:
+                self._failed(url, e)
+        return self._response(url, row) if row and response.status_code == 304 else response
+
+    def _failed(self, url, error):
+        # Typically another worker process holding the database past BUSY_TIMEOUT
+        self.stats['errors'] += 1
+        logger.warning(f"HTTP cache unavailable for {url}, using the network response: {error}")
+
+    def _store(self, url, response, expires_at, now):
+        body = response.content
+        self._db.execute(
+            'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                url, response.status_code, json.dumps(dict(response.headers)), body, len(body),
+                response.headers.get('ETag'), response.headers.get('Last-Modified'), expires_at, now,
+            ),
+        )
+        # The other processes write to the same file, so the total is read back now and then
+        self._unchecked_bytes += len(body)
+        if self._unchecked_bytes > self.max_bytes * SIZE_CHECK_FRACTION:
+            self._unchecked_bytes = 0
+            total_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if total_bytes > self.max_bytes:
+                self._evict(total_bytes)
+
+    def _evict(self, total_bytes):
+        # Drop least recently used entries until 10% under the limit, so eviction is not run per insert
+        target = self.max_bytes * 0.9
+        rows = self._db.execute('SELECT url, size FROM responses ORDER BY accessed_at').fetchall()
+        evicted = []
+        for url, size in rows:
+            if total_bytes <= target:
+                break
+            evicted.append((url,))
+            total_bytes -= size
+        self._db.executemany('DELETE FROM responses WHERE url = ?', evicted)
+        self.stats['evicted'] += len(evicted)
+
+    @staticmethod
+    def _response(url, row):
+        status, headers, body = row[:3]
+        response = requests.Response()
+        response.url = url
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        return response
@@ -0,0 +1,124 @@
+import re
+from collections import Counter, defaultdict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.conf import settings
+from dashboard.fetcher import host_key
+from dashboard.models import Article
+
+MIN_LINK_SCORE = getattr(settings, 'SCRAPER_MIN_LINK_SCORE', 2)
+LEARNED_PATTERN_SAMPLE = 5000  # most recent saved articles used to learn each site's URL shapes
+LEARNED_PATTERN_MIN_SHARE = 0.1  # share of a site's articles a URL shape needs to be trusted
+
+DATE_SEGMENT_RE = re.compile(r'/(19|20)\d{2}/(0?[1-9]|1[0-2])/|/(19|20)\d{2}-\d{2}-\d{2}|/(19|20)\d{6}/')
+ARTICLE_ID_RE = re.compile(r'\d{5,}')
+SKIP_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.pdf', '.mp3', '.mp4', '.zip', '.xml', '.rss',
+)
+TRACKING_PARAMS = frozenset({
+    'cmpid', 'dclid', 'fbclid', 'ftag', 'gclid', 'icid', 'igshid', 'mc_cid', 'mc_eid', 'msclkid',
+    'ns_campaign', 'ns_mchannel', 'ns_source', 'ocid', 'ref', 'ref_src', 's_cid', 'taid', '_ga',
+})
+NON_ARTICLE_SEGMENTS = frozenset({
+    'about', 'about-us', 'account', 'advertise', 'author', 'authors', 'careers', 'categories',
+    'category', 'contact', 'contact-us', 'feed', 'gallery', 'galleries', 'help', 'jobs', 'login',
+    'newsletter', 'newsletters', 'photos', 'podcast', 'podcasts', 'privacy', 'privacy-policy',
+    'register', 'rss', 'search', 'shop', 'sign-in', 'signin', 'subscribe', 'subscription', 'tag',
+    'tags', 'terms', 'topic', 'topics', 'video', 'videos',
+})
+
+
+def normalize_url(url):
+    """
+    Canonical form used for fetching, saving and the already-saved check: lowercase scheme and
+    host, no default port, fragment, tracking parameters or trailing slash, remaining query sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f'{host}:{parts.port}'
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    ))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def path_segments(url):
+    return [segment for segment in urlsplit(url).path.lower().split('/') if segment]
+
+
+def path_shape(url):
+    """Coarse URL template used for learning: the first path segment with digits folded, and the depth."""
+    segments = path_segments(url)
+    if not segments:
+        return None
+    return re.sub(r'\d', '#', segments[0]), len(segments)
+
+
+def same_site(url, page_url):
+    host, page_host = host_key(url), host_key(page_url)
+    return host == page_host or host.endswith(f'.{page_host}') or page_host.endswith(f'.{host}')
+
+
+def learn_allow_patterns(limit=LEARNED_PATTERN_SAMPLE):
+    """{host: {path shape}} for the URL shapes common among each site's already saved articles."""
+    shapes = defaultdict(Counter)
+    for source_url in Article.objects.order_by('-id').values_list('source_url', flat=True)[:limit]:
+        shape = path_shape(source_url)
+        if shape:
+            shapes[host_key(source_url)][shape] += 1
+    return {
+        host: {shape for shape, count in counter.items() if count >= LEARNED_PATTERN_MIN_SHARE * counter.total()}
+        for host, counter in shapes.items()
+    }
+
+
+def score_link(page_url, link, allow_patterns):
+    """How much a link looks like an article on the index page's site; None if it clearly is not one."""
+    parts = urlsplit(link)
+    if parts.scheme not in ('http', 'https') or not same_site(link, page_url):
+        return None
+    segments = path_segments(link)
+    if not segments or parts.path.lower().endswith(SKIP_EXTENSIONS):
+        return None
+    if any(segment in NON_ARTICLE_SEGMENTS for segment in segments):
+        return None
+
+    score = 0
+    if DATE_SEGMENT_RE.search(parts.path):
+        score += 2
+    slug = segments[-1]
+    if slug.count('-') >= 3:
+        score += 2
+    elif len(slug) >= 25:
+        score += 1
+    if ARTICLE_ID_RE.search(slug):
+        score += 1
+    # Single-segment paths are mostly section fronts
+    score += 1 if len(segments) >= 2 else -1
+    if path_shape(link) in allow_patterns.get(host_key(link), ()):
+        score += 3
+    return score
+
+
+def rank_candidate_links(page_url, links, allow_patterns, min_score=MIN_LINK_SCORE):
+    """Links worth fetching from an index page, best first, without the ones already saved."""
+    scored = []
+    for link in links:
+        score = score_link(page_url, link, allow_patterns)
+        if score is not None and score >= min_score:
+            scored.append((score, link))
+    # One query per index page; the trailing-slash variant catches rows saved before URLs were normalized
+    variants = {link: (link, f'{link}/') for _, link in scored}
+    existing = set(
+        Article.objects.filter(
+            source_url__in=[variant for pair in variants.values() for variant in pair]
+        ).values_list('source_url', flat=True)
+    )
+    return [
+        link for _, link in sorted(scored, key=lambda pair: (-pair[0], pair[1]))
+        if existing.isdisjoint(variants[link])
+    ]
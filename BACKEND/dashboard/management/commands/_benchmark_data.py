@@ -0,0 +1,27 @@
+from dashboard.models import Article, is_article_listable
+
+BENCHMARK_URL_PREFIX = 'https://benchmark.invalid/article/'
+
+
+def seed_articles(count, start=0, batch_size=1000):
+    """Insert synthetic articles numbered start..start+count-1; every tenth one has no media."""
+    categories = [choice for choice, _ in Article.CATEGORY_CHOICES]
+    for batch_start in range(start, start + count, batch_size):
+        articles = []
+        for i in range(batch_start, min(batch_start + batch_size, start + count)):
+            title = f'Benchmark article number {i}'
+            content = f'Benchmark article body {i} ' * 20
+            media_url = f'https://benchmark.invalid/media/{i}.jpg' if i % 10 else None
+            articles.append(Article(
+                title=title,
+                content=content,
+                source_url=f'{BENCHMARK_URL_PREFIX}{i}',
+                media_url=media_url,
+                category=categories[i % len(categories)],
+                is_listable=is_article_listable(title, content, media_url),
+            ))
+        Article.objects.bulk_create(articles)
+
+
+def seeded_articles():
+    return Article.objects.filter(source_url__startswith=BENCHMARK_URL_PREFIX)
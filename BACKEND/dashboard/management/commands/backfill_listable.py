@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from dashboard.models import Article, is_article_listable
+
+
+def backfill_listable(article_model, batch_size=1000):
+    """Recompute `is_listable` in primary-key batches, writing only rows whose flag changed."""
+    updated = 0
+    last_id = 0
+    while True:
+        rows = list(
+            article_model.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'title', 'content', 'media_url', 'is_listable')[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        changed = {True: [], False: []}
+        for article_id, title, content, media_url, current in rows:
+            listable = is_article_listable(title, content, media_url)
+            if listable != current:
+                changed[listable].append(article_id)
+
+        with transaction.atomic():
+            for listable, ids in changed.items():
+                if ids:
+                    article_model.objects.filter(id__in=ids).update(is_listable=listable)
+        updated += len(changed[True]) + len(changed[False])
+    return updated
+
+
+class Command(BaseCommand):
+    help = 'Recompute the is_listable quality flag for existing articles in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = backfill_listable(Article, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated is_listable on {updated} articles'))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from dashboard.models import Article
+from dashboard.near_duplicates import simhash
+
+
+def backfill_simhash(article_model, batch_size=1000):
+    """
+    Sign stored articles that have no SimHash yet, in primary-key batches. Only the stored content
+    can be signed; source_simhash stays empty for old rows since their page text was not kept.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        rows = list(
+            article_model.objects.filter(id__gt=last_id, simhash__isnull=True)
+            .order_by('id')
+            .only('id', 'content')[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        signed = []
+        for article in rows:
+            article.simhash = simhash(article.content)
+            if article.simhash is not None:
+                signed.append(article)
+
+        with transaction.atomic():
+            article_model.objects.bulk_update(signed, ['simhash'])
+        updated += len(signed)
+    return updated
+
+
+class Command(BaseCommand):
+    help = 'Compute SimHash signatures for existing articles in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = backfill_simhash(Article, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Signed {updated} articles'))
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+from dashboard.models import Article
+from dashboard.scrape_articles import AI_BATCH_SIZE, AI_TOKEN_BUDGET, AIContentProcessor, estimate_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        'Run saved articles through Gemini in single and batched mode and report articles per '
+        'minute and tokens per article for each. Bypasses the AI result cache and makes real Gemini API calls.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=AI_BATCH_SIZE)
+        parser.add_argument('--token-budget', type=int, default=AI_TOKEN_BUDGET)
+
+    def handle(self, *args, **options):
+        articles = list(
+            Article.objects.listable().order_by('-id').values_list('title', 'content')[:options['articles']]
+        )
+        if not articles:
+            self.stdout.write(self.style.ERROR('No listable articles to benchmark with'))
+            return
+
+        single = self.run_mode('single', lambda: [AIContentProcessor._generate_ai_content(*a) for a in articles])
+        batches = self.plan_batches(articles, options['batch_size'], options['token_budget'])
+        batched = self.run_mode(
+            f'batched ({len(batches)} requests)',
+            lambda: [result for batch in batches for result in AIContentProcessor._generate_ai_content_batch(batch)],
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Summary'))
+        for name, report in (('single', single), ('batched', batched)):
+            self.stdout.write(
+                f"{name:<8} {report['articles_per_minute']:8.1f} articles/min   "
+                f"{report['tokens_per_article']:8.1f} tokens/article   {report['valid']} valid"
+            )
+
+    @staticmethod
+    def plan_batches(articles, batch_size, token_budget):
+        batches, batch, tokens = [], [], 0
+        for title, content in articles:
+            cost = estimate_tokens(title) + estimate_tokens(content)
+            if batch and (len(batch) >= batch_size or tokens + cost > token_budget):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append((title, content))
+            tokens += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def run_mode(self, name, run):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{name} mode'))
+        AIContentProcessor.stats.clear()
+        started = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - started
+        stats = AIContentProcessor.stats
+        tokens = stats['prompt_tokens'] + stats['output_tokens']
+        report = {
+            'articles_per_minute': len(results) / elapsed * 60,
+            'tokens_per_article': tokens / len(results),
+            'valid': sum(1 for result in results if result and result.get('is_valid')),
+        }
+        self.stdout.write(
+            f"{stats['calls']} requests, {elapsed:.1f}s, {stats['prompt_tokens']} prompt tokens, "
+            f"{stats['output_tokens']} output tokens"
+        )
+        return report
@@ -0,0 +1,147 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from dashboard.management.commands._benchmark_data import seed_articles, seeded_articles
+from dashboard.models import Article, Bookmark, UserArticleView
+
+BENCHMARK_EMAIL_DOMAIN = 'benchmark.invalid'
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic dataset and report query plans and timings for the hot article, '
+        'bookmark and view lookups, with and without the composite indexes. '
+        'Drops and recreates indexes, so only run it against a development database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=20000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--views-per-user', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows afterwards')
+
+    def handle(self, *args, **options):
+        self.seed(options['articles'], options['users'], options['views_per_user'])
+        try:
+            user = get_user_model().objects.filter(email__endswith=f'@{BENCHMARK_EMAIL_DOMAIN}').first()
+            article = seeded_articles().last()
+            queries = self.build_queries(user, article)
+
+            self.stdout.write(self.style.MIGRATE_HEADING('With indexes'))
+            with_indexes = self.run_queries(queries, options['repeat'])
+
+            self.stdout.write(self.style.MIGRATE_HEADING('Without composite indexes'))
+            with self.indexes_removed():
+                without_indexes = self.run_queries(queries, options['repeat'])
+
+            self.stdout.write(self.style.MIGRATE_HEADING('Summary (median ms)'))
+            for name in queries:
+                self.stdout.write(
+                    f'{name:<24} without: {without_indexes[name]:8.3f}   with: {with_indexes[name]:8.3f}'
+                )
+        finally:
+            if not options['keep']:
+                self.cleanup()
+
+    def seed(self, article_count, user_count, views_per_user):
+        User = get_user_model()
+        self.stdout.write(f'Seeding {article_count} articles, {user_count} users, {views_per_user} views per user')
+
+        seed_articles(article_count)
+        article_ids = list(seeded_articles().values_list('id', flat=True))
+
+        User.objects.bulk_create(
+            [User(email=f'user{i}@{BENCHMARK_EMAIL_DOMAIN}', name=f'Benchmark {i}') for i in range(user_count)],
+            batch_size=1000,
+        )
+        user_ids = list(
+            User.objects.filter(email__endswith=f'@{BENCHMARK_EMAIL_DOMAIN}').values_list('id', flat=True)
+        )
+
+        Bookmark.objects.bulk_create(
+            [
+                Bookmark(user_id=user_id, article_id=article_id)
+                for user_id in user_ids
+                for article_id in random.sample(article_ids, min(10, len(article_ids)))
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+        now = timezone.now()
+        UserArticleView.objects.bulk_create(
+            [
+                UserArticleView(
+                    user_id=user_id,
+                    article_id=random.choice(article_ids),
+                    viewed_at=now - timedelta(days=random.uniform(0, 60)),
+                )
+                for user_id in user_ids
+                for _ in range(views_per_user)
+            ],
+            batch_size=1000,
+        )
+
+    def build_queries(self, user, article):
+        thirty_days_ago = timezone.now() - timedelta(days=30)
+        return {
+            'feed': lambda: Article.objects.listable().order_by('-created_at', '-id')[:9],
+            'feed_by_category': lambda: Article.objects.listable().filter(
+                category='sports'
+            ).order_by('-created_at', '-id')[:9],
+            'bookmark_lookup': lambda: Bookmark.objects.filter(user=user, article=article),
+            'recent_user_views': lambda: UserArticleView.objects.filter(user=user).order_by('-viewed_at')[:5],
+            'trending_30d': lambda: UserArticleView.objects.filter(
+                viewed_at__gte=thirty_days_ago
+            ).values('article').annotate(view_count=Count('id')).order_by('-view_count')[:5],
+        }
+
+    def run_queries(self, queries, repeat):
+        results = {}
+        for name, build in queries.items():
+            self.stdout.write(self.style.SQL_FIELD(name))
+            self.stdout.write(build().explain())
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(build())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+            self.stdout.write(f'median {results[name]:.3f} ms over {repeat} runs\n')
+        return results
+
+    @contextmanager
+    def indexes_removed(self):
+        indexes = self.composite_indexes()
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.remove_index(model, index)
+        try:
+            yield
+        finally:
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.add_index(model, index)
+
+    @staticmethod
+    def composite_indexes():
+        return [
+            (model, index)
+            for model in (Article, UserArticleView)
+            for index in model._meta.indexes
+        ]
+
+    def cleanup(self):
+        UserArticleView.objects.filter(user__email__endswith=f'@{BENCHMARK_EMAIL_DOMAIN}').delete()
+        Bookmark.objects.filter(user__email__endswith=f'@{BENCHMARK_EMAIL_DOMAIN}').delete()
+        get_user_model().objects.filter(email__endswith=f'@{BENCHMARK_EMAIL_DOMAIN}').delete()
+        seeded_articles().delete()
@@ -0,0 +1,38 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from dashboard.near_duplicates import MAX_DISTANCE, SIGNATURE_BITS, SimHashIndex
+
+
+class Command(BaseCommand):
+    help = (
+        'Build a near-duplicate index over random signatures and report build time and time per '
+        'lookup for misses and for near-duplicates. Does not touch the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=300000)
+        parser.add_argument('--lookups', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        signatures = [rng.getrandbits(SIGNATURE_BITS) - (1 << (SIGNATURE_BITS - 1)) for _ in range(options['articles'])]
+
+        started = time.perf_counter()
+        index = SimHashIndex(signatures, range(len(signatures)))
+        self.stdout.write(f'Indexed {len(index)} signatures in {time.perf_counter() - started:.2f}s')
+
+        misses = [rng.getrandbits(SIGNATURE_BITS) - (1 << (SIGNATURE_BITS - 1)) for _ in range(options['lookups'])]
+        near = []
+        for _ in range(options['lookups']):
+            signature = rng.choice(signatures)
+            for bit in rng.sample(range(SIGNATURE_BITS), MAX_DISTANCE):
+                signature ^= 1 << bit
+            near.append(signature)
+
+        for name, queries in (('miss', misses), ('near-duplicate', near)):
+            started = time.perf_counter()
+            found = sum(1 for signature in queries if index.find(signature) is not None)
+            per_lookup = (time.perf_counter() - started) / len(queries) * 1e6
+            self.stdout.write(f'{name:<15} {per_lookup:8.1f} us/lookup   {found}/{len(queries)} matched')
@@ -0,0 +1,49 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from dashboard.management.commands.benchmark_extraction import FIXTURES, load_corpus
+from dashboard.pipeline import parse_executor
+from dashboard.scrape_articles import parse_article
+
+
+class Command(BaseCommand):
+    help = (
+        'Parse saved HTML pages with parse_article on 1..N worker threads and worker processes and '
+        'report pages per second and the speedup over a single worker, to show how the parse stage '
+        'scales with cores.'
+    )
+
+    def add_arguments(self, parser):
+        cores = os.cpu_count() or 1
+        parser.add_argument('--fixtures', default=str(FIXTURES), help='Directory of saved .html/.xhtml pages')
+        parser.add_argument('--http-cache', type=int, default=0, help='Also use up to N pages from the HTTP cache')
+        parser.add_argument('--rounds', type=int, default=20, help='Passes over the corpus per run')
+        parser.add_argument(
+            '--workers', type=int, nargs='+',
+            default=sorted({1, *(2 ** i for i in range(1, cores.bit_length())), cores}),
+        )
+
+    def handle(self, *args, **options):
+        corpus = load_corpus(Path(options['fixtures']), options['http_cache']) * options['rounds']
+        if not corpus:
+            self.stdout.write(self.style.ERROR('No pages to benchmark with'))
+            return
+        links, pages = zip(*corpus)
+        self.stdout.write(f'{len(corpus)} pages per run on {os.cpu_count()} cores')
+
+        baseline = None
+        for workers in options['workers']:
+            for kind, executor in (('threads', ThreadPoolExecutor), ('processes', parse_executor)):
+                with executor(workers) as pool:
+                    # Start every worker and import the scraper before timing
+                    list(pool.map(parse_article, links[:workers], pages[:workers]))
+                    started = time.perf_counter()
+                    list(pool.map(parse_article, links, pages, chunksize=8))
+                    pages_per_second = len(corpus) / (time.perf_counter() - started)
+                baseline = baseline or pages_per_second
+                self.stdout.write(
+                    f'{workers:>3} {kind:<10} {pages_per_second:8.1f} pages/s   {pages_per_second / baseline:5.2f}x'
+                )
@@ -0,0 +1,51 @@
+import itertools
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from dashboard.recommender import ArticleIndex
+
+
+class Command(BaseCommand):
+    help = 'Time TF-IDF index building and top-k recommendation queries over a synthetic corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=100000)
+        parser.add_argument('--vocabulary', type=int, default=50000)
+        parser.add_argument('--words-per-article', type=int, default=300)
+        parser.add_argument('--repeat', type=int, default=50, help='Timed recommendation queries')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        vocabulary = [f'term{i}' for i in range(options['vocabulary'])]
+        # Zipf-like weights so a few terms are common and most are rare, as in news text
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+        cumulative_weights = list(itertools.accumulate(weights))
+        documents = []
+        for article_id in range(1, options['articles'] + 1):
+            words = rng.choices(vocabulary, cum_weights=cumulative_weights, k=options['words_per_article'])
+            documents.append((article_id, ' '.join(words[:8]), ' '.join(words), ''))
+        batches = [documents[i:i + 1000] for i in range(0, len(documents), 1000)]
+
+        started = time.perf_counter()
+        index = ArticleIndex.build(lambda: batches)
+        build_seconds = time.perf_counter() - started
+        self.stdout.write(
+            f'Indexed {len(index)} articles in {build_seconds:.1f}s '
+            f'({index.matrix.nnz} non-zeros, {len(index) / build_seconds:.0f} articles/s)'
+        )
+
+        timings = []
+        for _ in range(options['repeat']):
+            history = {article_id: 1.0 for article_id in rng.sample(range(1, len(index) + 1), 20)}
+            started = time.perf_counter()
+            profile = index.profile(history)
+            index.top_k(profile, 3, exclude_ids=history)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'top-3 query: median {statistics.median(timings):.2f} ms, '
+            f'p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms over {len(timings)} runs'
+        )
@@ -0,0 +1,52 @@
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from dashboard.management.commands._benchmark_data import seed_articles, seeded_articles
+from dashboard.models import Article
+from dashboard.sampling import id_range_cache_key, sample_listable_article_ids
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare cold-start random sampling latency (materialize + random.sample versus random ID '
+        'probing) as the article table grows. Seeds synthetic articles; use a development database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+        parser.add_argument('--repeat', type=int, default=10, help='Timed runs per strategy and size')
+        parser.add_argument('--legacy-limit', type=int, default=1000000,
+                            help='Skip the materializing strategy above this many articles')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows afterwards')
+
+    def handle(self, *args, **options):
+        strategies = {
+            'materialize_and_sample': lambda: random.sample(
+                list(Article.objects.listable()), 3
+            ),
+            'id_probing': lambda: list(Article.objects.filter(id__in=sample_listable_article_ids(3))),
+        }
+        seeded = 0
+        try:
+            for size in sorted(options['sizes']):
+                seed_articles(size - seeded, start=seeded)
+                seeded = size
+                # Only the sampled range; the rest of the cache may be a shared Redis
+                cache.delete(id_range_cache_key())
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{size} articles'))
+                for name, strategy in strategies.items():
+                    if name == 'materialize_and_sample' and size > options['legacy_limit']:
+                        self.stdout.write(f'{name:<24} skipped')
+                        continue
+                    timings = []
+                    for _ in range(options['repeat']):
+                        started = time.perf_counter()
+                        strategy()
+                        timings.append((time.perf_counter() - started) * 1000)
+                    self.stdout.write(f'{name:<24} median {statistics.median(timings):10.3f} ms')
+        finally:
+            if not options['keep']:
+                seeded_articles().delete()
@@ -6,7 +6,9 @@ class Command(BaseCommand):
 
     def handle(self, *args, **kwargs):
         try:
-            scrape_articles()
-            self.stdout.write(self.style.SUCCESS('Successfully scraped articles'))
+            result = scrape_articles()
+            self.stdout.write(self.style.SUCCESS(
+                f"Successfully scraped articles: {result['saved']} saved in {result['elapsed_seconds']}s"
+            ))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'An error occurred: {e}'))
\ No newline at end of file
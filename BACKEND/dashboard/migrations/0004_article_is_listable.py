@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+# Frozen copy of dashboard.models.is_article_listable as it stood when the column was added, so
+# this migration keeps producing the same result when the live predicate changes. Recompute later
+# changes with the backfill_listable command.
+PLACEHOLDER_CONTENT = 'No summary available'
+
+
+def is_article_listable(title, content, media_url):
+    title_keywords = set((title or '').lower().split())
+    content_keywords = set((content or '').lower().split())
+    return bool(
+        media_url and
+        len((title or '').split()) > 2 and
+        (content or '').strip() != PLACEHOLDER_CONTENT and
+        any(keyword in content_keywords for keyword in title_keywords)
+    )
+
+
+def compute_is_listable(apps, schema_editor, batch_size=1000):
+    Article = apps.get_model('dashboard', 'Article')
+    last_id = 0
+    while True:
+        rows = list(
+            Article.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'title', 'content', 'media_url')[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        listable_ids = [row[0] for row in rows if is_article_listable(*row[1:])]
+        if listable_ids:
+            Article.objects.filter(id__in=listable_ids).update(is_listable=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_article_keywords'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='is_listable',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.RunPython(compute_is_listable, migrations.RunPython.noop),
+    ]
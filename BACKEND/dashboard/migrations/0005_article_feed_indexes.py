@@ -0,0 +1,21 @@
+# Generated by Django 5.0.8 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_article_is_listable'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['is_listable', '-created_at', '-id'], name='article_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['category', 'is_listable', '-created_at', '-id'], name='article_category_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.8 on 2026-10-18 02:13
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_bookmarks(apps, schema_editor):
+    # Keep the oldest bookmark for each (user, article) pair so the unique constraint can be added
+    Bookmark = apps.get_model('dashboard', 'Bookmark')
+    duplicates = (
+        Bookmark.objects.values('user_id', 'article_id')
+        .annotate(first_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        Bookmark.objects.filter(
+            user_id=duplicate['user_id'], article_id=duplicate['article_id']
+        ).exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_article_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userarticleview',
+            index=models.Index(fields=['user', '-viewed_at'], name='view_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userarticleview',
+            index=models.Index(fields=['viewed_at', 'article'], name='view_recent_article_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_bookmarks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bookmark',
+            constraint=models.UniqueConstraint(fields=('user', 'article'), name='unique_user_article_bookmark'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.8 on 2026-10-18 02:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userarticleview',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.8 on 2026-10-18 02:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_userarticleview_viewed_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingArticle',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='dashboard.article')),
+                ('category', models.CharField(choices=[('technology', 'Technology'), ('sports', 'Sports'), ('entertainment', 'Entertainment'), ('politics', 'Politics'), ('science', 'Science')], max_length=20)),
+                ('score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score'], name='trending_score_idx'), models.Index(fields=['category', '-score'], name='trending_category_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.8 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_trendingarticle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='simhash',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='source_simhash',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
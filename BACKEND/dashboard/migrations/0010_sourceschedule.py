@@ -0,0 +1,29 @@
+# Generated by Django 5.0.8 on 2026-10-18 02:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_article_simhash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('category', models.CharField(choices=[('technology', 'Technology'), ('sports', 'Sports'), ('entertainment', 'Entertainment'), ('politics', 'Politics'), ('science', 'Science')], max_length=20)),
+                ('interval', models.PositiveIntegerField(help_text='Seconds between polls')),
+                ('next_run_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('last_polled_at', models.DateTimeField(blank=True, null=True)),
+                ('yield_per_hour', models.FloatField(default=0.0, help_text='Smoothed new articles per hour')),
+                ('last_new_articles', models.PositiveIntegerField(default=0)),
+                ('polls', models.PositiveIntegerField(default=0)),
+                ('new_articles', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -1,5 +1,38 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from dashboard.near_duplicates import simhash
+
+PLACEHOLDER_CONTENT = 'No summary available'
+
+
+def is_content_relevant(title, content):
+    # Relevance check: content should include keywords from the title
+    title_keywords = set((title or '').lower().split())
+    content_keywords = set((content or '').lower().split())
+    return any(keyword in content_keywords for keyword in title_keywords)
+
+
+def is_article_listable(title, content, media_url):
+    # Quality gate for the article feeds, evaluated once at ingest time
+    return bool(
+        media_url and
+        len((title or '').split()) > 2 and
+        (content or '').strip() != PLACEHOLDER_CONTENT and
+        is_content_relevant(title, content)
+    )
+
+
+class ArticleQuerySet(models.QuerySet):
+    def listable(self):
+        return self.filter(is_listable=True)
+
+    def with_bookmark_flag(self, user):
+        # Resolved by ArticleSerializer.get_is_bookmarked without a query per article
+        return self.annotate(user_has_bookmarked=models.Exists(
+            Bookmark.objects.filter(user=user, article=models.OuterRef('pk'))
+        ))
+
 
 class Article(models.Model):
     CATEGORY_CHOICES = (
@@ -19,6 +52,28 @@ class Article(models.Model):
     media_url = models.URLField(max_length=500, null=True, blank=True)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
     keywords = models.TextField(blank=True)
+    is_listable = models.BooleanField(default=False, db_index=True)
+    # SimHash of the stored content, and of the scraped page text it was generated from
+    simhash = models.BigIntegerField(null=True, blank=True, editable=False)
+    source_simhash = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    objects = ArticleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the article feed on (created_at, id), optionally per category
+            models.Index(fields=['is_listable', '-created_at', '-id'], name='article_feed_idx'),
+            models.Index(fields=['category', 'is_listable', '-created_at', '-id'], name='article_category_feed_idx'),
+        ]
+
+    def update_derived_fields(self):
+        # Also called directly by writers that bypass save(), such as bulk_create
+        self.is_listable = is_article_listable(self.title, self.content, self.media_url)
+        self.simhash = simhash(self.content)
+
+    def save(self, *args, **kwargs):
+        self.update_derived_fields()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -28,13 +83,58 @@ class Bookmark(models.Model):
     article = models.ForeignKey(Article, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'article'], name='unique_user_article_bookmark'),
+        ]
+
     def __str__(self):
         return f"{self.user.email} bookmarked {self.article.title}"
 
 class UserArticleView(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     article = models.ForeignKey(Article, on_delete=models.CASCADE)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    # Set explicitly when buffered view events are flushed, so not auto_now_add
+    viewed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Per-user history ordered by recency (view counts, recently viewed articles)
+            models.Index(fields=['user', '-viewed_at'], name='view_user_recent_idx'),
+            # Trending: range scan on viewed_at, grouped by article without touching the table
+            models.Index(fields=['viewed_at', 'article'], name='view_recent_article_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} viewed {self.article.title}"
+
+class TrendingArticle(models.Model):
+    """Materialized time-decayed view score per article, rebuilt by dashboard.trending."""
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    category = models.CharField(max_length=20, choices=Article.CATEGORY_CHOICES)
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='trending_score_idx'),
+            models.Index(fields=['category', '-score'], name='trending_category_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.article.title} trending at {self.score:.2f}"
+
+class SourceSchedule(models.Model):
+    """Adaptive polling state of one index page in WEBSITES, maintained by dashboard.scheduling."""
+    url = models.URLField(max_length=500, unique=True)
+    category = models.CharField(max_length=20, choices=Article.CATEGORY_CHOICES)
+    interval = models.PositiveIntegerField(help_text='Seconds between polls')
+    next_run_at = models.DateTimeField(default=timezone.now, db_index=True)
+    last_polled_at = models.DateTimeField(null=True, blank=True)
+    yield_per_hour = models.FloatField(default=0.0, help_text='Smoothed new articles per hour')
+    last_new_articles = models.PositiveIntegerField(default=0)
+    polls = models.PositiveIntegerField(default=0)
+    new_articles = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.url} every {self.interval}s"
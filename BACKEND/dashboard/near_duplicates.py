@@ -0,0 +1,124 @@
+import hashlib
+import re
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from dashboard.ai_cache import normalize_text
+
+SIGNATURE_BITS = 64
+SIGNATURE_MASK = (1 << SIGNATURE_BITS) - 1
+SHINGLE_SIZE = 3  # words per shingle
+MIN_TOKENS = 20  # shorter texts give unreliable signatures and are never matched
+# Signatures at most this many bits apart are near-duplicates. A syndicated copy with a few words
+# changed per hundred typically lands 4-8 bits away; unrelated articles are usually 20 or more apart.
+MAX_DISTANCE = getattr(settings, 'SCRAPER_NEAR_DUPLICATE_DISTANCE', 7)
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def simhash(text):
+    """
+    64-bit SimHash over word 3-shingles of the normalized text, as a signed integer so it fits a
+    BigIntegerField, or None for texts under MIN_TOKENS words.
+    """
+    tokens = TOKEN_RE.findall(normalize_text(text))
+    if len(tokens) < MIN_TOKENS:
+        return None
+    shingles = {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    digests = b''.join(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles)
+    # One row of 64 bits per shingle; each signature bit is the majority vote of its column
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes, bitorder='little').tobytes(), 'little', signed=True)
+
+
+def hamming_distance(a, b):
+    return ((a ^ b) & SIGNATURE_MASK).bit_count()
+
+
+def popcount(values):
+    """Set bits per element of a uint64 array (numpy 1.x has no bitwise_count)."""
+    values = values - ((values >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    values = (values & np.uint64(0x3333333333333333)) + ((values >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    values = (values + (values >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (values * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def band_layout(bands):
+    """(shift, mask) of each of `bands` near-equal slices of the signature bits."""
+    layout, shift = [], 0
+    for band in range(bands):
+        width = SIGNATURE_BITS // bands + (band < SIGNATURE_BITS % bands)
+        layout.append((shift, (1 << width) - 1))
+        shift += width
+    return layout
+
+
+class SimHashIndex:
+    """
+    Lookup of signatures within max_distance bits. The signature is split into max_distance + 1
+    bands; two signatures that differ in at most max_distance bits agree exactly on at least one
+    band, so only entries sharing a band value are compared.
+
+    Signatures loaded up front are kept in numpy arrays, one copy per band sorted by that band's
+    value, so the candidates are a contiguous slice found by bisection and compared in one
+    vectorized pass; a few hundred thousand articles cost a few tens of MB. Signatures added
+    afterwards go to per-band dicts.
+    """
+
+    def __init__(self, signatures=(), keys=(), max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.layout = band_layout(max_distance + 1)
+        self.keys = np.asarray(keys, dtype=np.int64)
+        unsigned = np.asarray(signatures, dtype=np.int64).view(np.uint64)
+        self.size = len(unsigned)
+        self.band_order, self.band_values, self.band_signatures = [], [], []
+        for shift, mask in self.layout:
+            values = ((unsigned >> np.uint64(shift)) & np.uint64(mask)).astype(np.uint32)
+            order = np.argsort(values, kind='stable')
+            self.band_order.append(order)
+            self.band_values.append(values[order])
+            self.band_signatures.append(unsigned[order])
+        self.added = [defaultdict(list) for _ in self.layout]
+        self.added_count = 0
+
+    @classmethod
+    def from_rows(cls, rows, max_distance=MAX_DISTANCE):
+        """Index (key, signature) rows, e.g. values_list('id', 'simhash') over the articles."""
+        keys, signatures = [], []
+        for key, signature in rows:
+            keys.append(key)
+            signatures.append(signature)
+        return cls(signatures, keys, max_distance)
+
+    def __len__(self):
+        return self.size + self.added_count
+
+    def bands(self, signature):
+        unsigned = signature & SIGNATURE_MASK
+        return [(unsigned >> shift) & mask for shift, mask in self.layout]
+
+    def add(self, signature, key):
+        for band, value in enumerate(self.bands(signature)):
+            self.added[band][value].append((signature, key))
+        self.added_count += 1
+
+    def find(self, signature):
+        """Key of an indexed near-duplicate of signature, or None."""
+        bands = self.bands(signature)
+        unsigned = np.uint64(signature & SIGNATURE_MASK)
+        for band, value in enumerate(bands):
+            values, needle = self.band_values[band], np.uint32(value)
+            # A numpy scalar of the array's dtype; a Python int would make searchsorted copy the array
+            start, end = values.searchsorted(needle, 'left'), values.searchsorted(needle, 'right')
+            if start < end:
+                distances = popcount(self.band_signatures[band][start:end] ^ unsigned)
+                matches = np.flatnonzero(distances <= self.max_distance)
+                if len(matches):
+                    return int(self.keys[self.band_order[band][start + matches[0]]])
+        for band, value in enumerate(bands):
+            for other, key in self.added[band].get(value, ()):
+                if hamming_distance(signature, other) <= self.max_distance:
+                    return key
+        return None
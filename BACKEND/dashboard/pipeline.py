@@ -0,0 +1,576 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+import billiard
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from dashboard.article_cache import invalidate_article_feeds
+from dashboard.discovery import advance, discovery_steps
+from dashboard.fetcher import HOST_CONCURRENCY, AsyncHostThrottle, host_key
+from dashboard.link_filter import learn_allow_patterns, rank_candidate_links
+from dashboard.models import Article
+from dashboard.near_duplicates import MAX_DISTANCE, SIGNATURE_MASK, SimHashIndex, band_layout, hamming_distance
+from dashboard.prescreen import prescreen_report
+from dashboard.recommender import index_articles
+from dashboard.scheduling import count_new_links
+from dashboard.scrape_articles import (
+    AI_BATCH_SIZE, AI_TOKEN_BUDGET, ARTICLES_TO_SAVE_PER_CATEGORY, MAX_ARTICLES_PER_CATEGORY, WEBSITES,
+    AIContentProcessor, ai_cache, build_session, declared_charset, estimate_tokens, host_throttle, http_cache,
+    make_request, parse_article, process_articles,
+)
+
+logger = logging.getLogger(__name__)
+
+FETCH_WORKERS = getattr(settings, 'SCRAPER_MAX_WORKERS', 8)
+PARSE_WORKERS = getattr(settings, 'SCRAPER_PARSE_WORKERS', 2)
+WRITE_BATCH_SIZE = getattr(settings, 'SCRAPER_WRITE_BATCH_SIZE', 20)
+WRITE_BATCH_LINGER = 1.0  # seconds a partial insert batch waits for more articles
+INSERT_ATTEMPTS = 3  # a batch INSERT that keeps conflicting with concurrent runs is given up
+AI_WORKERS = getattr(settings, 'SCRAPER_AI_WORKERS', 4)
+QUEUE_SIZE = getattr(settings, 'SCRAPER_QUEUE_SIZE', 32)
+AI_BATCH_LINGER = 2.0  # seconds a partial Gemini batch waits for more articles
+# Share of pre-screen rejections still sent to Gemini, to measure the pre-screen's precision
+PRESCREEN_SHADOW_RATE = getattr(settings, 'SCRAPER_PRESCREEN_SHADOW_RATE', 0.05)
+# A run's shared link and signature claims never need to outlive its lock
+RUN_CLAIMS_TTL = getattr(settings, 'SCRAPER_LOCK_TIMEOUT', 3600)
+
+DONE = object()
+
+
+class BilliardPoolExecutor(Executor):
+    """
+    concurrent.futures interface over a billiard process pool, for run_in_executor. Celery's
+    prefork workers are daemonic and the standard library will not start children from a
+    daemonic process; billiard, Celery's own fork of multiprocessing, allows it.
+    """
+
+    def __init__(self, workers, initializer=None):
+        self.pool = billiard.get_context('spawn').Pool(workers, initializer=initializer)
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        self.pool.apply_async(fn, args, kwargs, callback=future.set_result, error_callback=future.set_exception)
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        if cancel_futures:
+            self.pool.terminate()
+        else:
+            self.pool.close()
+        if wait:
+            self.pool.join()
+
+
+def parse_executor(workers=PARSE_WORKERS):
+    """
+    Executor for parse_article. HTML parsing and language detection are CPU-bound, so they run in
+    worker processes instead of sharing the GIL with the fetch threads. Workers are spawned, not
+    forked, because the parent is running threads, and set up Django before importing the scraper.
+    Inside Celery's daemonic prefork workers the pool comes from billiard.
+    """
+    if multiprocessing.current_process().daemon:
+        return BilliardPoolExecutor(workers, initializer=django.setup)
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup)
+
+
+async def run_stage(inbox, handle, workers, outbox=None):
+    """
+    Run `workers` copies of handle(item) over inbox until DONE arrives, then send DONE on to
+    outbox. handle() blocks on a full outbox, which is what keeps upstream stages bounded.
+    """
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is DONE:
+                # Put the marker back so the sibling workers stop too
+                await inbox.put(DONE)
+                return
+            try:
+                await handle(item)
+            except Exception:
+                logger.exception(f"Scrape pipeline stage {handle.__name__} failed")
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    if outbox is not None:
+        await outbox.put(DONE)
+
+
+async def run_host_stage(inbox, handle, url, workers, outbox=None):
+    """
+    run_stage with a queue and `workers` copies of handle(item) per host, for stages whose items
+    wait for their host's turn: a busy host only holds up its own items.
+    """
+    queues, stages = {}, []
+    while (item := await inbox.get()) is not DONE:
+        host = host_key(url(item))
+        if host not in queues:
+            queues[host] = asyncio.Queue()
+            stages.append(asyncio.create_task(run_stage(queues[host], handle, workers)))
+        queues[host].put_nowait(item)
+    for queue in queues.values():
+        queue.put_nowait(DONE)
+    await asyncio.gather(*stages)
+    if outbox is not None:
+        await outbox.put(DONE)
+
+
+async def batch_items(inbox, outbox, batch_size, token_budget, cost, linger=AI_BATCH_LINGER):
+    """
+    Group items from inbox into lists of at most batch_size items and token_budget total cost.
+    A partial batch is sent once nothing new arrives for `linger` seconds.
+    """
+    batch, tokens = [], 0
+    while True:
+        try:
+            item = await (asyncio.wait_for(inbox.get(), linger) if batch else inbox.get())
+        except asyncio.TimeoutError:
+            await outbox.put(batch)
+            batch, tokens = [], 0
+            continue
+        if item is DONE:
+            if batch:
+                await outbox.put(batch)
+            await outbox.put(DONE)
+            return
+        item_tokens = cost(item)
+        if batch and (len(batch) >= batch_size or tokens + item_tokens > token_budget):
+            await outbox.put(batch)
+            batch, tokens = [], 0
+        batch.append(item)
+        tokens += item_tokens
+
+
+class RunClaims:
+    """
+    Article links and page signatures claimed by the category tasks of one Celery scrape run,
+    kept in the cache every worker process shares, so a link or story found under several
+    categories is fetched and sent to Gemini once per run rather than once per task. A retried
+    task still owns what it claimed before. Each signature band value holds one entry, so a
+    near-duplicate that only agrees on a band another story took first costs a Gemini call.
+    """
+
+    def __init__(self, run_id, owner, cache):
+        self.run_id = run_id
+        self.owner = owner
+        self.cache = cache
+        self.layout = band_layout(MAX_DISTANCE + 1)
+
+    def key(self, *parts):
+        return ':'.join(('dashboard:scrape-run', self.run_id, *map(str, parts)))
+
+    def claim_links(self, links):
+        """The links no other task of the run has claimed, in order."""
+        claimed = []
+        for link in links:
+            key = self.key('link', hashlib.md5(link.encode('utf-8')).hexdigest()[:16])
+            if self.cache.add(key, self.owner, RUN_CLAIMS_TTL) or self.cache.get(key) == self.owner:
+                claimed.append(link)
+        return claimed
+
+    def claim_signature(self, signature, link):
+        """Link of a near-duplicate another task of the run claimed first, or None once signature is claimed."""
+        unsigned = signature & SIGNATURE_MASK
+        keys = [self.key('band', band, (unsigned >> shift) & mask) for band, (shift, mask) in enumerate(self.layout)]
+        for other, other_link in self.cache.get_many(keys).values():
+            if other_link != link and hamming_distance(signature, other) <= MAX_DISTANCE:
+                return other_link
+        for key in keys:
+            self.cache.add(key, (signature, link), RUN_CLAIMS_TTL)
+        return None
+
+
+class ScrapePipeline:
+    """
+    Streaming scrape: index pages -> article fetches -> parsing -> Gemini -> batched inserts, joined by
+    bounded queues so network, CPU and LLM latency overlap. Each stage runs its blocking work on
+    its own executor (parsing in worker processes, see parse_executor); the ORM is only used
+    from the single writer thread.
+    """
+
+    def __init__(self, websites=WEBSITES, session=None, run_id=None):
+        self.websites = websites
+        self.session = session or build_session()
+        # Set when the run is split into several tasks; see RunClaims
+        self.run_claims = RunClaims(run_id, ','.join(sorted(websites)), caches['scraper']) if run_id else None
+        self.saved = dict.fromkeys(websites, 0)
+        self.accepted = {}
+        self.seen_links = set()
+        self.created_ids = []
+        self.allow_patterns = {}
+        # Per index page: links found, candidates kept by the link filter, articles fetched and saved
+        self.source_stats = defaultdict(Counter)
+        self.discovery = {}
+        self.new_links = {}
+        self.prescreen_stats = Counter()
+        # Scraped page text is matched before the Gemini call, the stored summary before saving
+        self.source_index = SimHashIndex()
+        self.content_index = SimHashIndex()
+        self.near_duplicates = Counter()
+        self.write_stats = Counter()
+
+    def wanted(self, item):
+        # Stop spending requests and Gemini calls once a category or index page has enough articles
+        return (
+            self.saved[item['category']] < ARTICLES_TO_SAVE_PER_CATEGORY
+            and self.accepted.get(item['source'], 0) < MAX_ARTICLES_PER_CATEGORY
+        )
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        sources, links, pages, parsed, batches, processed, writes = (asyncio.Queue(QUEUE_SIZE) for _ in range(7))
+
+        with ThreadPoolExecutor(FETCH_WORKERS, thread_name_prefix='scrape-fetch') as fetch_pool, \
+                parse_executor(PARSE_WORKERS) as parse_pool, \
+                ThreadPoolExecutor(AI_WORKERS, thread_name_prefix='scrape-ai') as ai_pool, \
+                ThreadPoolExecutor(1, thread_name_prefix='scrape-db') as db_pool:
+            host_turns = AsyncHostThrottle(host_throttle, executor=fetch_pool)
+
+            async def request(url, url_class):
+                # Fresh cache hits need no turn; real requests wait for their host in the event loop,
+                # so fetch threads only ever run requests. Index pages and feeds are always
+                # revalidated: a source's next poll may come before their cache TTL runs out, and
+                # its new links are what the poll is for.
+                revalidate = url_class == 'index'
+                response = None if revalidate else await loop.run_in_executor(fetch_pool, http_cache.fresh, url)
+                if response is None:
+                    async with host_turns.turn(url):
+                        response = await loop.run_in_executor(fetch_pool, partial(
+                            make_request, self.session, url, url_class, throttled=False, revalidate=revalidate,
+                        ))
+                return response
+
+            async def fetch_index(source):
+                category, page_url = source
+                logger.info(f"Fetching articles from: {page_url}")
+                # Discovery parses on the fetch threads between its requests; see discovery.advance
+                steps = discovery_steps(page_url)
+                url, found = await loop.run_in_executor(fetch_pool, advance, steps)
+                while url is not None:
+                    response = await request(url, 'index')
+                    url, found = await loop.run_in_executor(fetch_pool, advance, steps, response)
+                article_links, method = found
+                self.discovery[page_url] = method
+                # Recorded even when empty so the source still gets rescheduled
+                self.source_stats[page_url]['links'] = len(article_links)
+                if not article_links:
+                    logger.warning(f"No articles found on page: {page_url}")
+                    return
+                self.new_links[page_url] = await loop.run_in_executor(
+                    fetch_pool, count_new_links, page_url, article_links
+                )
+                # Scoring and the already-saved check run before any article request is made.
+                # Feed entries are articles already, so they only need to be on-site and unsaved.
+                rank = rank_candidate_links if method == 'html' else partial(rank_candidate_links, min_score=float('-inf'))
+                candidates = await loop.run_in_executor(db_pool, rank, page_url, article_links, self.allow_patterns)
+                self.source_stats[page_url]['candidates'] = len(candidates)
+                candidates = [link for link in candidates if link not in self.seen_links]
+                self.seen_links.update(candidates)
+                if self.run_claims:
+                    candidates = await loop.run_in_executor(fetch_pool, self.run_claims.claim_links, candidates)
+                for link in candidates:
+                    await links.put({'category': category, 'source': page_url, 'link': link})
+
+            async def fetch_article(item):
+                if self.wanted(item):
+                    response = await request(item['link'], 'article')
+                    self.source_stats[item['source']]['fetched'] += 1
+                    if response:
+                        # Raw bytes go to the parse processes, which decode them themselves
+                        await pages.put({**item, 'html': response.content, 'encoding': declared_charset(response)})
+
+            async def parse(item):
+                if self.wanted(item):
+                    article = await loop.run_in_executor(
+                        parse_pool, parse_article, item['link'], item.pop('html'), item.pop('encoding')
+                    )
+                    if article:
+                        passed, reason = article.pop('prescreen')
+                        self.prescreen_stats['screened'] += 1
+                        if not passed:
+                            self.prescreen_stats['rejected'] += 1
+                            if random.random() >= PRESCREEN_SHADOW_RATE:
+                                logger.debug(f"Pre-screen dropped {item['link']}: {reason}")
+                                return
+                            self.prescreen_stats['shadow_sent'] += 1
+                        signature = article['simhash']
+                        if signature is not None:
+                            duplicate = self.source_index.find(signature)
+                            if duplicate is None and self.run_claims:
+                                duplicate = await loop.run_in_executor(
+                                    fetch_pool, self.run_claims.claim_signature, signature, item['link']
+                                )
+                            if duplicate is not None:
+                                self.near_duplicates['before_ai'] += 1
+                                logger.debug(f"Skipping {item['link']}: near-duplicate of {duplicate}")
+                                return
+                            self.source_index.add(signature, item['link'])
+                        await parsed.put({**item, **article, 'prescreened': passed})
+
+            async def enrich(batch):
+                # Several articles share one Gemini request; see AIContentProcessor.generate_ai_content_batch
+                batch = [item for item in batch if self.wanted(item)]
+                if not batch:
+                    return
+                results = await loop.run_in_executor(
+                    ai_pool, process_articles, [(item['category'], item['link'], item) for item in batch]
+                )
+                for item, article_data in zip(batch, results):
+                    verdict = 'accepted' if article_data else 'rejected'
+                    self.prescreen_stats[f"{'passed' if item['prescreened'] else 'shadow'}_gemini_{verdict}"] += 1
+                    if article_data:
+                        self.accepted[item['source']] = self.accepted.get(item['source'], 0) + 1
+                        await processed.put((item['source'], article_data))
+
+            async def write(batch):
+                for source in await loop.run_in_executor(db_pool, self.save_batch, batch):
+                    self.source_stats[source]['saved'] += 1
+
+            async def produce_sources():
+                for category, urls in self.websites.items():
+                    for url in urls:
+                        await sources.put((category, url))
+                await sources.put(DONE)
+
+            self.allow_patterns = await loop.run_in_executor(db_pool, learn_allow_patterns)
+            self.source_index, self.content_index = await loop.run_in_executor(db_pool, self.load_signatures)
+            await asyncio.gather(
+                produce_sources(),
+                run_host_stage(sources, fetch_index, lambda source: source[1], HOST_CONCURRENCY, links),
+                run_host_stage(links, fetch_article, lambda item: item['link'], HOST_CONCURRENCY, pages),
+                run_stage(pages, parse, PARSE_WORKERS, parsed),
+                batch_items(
+                    parsed, batches, AI_BATCH_SIZE, AI_TOKEN_BUDGET,
+                    cost=lambda item: estimate_tokens(item['title']) + estimate_tokens(item['content']),
+                ),
+                run_stage(batches, enrich, AI_WORKERS, processed),
+                batch_items(
+                    processed, writes, WRITE_BATCH_SIZE, WRITE_BATCH_SIZE, cost=lambda item: 1, linger=WRITE_BATCH_LINGER,
+                ),
+                run_stage(writes, write, 1),
+            )
+            await loop.run_in_executor(db_pool, connections.close_all)
+
+    @staticmethod
+    def load_signatures():
+        return tuple(
+            SimHashIndex.from_rows(
+                Article.objects.filter(**{f'{field}__isnull': False}).values_list('id', field).iterator(chunk_size=5000)
+            )
+            for field in ('source_simhash', 'simhash')
+        )
+
+    def save_batch(self, items):
+        """
+        Insert a batch of (source, article_data) in one transaction: one SELECT for source URLs that
+        are already stored, one bulk INSERT, and one SELECT for the new ids. Should a concurrent run
+        save some of the URLs in between, the INSERT fails and is retried without them. Returns
+        the sources of created rows.
+        """
+        pending = Counter()
+        batch_index = SimHashIndex()
+        articles = {}
+        for source, article_data in items:
+            category = article_data['category']
+            if self.saved[category] + pending[category] >= ARTICLES_TO_SAVE_PER_CATEGORY:
+                continue
+            if article_data['source_url'] in articles:
+                continue
+            article = Article(
+                title=article_data['title'],
+                content=article_data['content'],
+                media_url=article_data['media_url'],
+                source_url=article_data['source_url'],
+                category=category,
+                keywords=article_data['keywords'],
+                source_simhash=article_data.get('source_simhash'),
+            )
+            article.update_derived_fields()
+            if article.simhash is not None:
+                duplicate = self.content_index.find(article.simhash)
+                if duplicate is None:
+                    duplicate = batch_index.find(article.simhash)
+                if duplicate is not None:
+                    logger.info(f"Article '{article.title}' is a near-duplicate of {duplicate}, skipping.")
+                    self.near_duplicates['before_save'] += 1
+                    continue
+                batch_index.add(article.simhash, article.source_url)
+            articles[article.source_url] = (source, article)
+            pending[category] += 1
+        if not articles:
+            return []
+
+        try:
+            with transaction.atomic():
+                existing = set(
+                    Article.objects.filter(source_url__in=list(articles)).values_list('source_url', flat=True)
+                )
+                new_urls = [url for url in articles if url not in existing]
+                for attempt in range(1, INSERT_ATTEMPTS + 1):
+                    try:
+                        # No ignore_conflicts: once the INSERT succeeds, every row of new_urls is ours
+                        with transaction.atomic():
+                            Article.objects.bulk_create([articles[url][1] for url in new_urls])
+                        break
+                    except IntegrityError:
+                        if attempt == INSERT_ATTEMPTS:
+                            raise
+                        # A concurrent run saved some of these since the SELECT. A locking read sees its
+                        # committed rows, which a plain read in a REPEATABLE READ snapshot would not.
+                        existing = set(
+                            Article.objects.select_for_update().filter(source_url__in=new_urls)
+                            .values_list('source_url', flat=True)
+                        )
+                        new_urls = [url for url in new_urls if url not in existing]
+                created = dict(Article.objects.filter(source_url__in=new_urls).values_list('source_url', 'id'))
+        except DatabaseError as e:
+            logger.error(f"Error saving a batch of {len(articles)} articles: {e}")
+            self.write_stats['failed'] += len(articles)
+            return []
+
+        self.write_stats.update(batches=1, created=len(created), existing=len(articles) - len(created))
+        created_sources = []
+        for url, (source, article) in articles.items():
+            if url not in created:
+                logger.info(f"Article '{article.title}' already exists in database.")
+                continue
+            logger.info(f"Article '{article.title}' saved to database.")
+            self.saved[article.category] += 1
+            self.created_ids.append(created[url])
+            if article.simhash is not None:
+                self.content_index.add(article.simhash, created[url])
+            created_sources.append(source)
+        return created_sources
+
+    def source_report(self):
+        report = {}
+        for source, stats in self.source_stats.items():
+            report[source] = {
+                key: stats[key] for key in ('links', 'candidates', 'fetched', 'saved')
+            }
+            report[source]['discovery'] = self.discovery.get(source)
+            report[source]['new_links'] = self.new_links.get(source)
+            report[source]['fetch_to_save'] = round(stats['fetched'] / stats['saved'], 2) if stats['saved'] else None
+        return report
+
+
+def finish_scrape_run(created_ids, categories):
+    """
+    Once-per-run updates after the articles are saved: the feed caches of the categories that got
+    new articles, and the recommendation index. A Celery run calls this once from its aggregating
+    task, since index updates from several workers at once would overwrite each other.
+    """
+    if not created_ids:
+        return 0
+    # New articles change the first page of every feed they belong to
+    invalidate_article_feeds(categories)
+    try:
+        indexed = index_articles(created_ids)
+        logger.info(f"Added {indexed} articles to the recommendation index")
+        return indexed
+    except Exception as e:
+        logger.error(f"Error updating the recommendation index: {e}")
+        return 0
+
+
+def merge_scrape_results(results):
+    """
+    One run summary from the results of several run_scrape_pipeline(finalize=False) calls. Counters
+    are summed, elapsed_seconds is the slowest part, and failed parts are listed in 'failed'.
+    """
+    summary = {'saved': 0, 'elapsed_seconds': 0, 'saved_by_category': {}, 'sources': {}, 'failed': {}, 'created_ids': []}
+    totals = defaultdict(Counter)
+    for result in results:
+        if 'error' in result:
+            summary['failed'][result['category']] = result['error']
+            continue
+        summary['saved'] += result['saved']
+        summary['elapsed_seconds'] = max(summary['elapsed_seconds'], result['elapsed_seconds'])
+        summary['saved_by_category'].update(result['saved_by_category'])
+        summary['sources'].update(result['sources'])
+        summary['created_ids'].extend(result['created_ids'])
+        for key in ('http_cache', 'ai', 'near_duplicates', 'writes'):
+            totals[key].update(result[key])
+    summary.update((key, dict(counts)) for key, counts in totals.items())
+    return summary
+
+
+def run_scrape_pipeline(websites=WEBSITES, finalize=True, run_id=None):
+    """
+    Synchronous entry point for the management command and the Celery tasks. With finalize=False
+    the caller runs finish_scrape_run itself, once for all the parts of a run; the parts pass the
+    same run_id so they share their claims on links and stories.
+    """
+    started = time.monotonic()
+    pipeline = ScrapePipeline(websites, run_id=run_id)
+    http_cache.reset_stats()
+    AIContentProcessor.stats.clear()
+    ai_cache.stats.clear()
+    asyncio.run(pipeline.run())
+
+    for category, saved in pipeline.saved.items():
+        if saved < ARTICLES_TO_SAVE_PER_CATEGORY:
+            logger.info(f"Not enough new articles saved for {category}: {saved}")
+    total_saved = len(pipeline.created_ids)
+    logger.info(f"Total articles saved across all categories: {total_saved}")
+
+    if finalize:
+        finish_scrape_run(pipeline.created_ids, [category for category, saved in pipeline.saved.items() if saved])
+
+    sources = pipeline.source_report()
+    for source, stats in sources.items():
+        logger.info(
+            f"{source} ({stats['discovery']}): {stats['links']} links, {stats['candidates']} candidates, "
+            f"{stats['fetched']} fetched, {stats['saved']} saved, fetch-to-save {stats['fetch_to_save']}"
+        )
+
+    cache_stats = {
+        key: http_cache.stats[key] for key in ('requests', 'hits', 'revalidated', 'misses', 'bytes_saved', 'evicted')
+    }
+    logger.info(
+        f"HTTP cache: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated (304), "
+        f"{cache_stats['misses']} fetched, {cache_stats['bytes_saved']} bytes saved"
+    )
+
+    prescreen = prescreen_report(pipeline.prescreen_stats)
+    logger.info(
+        f"Pre-screen: {prescreen['rejected']} of {prescreen['screened']} pages rejected, "
+        f"{prescreen['llm_calls_avoided_share']} of Gemini calls avoided, "
+        f"precision {prescreen['rejection_precision']} on rejections and {prescreen['pass_precision']} on passes"
+    )
+
+    near_duplicates = {key: pipeline.near_duplicates[key] for key in ('before_ai', 'before_save')}
+    logger.info(
+        f"Near-duplicates: {near_duplicates['before_ai']} skipped before Gemini, "
+        f"{near_duplicates['before_save']} before saving"
+    )
+
+    writes = {key: pipeline.write_stats[key] for key in ('batches', 'created', 'existing', 'failed')}
+    logger.info(
+        f"Writer: {writes['created']} created and {writes['existing']} already stored in {writes['batches']} "
+        f"batches, {writes['failed']} lost to failed batches"
+    )
+
+    ai_stats = dict(AIContentProcessor.stats)
+    ai_stats.update({f'cache_{key}': ai_cache.stats[key] for key in ('hits', 'misses', 'stored', 'evicted')})
+    logger.info(
+        f"Gemini: {ai_stats.get('calls', 0)} requests for {ai_stats.get('articles', 0)} articles, "
+        f"{ai_stats.get('prompt_tokens', 0)} prompt and {ai_stats.get('output_tokens', 0)} output tokens, "
+        f"{ai_stats['cache_hits']} answered from the result cache"
+    )
+
+    elapsed = time.monotonic() - started
+    logger.info(f"Scrape run finished in {elapsed:.1f}s")
+    return {
+        'saved': total_saved, 'elapsed_seconds': round(elapsed, 2), 'sources': sources, 'http_cache': cache_stats, 'ai': ai_stats,
+        'prescreen': prescreen, 'near_duplicates': near_duplicates, 'writes': writes,
+        'saved_by_category': dict(pipeline.saved), 'created_ids': pipeline.created_ids,
+    }
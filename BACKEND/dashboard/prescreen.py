@@ -0,0 +1,59 @@
+MIN_WORDS = 120
+MIN_PARAGRAPHS = 3  # paragraphs of at least PARAGRAPH_MIN_WORDS words
+PARAGRAPH_MIN_WORDS = 20
+MAX_LINK_RATIO = 0.5  # share of the page's text that sits inside links
+MAX_BOILERPLATE_HITS = 3
+
+BOILERPLATE_PHRASES = (
+    'all rights reserved', 'cookie policy', 'privacy policy', 'terms of use', 'sign up for',
+    'subscribe to', 'log in to', 'sign in to', 'page not found', 'enable javascript',
+    'follow us on', 'download the app', 'newsletter', 'advertisement',
+)
+
+
+def page_signals(page):
+    """Cheap structural signals of an article page, from the record built by extraction.extract_page."""
+    content = page['content']
+    lowered = content.lower()
+    og_type = page['og'].get('type')
+    return {
+        'words': len(content.split()),
+        'paragraphs': sum(1 for words in page['paragraph_words'] if words >= PARAGRAPH_MIN_WORDS),
+        'link_ratio': page['link_chars'] / page['page_chars'] if page['page_chars'] else 1.0,
+        'boilerplate_hits': sum(1 for phrase in BOILERPLATE_PHRASES if phrase in lowered),
+        'og_type': og_type.strip().lower() if og_type is not None else None,
+    }
+
+
+def prescreen(signals):
+    """
+    (passed, reason) for a page before it is sent to Gemini. Only clear-cut non-articles are
+    dropped; anything borderline still goes to the LLM.
+    """
+    if signals['words'] < MIN_WORDS:
+        return False, 'too short'
+    if signals['link_ratio'] > MAX_LINK_RATIO:
+        return False, 'mostly links'
+    if signals['boilerplate_hits'] >= MAX_BOILERPLATE_HITS:
+        return False, 'boilerplate'
+    # Pages that declare og:type=article get the benefit of the doubt on structure
+    if signals['og_type'] != 'article' and signals['paragraphs'] < MIN_PARAGRAPHS:
+        return False, 'few paragraphs'
+    return True, ''
+
+
+def prescreen_report(stats):
+    """
+    Share of Gemini calls the pre-screen avoided, and its precision against Gemini's verdicts:
+    for rejections, from the shadow sample that is still sent to Gemini; for passes, from all of them.
+    """
+    screened = stats['screened']
+    shadow = stats['shadow_gemini_rejected'] + stats['shadow_gemini_accepted']
+    passed = stats['passed_gemini_accepted'] + stats['passed_gemini_rejected']
+    return {
+        'screened': screened,
+        'rejected': stats['rejected'],
+        'llm_calls_avoided_share': round((stats['rejected'] - stats['shadow_sent']) / screened, 3) if screened else None,
+        'rejection_precision': round(stats['shadow_gemini_rejected'] / shadow, 3) if shadow else None,
+        'pass_precision': round(stats['passed_gemini_accepted'] / passed, 3) if passed else None,
+    }
@@ -0,0 +1,361 @@
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from uuid import uuid4
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.core.cache import cache, caches
+from dashboard.models import Article, Bookmark, UserArticleView
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = getattr(settings, 'RECOMMENDER_N_FEATURES', 2 ** 18)
+MAX_TERMS_PER_DOC = getattr(settings, 'RECOMMENDER_MAX_TERMS_PER_DOC', 100)
+BOOKMARK_WEIGHT = 2.0
+VIEW_WEIGHT = 1.0
+PROFILE_RECENT_VIEWS = 50
+REBUILD_QUEUED_KEY = 'dashboard:recommender:rebuild-queued'
+REBUILD_QUEUED_TIMEOUT = 600  # seconds; roughly how long a full build takes
+WRITE_LOCK_KEY = 'dashboard:recommender:write-lock'
+WRITE_LOCK_TIMEOUT = 2 * REBUILD_QUEUED_TIMEOUT  # seconds; also how long a writer waits for it
+WRITE_LOCK_POLL_INTERVAL = 1  # seconds
+
+# Index writers run in different Celery processes, so their lock lives in the cache they all share
+scraper_cache = caches['scraper']
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9]+")
+STOPWORDS = frozenset("""
+    a about after all also an and any are as at be been but by can could did do does for from had has
+    have he her his how i if in into is it its just more most new no not of on one or our out over said
+    says she so some than that the their them then there these they this to up was we were what when
+    which who will with would you your
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOPWORDS]
+
+
+def article_text(title, content, keywords):
+    # Titles and keywords describe the article better than the body, so they count twice
+    keywords = (keywords or '').replace(',', ' ')
+    return f"{title} {title} {keywords} {keywords} {content}"
+
+
+def feature_index(token):
+    # Hashing trick: a stable hash keeps feature columns fixed as new articles arrive
+    return zlib.crc32(token.encode('utf-8')) % N_FEATURES
+
+
+class ArticleIndex:
+    """Sparse TF-IDF matrix over listable articles with one L2-normalized row per article."""
+
+    def __init__(self):
+        self.doc_freq = np.zeros(N_FEATURES, dtype=np.int32)
+        self.doc_count = 0
+        self.article_ids = np.zeros(0, dtype=np.int64)
+        self.matrix = sparse.csr_matrix((0, N_FEATURES), dtype=np.float32)
+        self._rows = {}
+
+    def __len__(self):
+        return len(self.article_ids)
+
+    @staticmethod
+    def term_counts(document):
+        _, title, content, keywords = document
+        counts = {}
+        for token in tokenize(article_text(title, content, keywords)):
+            column = feature_index(token)
+            counts[column] = counts.get(column, 0) + 1
+        return counts
+
+    def idf(self):
+        return np.log((1 + self.doc_count) / (1 + self.doc_freq)) + 1
+
+    @staticmethod
+    def vectorize(term_counts, idf):
+        """Sublinear TF-IDF rows, pruned to the strongest terms and L2-normalized."""
+        indptr = [0]
+        indices = []
+        data = []
+        for counts in term_counts:
+            columns = np.fromiter(counts, dtype=np.int64, count=len(counts))
+            weights = (1 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))) * idf[columns]
+            if len(columns) > MAX_TERMS_PER_DOC:
+                keep = np.argpartition(weights, -MAX_TERMS_PER_DOC)[-MAX_TERMS_PER_DOC:]
+                columns, weights = columns[keep], weights[keep]
+            norm = np.linalg.norm(weights)
+            if norm:
+                weights = weights / norm
+            indices.extend(columns.tolist())
+            data.extend(weights.tolist())
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+            shape=(len(term_counts), N_FEATURES),
+        )
+
+    def _append(self, article_ids, rows):
+        start = len(self.article_ids)
+        self.matrix = sparse.vstack([self.matrix, *rows], format='csr')
+        self.article_ids = np.concatenate([self.article_ids, np.asarray(article_ids, dtype=np.int64)])
+        for offset, article_id in enumerate(article_ids):
+            self._rows[article_id] = start + offset
+
+    def add(self, documents):
+        """Index (article_id, title, content, keywords) tuples; articles already present are skipped."""
+        documents = [document for document in documents if document[0] not in self._rows]
+        if not documents:
+            return 0
+        term_counts = [self.term_counts(document) for document in documents]
+        for counts in term_counts:
+            self.doc_freq[list(counts)] += 1
+        self.doc_count += len(documents)
+        self._append([document[0] for document in documents], [self.vectorize(term_counts, self.idf())])
+        return len(documents)
+
+    @classmethod
+    def build(cls, batches):
+        """
+        Build from a callable returning an iterable of document batches. The corpus is read
+        twice: once for document frequencies, once to vectorize every row with the final IDF.
+        """
+        index = cls()
+        for batch in batches():
+            for document in batch:
+                index.doc_freq[list(cls.term_counts(document))] += 1
+                index.doc_count += 1
+        idf = index.idf()
+        article_ids = []
+        rows = []
+        for batch in batches():
+            article_ids.extend(document[0] for document in batch)
+            rows.append(cls.vectorize([cls.term_counts(document) for document in batch], idf))
+        index._append(article_ids, rows)
+        return index
+
+    def profile(self, weighted_article_ids):
+        """Weighted sum of the rows for {article_id: weight}; None when none of them are indexed."""
+        rows = [self._rows[article_id] for article_id in weighted_article_ids if article_id in self._rows]
+        if not rows:
+            return None
+        weights = np.asarray(
+            [weighted_article_ids[article_id] for article_id in weighted_article_ids if article_id in self._rows],
+            dtype=np.float32,
+        )
+        return np.asarray(self.matrix[rows].T @ weights).ravel()
+
+    def top_k(self, profile, k, exclude_ids=()):
+        scores = self.matrix @ profile
+        excluded = [self._rows[article_id] for article_id in exclude_ids if article_id in self._rows]
+        scores[excluded] = -np.inf
+        k = min(k, len(scores) - len(excluded))
+        if k <= 0:
+            return []
+        best = np.argpartition(scores, -k)[-k:]
+        best = best[np.argsort(scores[best])[::-1]]
+        return [int(self.article_ids[row]) for row in best if scores[row] > 0]
+
+    def save(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.npz', delete=False) as tmp:
+            np.savez(
+                tmp,
+                data=self.matrix.data, indices=self.matrix.indices, indptr=self.matrix.indptr,
+                article_ids=self.article_ids, doc_freq=self.doc_freq, doc_count=self.doc_count,
+            )
+        os.replace(tmp.name, path)
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with np.load(path) as stored:
+            index.matrix = sparse.csr_matrix(
+                (stored['data'], stored['indices'], stored['indptr']),
+                shape=(len(stored['article_ids']), N_FEATURES),
+            )
+            index.article_ids = stored['article_ids']
+            index.doc_freq = stored['doc_freq']
+            index.doc_count = int(stored['doc_count'])
+        index._rows = {int(article_id): row for row, article_id in enumerate(index.article_ids)}
+        return index
+
+
+def iter_listable_documents(batch_size=1000, article_ids=None):
+    queryset = Article.objects.listable()
+    if article_ids is not None:
+        queryset = queryset.filter(id__in=article_ids)
+    last_id = 0
+    while True:
+        batch = list(
+            queryset.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'title', 'content', 'keywords')[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def build_index(batch_size=1000):
+    return ArticleIndex.build(lambda: iter_listable_documents(batch_size))
+
+
+_index = None
+_index_mtime = None
+_reloading = False
+_lock = threading.Lock()
+
+
+def index_path():
+    return getattr(settings, 'RECOMMENDER_INDEX_PATH', None)
+
+
+def get_index(build_missing=False):
+    """
+    Process-wide index. When the scraper writes a newer copy to the index file, it is loaded in a
+    background thread while requests keep using the current one. Before the first index file
+    exists, web requests get None and the Celery rebuild task is queued; the worker side passes
+    build_missing to build it in place.
+    """
+    global _index, _index_mtime, _reloading
+    path = index_path()
+    mtime = os.path.getmtime(path) if path and os.path.exists(path) else None
+    with _lock:
+        if _index is not None:
+            if mtime is not None and mtime != _index_mtime and not _reloading:
+                _reloading = True
+                threading.Thread(target=_reload, args=(path, mtime), daemon=True).start()
+            return _index
+        if mtime is not None:
+            _index, _index_mtime = ArticleIndex.load(path), mtime
+            return _index
+    if not build_missing:
+        schedule_rebuild()
+        return None
+    with write_lock():
+        return _latest_index()
+
+
+def _reload(path, mtime):
+    global _index, _index_mtime, _reloading
+    try:
+        index = ArticleIndex.load(path)
+        with _lock:
+            _index, _index_mtime = index, mtime
+    except Exception as e:
+        logger.warning(f"Could not reload the recommender index, keeping the current one: {e}")
+    finally:
+        with _lock:
+            _reloading = False
+
+
+def schedule_rebuild():
+    # Queued once per REBUILD_QUEUED_TIMEOUT however many requests find the index missing
+    if not cache.add(REBUILD_QUEUED_KEY, True, REBUILD_QUEUED_TIMEOUT):
+        return
+    from dashboard.tasks import rebuild_recommender_index_task
+    try:
+        rebuild_recommender_index_task.delay()
+    except Exception as e:
+        logger.warning(f"Could not schedule the recommender index build, leaving it to the nightly task: {e}")
+
+
+@contextmanager
+def write_lock():
+    """
+    One index writer at a time across all Celery processes, so an append or rebuild always starts
+    from the file the previous writer left and never overwrites rows it added.
+    """
+    token = uuid4().hex
+    deadline = time.monotonic() + WRITE_LOCK_TIMEOUT
+    while not scraper_cache.add(WRITE_LOCK_KEY, token, WRITE_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            raise TimeoutError("Timed out waiting for the recommender index write lock")
+        time.sleep(WRITE_LOCK_POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        if scraper_cache.get(WRITE_LOCK_KEY) == token:
+            scraper_cache.delete(WRITE_LOCK_KEY)
+
+
+def _latest_index():
+    # Callers hold the write lock, so the file cannot change underneath them
+    global _index, _index_mtime
+    path = index_path()
+    mtime = os.path.getmtime(path) if path and os.path.exists(path) else None
+    with _lock:
+        if _index is not None and mtime == _index_mtime:
+            return _index
+    if mtime is None:
+        index = build_index()
+        _publish(index)
+        return index
+    index = ArticleIndex.load(path)
+    with _lock:
+        _index, _index_mtime = index, mtime
+    return index
+
+
+def _publish(index):
+    global _index, _index_mtime
+    path = index_path()
+    mtime = None
+    if path:
+        index.save(path)
+        mtime = os.path.getmtime(path)
+    with _lock:
+        _index, _index_mtime = index, mtime
+
+
+def rebuild_index():
+    """Rebuild from scratch so IDF weights reflect the whole corpus again."""
+    with write_lock():
+        index = build_index()
+        _publish(index)
+    return len(index)
+
+
+def index_articles(article_ids):
+    """Append newly saved articles to the index and persist it for the web processes."""
+    with write_lock():
+        index = _latest_index()
+        added = 0
+        for batch in iter_listable_documents(article_ids=article_ids):
+            added += index.add(batch)
+        if added:
+            _publish(index)
+    return added
+
+
+def recommend_for_user(user, k=3):
+    """
+    Top-k unseen articles by cosine similarity to the user's bookmarks and recent views, or None
+    while the index is still being built.
+    """
+    bookmarked = list(Bookmark.objects.filter(user=user).values_list('article_id', flat=True))
+    viewed = list(
+        UserArticleView.objects.filter(user=user).order_by('-viewed_at')
+        .values_list('article_id', flat=True)[:PROFILE_RECENT_VIEWS]
+    )
+    weighted = {}
+    for article_id in viewed:
+        weighted[article_id] = weighted.get(article_id, 0.0) + VIEW_WEIGHT
+    for article_id in bookmarked:
+        weighted[article_id] = weighted.get(article_id, 0.0) + BOOKMARK_WEIGHT
+
+    index = get_index()
+    if index is None:
+        return None
+    profile = index.profile(weighted)
+    if profile is None:
+        return []
+    return index.top_k(profile, k, exclude_ids=set(bookmarked) | set(viewed))
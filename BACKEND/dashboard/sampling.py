@@ -0,0 +1,60 @@
+import random
+
+from django.core.cache import cache
+from django.db.models import Max, Min
+from dashboard.models import Article
+
+ID_RANGE_CACHE_TIMEOUT = 300  # seconds
+PROBES_PER_ARTICLE = 4
+
+
+def id_range_cache_key(category=None):
+    return f'dashboard:sampling:id_range:{category or "all"}'
+
+
+def listable_id_range(category=None):
+    """(min_id, max_id) of listable articles, cached so sampling never aggregates per request."""
+    cache_key = id_range_cache_key(category)
+    id_range = cache.get(cache_key)
+    if id_range is None:
+        queryset = Article.objects.listable()
+        if category:
+            queryset = queryset.filter(category=category)
+        bounds = queryset.aggregate(low=Min('id'), high=Max('id'))
+        id_range = (bounds['low'], bounds['high'])
+        cache.set(cache_key, id_range, ID_RANGE_CACHE_TIMEOUT)
+    return id_range
+
+
+def sample_listable_article_ids(k, category=None, exclude_ids=()):
+    """
+    Pick up to k random listable article IDs with random ID probing: each probe is an
+    index seek for the first listable ID at or above a random point in the ID range, so
+    the cost depends on k rather than on the size of the table.
+    """
+    low, high = listable_id_range(category)
+    if low is None:
+        return []
+
+    queryset = Article.objects.listable().exclude(id__in=exclude_ids)
+    if category:
+        queryset = queryset.filter(category=category)
+
+    sampled = set()
+    for _ in range(k * PROBES_PER_ARTICLE):
+        if len(sampled) >= k:
+            break
+        probe = random.randint(low, high)
+        article_id = queryset.filter(id__gte=probe).order_by('id').values_list('id', flat=True).first()
+        if article_id is not None:
+            sampled.add(article_id)
+
+    # Small or sparse tables can exhaust the probes; fill from the start of the range
+    if len(sampled) < k:
+        sampled.update(
+            queryset.exclude(id__in=sampled).order_by('id').values_list('id', flat=True)[:k - len(sampled)]
+        )
+
+    sampled = list(sampled)
+    random.shuffle(sampled)
+    return sampled
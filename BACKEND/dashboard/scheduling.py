@@ -0,0 +1,78 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from dashboard.models import SourceSchedule
+
+MIN_INTERVAL = getattr(settings, 'SCRAPER_SCHEDULE_MIN_INTERVAL', 300)
+MAX_INTERVAL = getattr(settings, 'SCRAPER_SCHEDULE_MAX_INTERVAL', 6 * 3600)
+DEFAULT_INTERVAL = getattr(settings, 'SCRAPER_SCHEDULE_DEFAULT_INTERVAL', 1200)
+# Polls are spaced so that each one finds about this many new articles
+TARGET_NEW_PER_POLL = getattr(settings, 'SCRAPER_SCHEDULE_TARGET_NEW', 3)
+YIELD_SMOOTHING = 0.3  # weight of the latest poll in the smoothed yield
+SEEN_LINKS_TTL = 7 * 86400  # seconds a source's last link set is remembered
+
+
+def count_new_links(source, links):
+    """
+    How many of the article links found on source were not there on its previous poll, or None
+    when there is no previous poll to compare with. Unlike the link filter's candidates, this
+    does not count older articles the scraper simply never saved.
+    """
+    key = f'dashboard:source-links:{source}'
+    previous = caches['scraper'].get(key)
+    current = {hashlib.md5(link.encode('utf-8')).hexdigest()[:16] for link in links}
+    caches['scraper'].set(key, current, SEEN_LINKS_TTL)
+    return len(current - previous) if previous is not None else None
+
+
+def next_interval(yield_per_hour, interval):
+    if yield_per_hour > 0:
+        interval = TARGET_NEW_PER_POLL * 3600 / yield_per_hour
+    else:
+        interval *= 2
+    return int(min(MAX_INTERVAL, max(MIN_INTERVAL, interval)))
+
+
+def claim_due_sources(websites, now=None):
+    """
+    Sources of websites whose next poll is due, as {category: [urls]}. Sources without a schedule
+    yet are due at once. Claimed sources are pushed back by MIN_INTERVAL until record_polls sets
+    their real next poll, so a run that dies is retried soon but not on every beat tick.
+    """
+    now = now or timezone.now()
+    SourceSchedule.objects.bulk_create(
+        [
+            SourceSchedule(url=url, category=category, interval=DEFAULT_INTERVAL, next_run_at=now)
+            for category, urls in websites.items() for url in urls
+        ],
+        ignore_conflicts=True,
+    )
+    urls = [url for category_urls in websites.values() for url in category_urls]
+    due = dict(SourceSchedule.objects.filter(url__in=urls, next_run_at__lte=now).values_list('url', 'id'))
+    SourceSchedule.objects.filter(id__in=list(due.values())).update(next_run_at=now + timedelta(seconds=MIN_INTERVAL))
+    claimed = {category: [url for url in category_urls if url in due] for category, category_urls in websites.items()}
+    return {category: category_urls for category, category_urls in claimed.items() if category_urls}
+
+
+def record_polls(sources, now=None):
+    """
+    Fold the per-source report of a run (pipeline source_report) into each source's smoothed
+    yield of new articles per hour, and schedule its next poll from that.
+    """
+    now = now or timezone.now()
+    for schedule in SourceSchedule.objects.filter(url__in=list(sources)):
+        new_links = sources[schedule.url].get('new_links')
+        if new_links is not None:
+            hours = (now - schedule.last_polled_at).total_seconds() / 3600 if schedule.last_polled_at else schedule.interval / 3600
+            rate = new_links / max(hours, MIN_INTERVAL / 3600)
+            schedule.yield_per_hour = YIELD_SMOOTHING * rate + (1 - YIELD_SMOOTHING) * schedule.yield_per_hour
+            schedule.interval = next_interval(schedule.yield_per_hour, schedule.interval)
+            schedule.last_new_articles = new_links
+            schedule.new_articles += new_links
+        schedule.polls += 1
+        schedule.last_polled_at = now
+        schedule.next_run_at = now + timedelta(seconds=schedule.interval)
+        schedule.save()
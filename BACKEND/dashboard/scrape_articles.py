@@ -1,18 +1,27 @@
 import os
 import logging
-import random
 import re
 import time
 import json
 from functools import wraps
+import threading
 import traceback
+from collections import Counter
 import requests
-import requests_cache
 from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.cache import caches
 from django.utils import timezone
-from dashboard.models import Article
+from dashboard.ai_cache import AIResultCache
+from dashboard.extraction import extract_page
+from dashboard.fetcher import SharedHostThrottle
+from dashboard.http_cache import ScraperHttpCache
+from dashboard.link_filter import normalize_url
+from dashboard.near_duplicates import simhash
+from dashboard.prescreen import page_signals, prescreen
 from urllib.parse import urljoin
 from requests.adapters import HTTPAdapter
+from requests.utils import get_encoding_from_headers
 from urllib3.util.retry import Retry
 import urllib3
 import google.generativeai as genai
@@ -29,9 +38,6 @@ logger = logging.getLogger(__name__)
 # Disable SSL warnings (use with caution)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-# Set up caching
-requests_cache.install_cache('news_cache', expire_after=3600)  # Cache for 1 hour
-
 # Configure Gemini AI
 genai.configure(api_key=os.getenv("API_KEY"))
 ai_model = genai.GenerativeModel('gemini-pro')
@@ -79,9 +85,71 @@ WEBSITES = {
 MAX_ARTICLES_PER_CATEGORY = 2  # Number of articles to fetch per category
 ARTICLES_TO_SAVE_PER_CATEGORY = 1 # Number of articles to save per category
 
+# Sources are fetched in parallel; the throttle keeps each site to a polite request rate across
+# all the category tasks of a run, whichever worker processes they run in
+SCRAPER_MAX_WORKERS = getattr(settings, 'SCRAPER_MAX_WORKERS', 8)
+host_throttle = SharedHostThrottle(caches['scraper'])
+
+# Scraper-only HTTP cache: short TTL for index pages and feeds, long for article pages
+http_cache = ScraperHttpCache(
+    getattr(settings, 'SCRAPER_HTTP_CACHE_PATH', 'scraper_http_cache.sqlite3'),
+    max_bytes=getattr(settings, 'SCRAPER_HTTP_CACHE_MAX_BYTES', 256 * 1024 * 1024),
+    ttls=getattr(settings, 'SCRAPER_HTTP_CACHE_TTLS', {'index': 600, 'article': 7 * 86400}),
+)
+
+# Gemini batching: articles per request, and the estimated prompt tokens one request may carry
+AI_BATCH_SIZE = getattr(settings, 'SCRAPER_AI_BATCH_SIZE', 5)
+AI_TOKEN_BUDGET = getattr(settings, 'SCRAPER_AI_TOKEN_BUDGET', 12000)
+
+# Bump whenever the Gemini prompts change so cached results from the old prompts are ignored
+AI_PROMPT_VERSION = 1
+ai_cache = AIResultCache(
+    getattr(settings, 'SCRAPER_AI_CACHE_PATH', 'scraper_ai_cache.sqlite3'),
+    ttl=getattr(settings, 'SCRAPER_AI_CACHE_TTL', 30 * 86400),
+    max_entries=getattr(settings, 'SCRAPER_AI_CACHE_MAX_ENTRIES', 50000),
+    prompt_version=AI_PROMPT_VERSION,
+)
+
+LANGDETECT_CHARS = getattr(settings, 'SCRAPER_LANGDETECT_CHARS', 2000)
+
+IRRELEVANT_TITLE_PATTERNS = [
+    'contact us', 'gallery', 'about us', 'privacy policy',
+    'terms of service', 'subscribe', 'newsletter'
+]
+
+def estimate_tokens(text):
+    # Rough English average of four characters per token; only used to size batches
+    return len(text) // 4 + 1
+
 class AIContentProcessor:
+    # Requests, articles and token usage reported by Gemini, shared by the AI worker threads
+    stats = Counter()
+    _stats_lock = threading.Lock()
+
+    @staticmethod
+    def record_usage(response, articles):
+        usage = getattr(response, 'usage_metadata', None)
+        with AIContentProcessor._stats_lock:
+            AIContentProcessor.stats.update(
+                calls=1,
+                articles=articles,
+                prompt_tokens=getattr(usage, 'prompt_token_count', 0) or 0,
+                output_tokens=getattr(usage, 'candidates_token_count', 0) or 0,
+            )
+
     @staticmethod
     def generate_ai_content(title, content):
+        # Identical articles are answered from the result cache, rejections included
+        cached = ai_cache.get(title, content)
+        if cached is not None:
+            return cached
+        result = AIContentProcessor._generate_ai_content(title, content)
+        if isinstance(result, dict):
+            ai_cache.set(title, content, result)
+        return result
+
+    @staticmethod
+    def _generate_ai_content(title, content):
         prompt = f"""
         Given the following article title and raw content, please perform the following tasks:
         1. Clean and format the content, removing any irrelevant information or ads.
@@ -115,6 +183,7 @@ class AIContentProcessor:
         try:
             logger.debug(f"Generating AI content for title: {title}")
             response = ai_model.generate_content(prompt)
+            AIContentProcessor.record_usage(response, 1)
             
             if not response.parts:
                 logger.warning(f"AI response empty for title: {title}")
@@ -128,6 +197,114 @@ class AIContentProcessor:
             logger.error(traceback.format_exc())
             return None
 
+    @staticmethod
+    def generate_ai_content_batch(articles):
+        """Batched generate_ai_content: only articles missing from the result cache are sent."""
+        results = [ai_cache.get(title, content) for title, content in articles]
+        pending = [index for index, result in enumerate(results) if result is None]
+        if pending:
+            fresh = AIContentProcessor._generate_ai_content_batch([articles[index] for index in pending])
+            for index, result in zip(pending, fresh):
+                results[index] = result
+                if isinstance(result, dict):
+                    ai_cache.set(*articles[index], result)
+        return results
+
+    @staticmethod
+    def _generate_ai_content_batch(articles):
+        """
+        Process several (title, content) pairs with one request, sending the instructions once.
+        Returns one result per article in order; entries missing from the reply or failing to
+        parse are retried on their own.
+        """
+        if len(articles) == 1:
+            return [AIContentProcessor._generate_ai_content(*articles[0])]
+
+        sections = "\n\n".join(
+            f"### Article {index}\nTitle: {title}\n\nRaw Content:\n{content}"
+            for index, (title, content) in enumerate(articles)
+        )
+        prompt = f"""
+        You will be given {len(articles)} articles, each under a "### Article N" header.
+        For EACH article, please perform the following tasks:
+        1. Clean and format the content, removing any irrelevant information or ads.
+        2. STRICTLY verify this is a proper news article (reject contact pages, galleries, about us, etc.)
+        3. Ensure the content is strictly relevant to its category and is newsworthy.
+        4. Remove any special characters, formatting issues, or unprofessional elements.
+        5. Return a JSON array with exactly one object per article, in the same order, each with the following structure:
+        {{
+            "index": N,
+            "title": "cleaned and formatted title",
+            "content": "cleaned, formatted, and summarized content (max 500 words)",
+            "keywords": ["list", "of", "relevant", "keywords"],
+            "is_valid": true/false,
+            "reason": "explanation if the article is not valid"
+        }}
+
+        IMPORTANT: Reject articles that:
+        - Are not proper news articles (e.g., contact pages, galleries, etc.)
+        - Contain unprofessional formatting or special characters
+        - Are not pure English content
+        - Don't provide substantial news value
+        - Have poor formatting or structure
+
+        {sections}
+
+        Please process and return only the JSON array without any code block markers.
+        """
+
+        results = [None] * len(articles)
+        try:
+            logger.debug(f"Generating AI content for a batch of {len(articles)} articles")
+            response = ai_model.generate_content(prompt)
+            AIContentProcessor.record_usage(response, len(articles))
+            if response.parts:
+                for index, item in AIContentProcessor.parse_batch_response(response.text, len(articles)):
+                    results[index] = item
+            else:
+                logger.warning(f"AI response empty for a batch of {len(articles)} articles")
+        except Exception as e:
+            logger.error(f"Error generating batched AI content: {str(e)}")
+            logger.error(traceback.format_exc())
+
+        for index, result in enumerate(results):
+            if result is None:
+                logger.warning(f"Batch entry {index} missing or unparseable, processing it on its own")
+                results[index] = AIContentProcessor._generate_ai_content(*articles[index])
+        return results
+
+    @staticmethod
+    def parse_batch_response(response_text, count):
+        """
+        Yield (index, result) for every well-formed entry of a batch reply. If the array as a whole
+        does not parse, each object in it is decoded separately so one bad entry loses only itself.
+        """
+        cleaned_text = AIContentProcessor._clean_response_text(response_text)
+        try:
+            entries = json.loads(cleaned_text)
+            if not isinstance(entries, list):
+                entries = [entries]
+        except json.JSONDecodeError:
+            logger.warning("Failed to parse batch response as a JSON array, decoding entries one by one")
+            decoder = json.JSONDecoder()
+            entries = []
+            position = cleaned_text.find('{')
+            while position != -1:
+                try:
+                    entry, end = decoder.raw_decode(cleaned_text, position)
+                except json.JSONDecodeError:
+                    position = cleaned_text.find('{', position + 1)
+                    continue
+                entries.append(entry)
+                position = cleaned_text.find('{', end)
+
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict) or not all(key in entry for key in ('title', 'content', 'is_valid')):
+                continue
+            index = entry.pop('index', position)
+            if isinstance(index, int) and 0 <= index < count:
+                yield index, AIContentProcessor.clean_and_structure_json(entry)
+
     @staticmethod
     def parse_ai_response(response_text, original_title):
         try:
@@ -137,6 +314,10 @@ class AIContentProcessor:
             # Try parsing as JSON
             try:
                 parsed_json = json.loads(cleaned_text)
+                if not isinstance(parsed_json, dict):
+                    # Not a model verdict, so not cached either; the article is retried on a later run
+                    logger.warning(f"AI response is a JSON {type(parsed_json).__name__}, not an object; discarding it")
+                    return None
                 logger.debug(f"Successfully parsed JSON: {parsed_json.keys()}")
                 return AIContentProcessor.clean_and_structure_json(parsed_json)
             except json.JSONDecodeError as e:
@@ -191,7 +372,7 @@ class AIContentProcessor:
             try:
                 data = json.loads(text)
                 # Validate required fields
-                if not all(key in data for key in ['title', 'content', 'is_valid']):
+                if not isinstance(data, dict) or not all(key in data for key in ['title', 'content', 'is_valid']):
                     raise ValueError("Missing required fields in JSON")
                 return data
             except (json.JSONDecodeError, ValueError):
@@ -292,172 +473,114 @@ def retry_with_backoff(retries=2, backoff_factor=0.3):
     return decorator
 
 @retry_with_backoff()
-def make_request(session, url):
-    return session.get(url, timeout=30, verify=False)
-
-def clean_text(text):
-    if not isinstance(text, str):
-        return ""
-    soup = BeautifulSoup(text, 'html.parser')
-    text = soup.get_text()
-    text = ' '.join(text.split())
-    return text
-
-def extract_content(article_soup, url):
-    content = ""
-    for elem in article_soup.find_all(['p', 'h2', 'h3', 'h4']):
-        if not elem.find(['script', 'style']):
-            text = elem.get_text(strip=True)
-            if len(text) > 20:
-                content += text + " "
-    return content.strip()
-
-def extract_media(article_soup, base_url):
-    media_selectors = [
-        ('meta', {'property': 'og:image'}),
-        ('meta', {'itemprop': 'image'}),
-        ('img', {'class': 'featured-image'})
-    ]
-    for tag, attrs in media_selectors:
-        media_elem = article_soup.find(tag, attrs)
-        if media_elem:
-            media_url = media_elem.get('content') or media_elem.get('src')
-            if media_url:
-                return urljoin(base_url, media_url)
-    return None
+def make_request(session, url, url_class='article', throttled=True, revalidate=False):
+    def fetch(headers):
+        # Only real network requests wait on the per-host throttle. Callers that already waited
+        # for the host's turn themselves (the pipeline's AsyncHostThrottle) pass throttled=False.
+        if not throttled:
+            return session.get(url, headers=headers, timeout=30, verify=False)
+        with host_throttle.slot(url):
+            return session.get(url, headers=headers, timeout=30, verify=False)
+    return http_cache.get(url, url_class, fetch, revalidate)
 
 def is_english_content(text):
+    # The language is clear from the opening paragraphs; detection time grows with the text
     try:
-        return langdetect.detect(text) == 'en'
+        return langdetect.detect(text[:LANGDETECT_CHARS]) == 'en'
     except:
         return False
 
-def fetch_articles_from_page(session, category, page_url):
-    articles = []
-    try:
-        logger.info(f"Fetching articles from: {page_url}")
-        response = make_request(session, page_url)
-        if response:
-            page_soup = BeautifulSoup(response.text, 'lxml')
-            article_links = set(
-                urljoin(page_url, a['href'])
-                for a in page_soup.find_all('a', href=True)
-                if a['href'].startswith(('http', 'https')) or a['href'].startswith('/')
-            )
-            
-            for link in article_links:
-                if len(articles) >= MAX_ARTICLES_PER_CATEGORY:
-                    break
-                try:
-                    article_response = make_request(session, link)
-                    if article_response:
-                        article_soup = BeautifulSoup(article_response.text, 'lxml')
-                        title_tag = article_soup.find('title') or article_soup.find('h1')
-                        title = clean_text(title_tag.get_text()) if title_tag else None
-                        content = extract_content(article_soup, link)
-                        media_url = extract_media(article_soup, link)
-
-                        # Enhanced validation
-                        if not all([title, content, media_url, is_english_content(content)]):
-                            continue
-
-                        # Check for irrelevant content patterns
-                        if any(pattern in title.lower() for pattern in [
-                            'contact us', 'gallery', 'about us', 'privacy policy',
-                            'terms of service', 'subscribe', 'newsletter'
-                        ]):
-                            continue
-
-                        processed_content = AIContentProcessor.generate_ai_content(title, content)
-                        if not processed_content:
-                            continue
-
-                        if not processed_content.get('is_valid', False):
-                            logger.debug(f"Article rejected: {processed_content.get('reason', 'Unknown')}")
-                            continue
-
-                        # Additional content quality checks
-                        if re.search(r'[\x00-\x1F\x7F-\x9F]|[\*]{2,}|\\n', processed_content['content']):
-                            continue
-
-                        articles.append({
-                            'title': processed_content['title'],
-                            'content': processed_content['content'],
-                            'media_url': media_url,
-                            'source_url': link,
-                            'category': category,
-                            'keywords': ','.join(processed_content['keywords']),
-                            'created_at': timezone.now(),
-                            'updated_at': timezone.now()
-                        })
-                        
-                    time.sleep(random.uniform(1, 3))
-                except Exception as e:
-                    logger.error(f"Error processing article link {link}: {e}")
-                    continue  # Skip this article and try the next one
-            
-        else:
-            logger.warning(f"No articles found on page: {page_url}")
-    except Exception as e:
-        logger.error(f"Error fetching articles from page {page_url}: {e}")
-    return articles
-
-def scrape_articles():
+def build_session():
     session = requests.Session()
-    retry = HTTPAdapter(max_retries=Retry(total=2, backoff_factor=0.5))
+    retry = HTTPAdapter(max_retries=Retry(total=2, backoff_factor=0.5), pool_maxsize=SCRAPER_MAX_WORKERS)
     session.mount('http://', retry)
     session.mount('https://', retry)
+    return session
+
+def extract_article_links(page_url, html):
+    page_soup = BeautifulSoup(html, 'lxml')
+    return set(
+        normalize_url(urljoin(page_url, a['href']))
+        for a in page_soup.find_all('a', href=True)
+        if a['href'].startswith(('http', 'https')) or a['href'].startswith('/')
+    )
+
+def declared_charset(response):
+    """Charset from the Content-Type header, or None so the page's own <meta charset> is used."""
+    if 'charset' not in response.headers.get('Content-Type', '').lower():
+        return None
+    return get_encoding_from_headers(response.headers)
+
+def parse_article(link, html, encoding=None):
+    """
+    Title, content and media URL of an article page plus the local pre-screen verdict as
+    (passed, reason) and the SimHash of the content, or None if it fails the basic checks.
+    html is the raw body (bytes, decoded with encoding) or text. Runs in the parse worker
+    processes, so everything it takes and returns is small and picklable.
+    """
+    page = extract_page(html, link, encoding)
+    if page is None:
+        return None
+    title, content, media_url = page['title'], page['content'], page['media_url']
+
+    # Enhanced validation
+    if not all([title, content, media_url, is_english_content(content)]):
+        return None
+
+    # Check for irrelevant content patterns
+    if any(pattern in title.lower() for pattern in IRRELEVANT_TITLE_PATTERNS):
+        return None
+
+    return {
+        'title': title,
+        'content': content,
+        'media_url': media_url,
+        'prescreen': prescreen(page_signals(page)),
+        'simhash': simhash(content),
+    }
+
+def process_article(category, link, parsed):
+    """Run a parsed article through Gemini; returns the row to save, or None if it was rejected."""
+    processed_content = AIContentProcessor.generate_ai_content(parsed['title'], parsed['content'])
+    return accept_processed_article(category, link, parsed, processed_content)
+
+def process_articles(items):
+    """Batched process_article over (category, link, parsed) tuples; one row or None per item."""
+    results = AIContentProcessor.generate_ai_content_batch(
+        [(parsed['title'], parsed['content']) for _, _, parsed in items]
+    )
+    return [
+        accept_processed_article(category, link, parsed, processed_content)
+        for (category, link, parsed), processed_content in zip(items, results)
+    ]
 
-    total_saved = 0
-    for category, urls in WEBSITES.items():
-        logger.info(f"Scraping category: {category}")
-        category_articles = []
-        saved_for_category = 0
-        
-        while saved_for_category < ARTICLES_TO_SAVE_PER_CATEGORY:
-            for url in urls:
-                if saved_for_category >= ARTICLES_TO_SAVE_PER_CATEGORY:
-                    break
-                articles = fetch_articles_from_page(session, category, url)
-                if articles:
-                    category_articles.extend(articles)
-
-            logger.info(f"Fetched a total of {len(category_articles)} articles for category: {category}")
-            
-            for article_data in category_articles:
-                if saved_for_category >= ARTICLES_TO_SAVE_PER_CATEGORY:
-                    break
-                try:
-                    _, created = Article.objects.get_or_create(
-                        source_url=article_data['source_url'],
-                        defaults={
-                            'title': article_data['title'],
-                            'content': article_data['content'],
-                            'media_url': article_data['media_url'],
-                            'category': article_data['category'],
-                            'keywords': article_data['keywords'],
-                            'created_at': article_data['created_at'],
-                            'updated_at': article_data['updated_at']
-                        }
-                    )
-                    if created:
-                        logger.info(f"Article '{article_data['title']}' saved to database.")
-                        saved_for_category += 1
-                        total_saved += 1
-                    else:
-                        logger.info(f"Article '{article_data['title']}' already exists in database.")
-                except Exception as e:
-                    logger.error(f"Error saving article '{article_data['title']}': {e}")
-            
-            # Clear the category_articles list to fetch new articles if needed
-            category_articles.clear()
-            
-            if saved_for_category < ARTICLES_TO_SAVE_PER_CATEGORY:
-                logger.info(f"Not enough new articles saved for {category}. Fetching more...")
-            else:
-                logger.info(f"Successfully saved {ARTICLES_TO_SAVE_PER_CATEGORY} articles for {category}")
+def accept_processed_article(category, link, parsed, processed_content):
+    if not isinstance(processed_content, dict):
+        return None
+
+    if not processed_content.get('is_valid', False):
+        logger.debug(f"Article rejected: {processed_content.get('reason', 'Unknown')}")
+        return None
+
+    # Additional content quality checks
+    if re.search(r'[\x00-\x1F\x7F-\x9F]|[\*]{2,}|\\n', processed_content['content']):
+        return None
+
+    return {
+        'title': processed_content['title'],
+        'content': processed_content['content'],
+        'media_url': parsed['media_url'],
+        'source_url': link,
+        'category': category,
+        'keywords': ','.join(processed_content.get('keywords', [])),
+        'source_simhash': parsed.get('simhash'),
+        'created_at': timezone.now(),
+        'updated_at': timezone.now()
+    }
 
-    logger.info(f"Total articles saved across all categories: {total_saved}")
+def scrape_articles():
+    from dashboard.pipeline import run_scrape_pipeline
+    return run_scrape_pipeline(WEBSITES)
 
 if __name__ == "__main__":
     scrape_articles()
\ No newline at end of file
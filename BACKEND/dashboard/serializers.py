@@ -6,9 +6,14 @@ class ArticleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Article
-        fields = '__all__'
+        # Derived at ingest for the feed queries and deduplication; not part of the public payload.
+        # The SimHash signatures are also 64-bit, beyond what JavaScript numbers hold exactly.
+        exclude = ('is_listable', 'simhash', 'source_simhash')
 
     def get_is_bookmarked(self, obj):
+        # Querysets built with ArticleQuerySet.with_bookmark_flag carry the answer already
+        if hasattr(obj, 'user_has_bookmarked'):
+            return obj.user_has_bookmarked
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Bookmark.objects.filter(user=request.user, article=obj).exists()
@@ -1,6 +1,107 @@
-from celery import shared_task
+import logging
+from uuid import uuid4
+
+from celery import chord, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# Shared by every worker process, unlike the default cache when CACHE_URL is unset
+scraper_cache = caches['scraper']
+
+SCRAPE_LOCK_KEY = 'dashboard:scrape-articles:lock'
+# Held from the fan-out until the results are aggregated; the timeout frees it if that never happens
+SCRAPE_LOCK_TIMEOUT = getattr(settings, 'SCRAPER_LOCK_TIMEOUT', 3600)
+SCRAPE_SOFT_TIME_LIMIT = getattr(settings, 'SCRAPER_TASK_SOFT_TIME_LIMIT', 900)
+SCRAPE_TIME_LIMIT = getattr(settings, 'SCRAPER_TASK_TIME_LIMIT', 960)
+SCRAPE_MAX_RETRIES = getattr(settings, 'SCRAPER_TASK_MAX_RETRIES', 2)
+
+
+def release_scrape_lock(token):
+    # Only the run that took the lock may release it
+    if scraper_cache.get(SCRAPE_LOCK_KEY) == token:
+        scraper_cache.delete(SCRAPE_LOCK_KEY)
 
 @shared_task(name='dashboard.tasks.scrape_articles')
 def scrape_articles_task():
-    from .scrape_articles import scrape_articles
-    scrape_articles()
\ No newline at end of file
+    """
+    Fan a scrape run out into one scrape_category_task per category with sources due, aggregated by
+    finish_scrape_task, so more workers mean a shorter run and a stuck category only holds up
+    itself. Beat ticks that arrive while the previous run holds the lock are skipped.
+    """
+    from .scheduling import claim_due_sources
+    from .scrape_articles import WEBSITES
+    token = uuid4().hex
+    if not scraper_cache.add(SCRAPE_LOCK_KEY, token, SCRAPE_LOCK_TIMEOUT):
+        logger.info("Previous scrape run is still in progress; skipping this one")
+        return {'skipped': True}
+    try:
+        # Only sources whose adaptive polling interval has passed (see dashboard.scheduling)
+        due = claim_due_sources(WEBSITES)
+        if not due:
+            release_scrape_lock(token)
+            return {'skipped': False, 'categories': {}}
+        chord(
+            scrape_category_task.s(category, urls, token) for category, urls in due.items()
+        )(finish_scrape_task.s(token).on_error(release_scrape_lock_task.si(token)))
+    except Exception:
+        release_scrape_lock(token)
+        raise
+    return {'skipped': False, 'categories': due}
+
+@shared_task(
+    name='dashboard.tasks.scrape_category', bind=True, max_retries=SCRAPE_MAX_RETRIES, default_retry_delay=60,
+    soft_time_limit=SCRAPE_SOFT_TIME_LIMIT, time_limit=SCRAPE_TIME_LIMIT,
+)
+def scrape_category_task(self, category, urls, run_id=None):
+    # Failures are returned rather than raised once retries run out, so the chord still aggregates.
+    # run_id (the run's lock token) lets the category tasks of one run share their link claims.
+    from .pipeline import run_scrape_pipeline
+    try:
+        return run_scrape_pipeline({category: urls}, finalize=False, run_id=run_id)
+    except SoftTimeLimitExceeded:
+        logger.error(f"Scraping {category} exceeded the {SCRAPE_SOFT_TIME_LIMIT}s time limit")
+        return {'category': category, 'error': 'time limit exceeded'}
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        logger.error(f"Scraping {category} failed after {self.request.retries} retries: {e}")
+        return {'category': category, 'error': str(e)}
+
+@shared_task(name='dashboard.tasks.finish_scrape')
+def finish_scrape_task(results, lock_token):
+    from .pipeline import finish_scrape_run, merge_scrape_results
+    from .scheduling import record_polls
+    try:
+        summary = merge_scrape_results(results)
+        created_ids = summary.pop('created_ids')
+        finish_scrape_run(created_ids, [category for category, saved in summary['saved_by_category'].items() if saved])
+        record_polls(summary['sources'])
+        logger.info(
+            f"Scrape run saved {summary['saved']} articles in {summary['elapsed_seconds']}s; "
+            f"failed categories: {summary['failed'] or 'none'}"
+        )
+        return summary
+    finally:
+        release_scrape_lock(lock_token)
+
+@shared_task(name='dashboard.tasks.release_scrape_lock')
+def release_scrape_lock_task(lock_token):
+    release_scrape_lock(lock_token)
+
+@shared_task(name='dashboard.tasks.flush_article_views')
+def flush_article_views_task():
+    from .view_buffer import flush_article_views
+    return flush_article_views()
+
+@shared_task(name='dashboard.tasks.refresh_trending_scores')
+def refresh_trending_scores_task():
+    from .trending import refresh_trending_scores
+    return refresh_trending_scores()
+
+@shared_task(name='dashboard.tasks.rebuild_recommender_index')
+def rebuild_recommender_index_task():
+    from .recommender import rebuild_index
+    return rebuild_index()
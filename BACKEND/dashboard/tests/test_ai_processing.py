@@ -0,0 +1,126 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from dashboard import scrape_articles
+from dashboard.ai_cache import AIResultCache
+from dashboard.scrape_articles import AIContentProcessor
+
+
+def gemini_reply(text, prompt_tokens=100, output_tokens=50):
+    return SimpleNamespace(
+        parts=[text],
+        text=text,
+        usage_metadata=SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens),
+    )
+
+
+def result(index, title, is_valid=True):
+    return {
+        'index': index, 'title': title, 'content': f'{title} cleaned content.',
+        'keywords': ['news'], 'is_valid': is_valid, 'reason': '',
+    }
+
+
+@pytest.fixture(autouse=True)
+def ai_cache(tmp_path, monkeypatch):
+    cache = AIResultCache(str(tmp_path / 'ai_cache.sqlite3'), ttl=3600, max_entries=100, prompt_version=1)
+    monkeypatch.setattr(scrape_articles, 'ai_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    sent = []
+    replies = []
+
+    def generate_content(prompt):
+        sent.append(prompt)
+        return replies.pop(0)
+
+    monkeypatch.setattr(scrape_articles.ai_model, 'generate_content', generate_content)
+    AIContentProcessor.stats.clear()
+    return sent, replies
+
+
+def test_batch_sends_one_request_for_all_articles(prompts):
+    sent, replies = prompts
+    replies.append(gemini_reply(json.dumps([result(1, 'Second'), result(0, 'First', is_valid=False)])))
+
+    results = AIContentProcessor.generate_ai_content_batch([('First', 'first raw'), ('Second', 'second raw')])
+
+    assert len(sent) == 1
+    assert '### Article 0' in sent[0] and '### Article 1' in sent[0]
+    assert [item['title'] for item in results] == ['First', 'Second']
+    assert [item['is_valid'] for item in results] == [False, True]
+    assert 'index' not in results[0]
+    assert AIContentProcessor.stats == {'calls': 1, 'articles': 2, 'prompt_tokens': 100, 'output_tokens': 50}
+
+
+def test_batch_retries_unparseable_entries_on_their_own(prompts):
+    sent, replies = prompts
+    broken = '[' + json.dumps(result(0, 'First')) + ', {"index": 1, "title": "Second", "content": ]'
+    replies.append(gemini_reply(broken))
+    replies.append(gemini_reply(json.dumps(result(0, 'Second retried'))))
+
+    results = AIContentProcessor.generate_ai_content_batch([('First', 'first raw'), ('Second', 'second raw')])
+
+    assert len(sent) == 2
+    assert 'Title: Second' in sent[1] and '### Article' not in sent[1]
+    assert [item['title'] for item in results] == ['First', 'Second retried']
+
+
+def test_repeated_articles_are_answered_from_the_cache(prompts, ai_cache):
+    sent, replies = prompts
+    replies.append(gemini_reply(json.dumps(result(0, 'Rejected', is_valid=False))))
+
+    first = AIContentProcessor.generate_ai_content('Rejected', 'Some  raw\ncontent')
+    # Same text after whitespace and case normalization, e.g. a syndicated copy
+    second = AIContentProcessor.generate_ai_content('rejected', 'Some raw content')
+
+    assert len(sent) == 1
+    assert first == second and second['is_valid'] is False
+    assert (ai_cache.stats['hits'], ai_cache.stats['stored']) == (1, 1)
+
+
+def test_batch_only_sends_uncached_articles(prompts, ai_cache):
+    sent, replies = prompts
+    ai_cache.set('Cached', 'cached raw', result(0, 'Cached'))
+    replies.append(gemini_reply(json.dumps(result(0, 'Fresh'))))
+
+    results = AIContentProcessor.generate_ai_content_batch([('Cached', 'cached raw'), ('Fresh', 'fresh raw')])
+
+    assert len(sent) == 1 and 'Title: Fresh' in sent[0] and 'Cached' not in sent[0]
+    assert [item['title'] for item in results] == ['Cached', 'Fresh']
+
+
+def test_cache_expires_and_evicts_least_recently_used(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('dashboard.ai_cache.time.time', lambda: now[0])
+    cache = AIResultCache(str(tmp_path / 'bounded.sqlite3'), ttl=100, max_entries=3, prompt_version=1)
+    for title in ('a', 'b', 'c'):
+        cache.set(title, 'content', {'is_valid': True})
+        now[0] += 1
+    cache.get('a', 'content')
+    now[0] += 1
+    cache.set('d', 'content', {'is_valid': True})
+
+    # Over the limit: the two least recently used entries go, down to 90% of max_entries
+    assert cache.get('b', 'content') is None and cache.get('c', 'content') is None
+    assert cache.get('a', 'content') is not None and cache.get('d', 'content') is not None
+    now[0] += 100
+    assert cache.get('d', 'content') is None
+    # A new prompt version never sees results produced by the old prompt
+    assert AIResultCache(cache.path, ttl=100, max_entries=2, prompt_version=2).get('a', 'content') is None
+
+
+def test_replies_that_are_not_json_objects_are_discarded_not_cached(prompts, ai_cache):
+    sent, replies = prompts
+    replies.append(gemini_reply('"I cannot process these articles."'))
+    replies.append(gemini_reply(json.dumps(['not', 'an', 'object'])))
+    replies.append(gemini_reply('42'))
+    items = [('science', f'https://example.com/{name}', {'title': name, 'content': f'{name} raw'}) for name in ('First', 'Second')]
+
+    assert scrape_articles.process_articles(items) == [None, None]
+    assert len(sent) == 3
+    assert ai_cache.stats['stored'] == 0
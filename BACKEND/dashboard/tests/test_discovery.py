@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+
+import pytest
+from django.core.cache import cache
+from dashboard import discovery
+from dashboard.discovery import discover_article_links, parse_feed
+
+RSS = b'''<?xml version="1.0"?>
+<rss version="2.0"><channel>
+  <title>Example</title><link>https://www.example.com/</link>
+  <item><title>Older</title><link>https://www.example.com/2024/10/17/older-story?utm_source=rss</link>
+    <pubDate>Thu, 17 Oct 2024 08:00:00 GMT</pubDate></item>
+  <item><title>Newer</title><link>https://www.example.com/2024/10/18/newer-story</link>
+    <pubDate>Fri, 18 Oct 2024 08:00:00 GMT</pubDate></item>
+</channel></rss>'''
+
+ATOM = b'''<?xml version="1.0"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry><title>Atom story</title>
+    <link rel="enclosure" href="https://www.example.com/image.jpg"/>
+    <link href="https://www.example.com/atom-story"/>
+    <updated>2024-10-18T09:00:00Z</updated></entry>
+</feed>'''
+
+NEWS_SITEMAP = b'''<?xml version="1.0"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1"
+        xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">
+  <url><loc>https://www.example.com/sitemap-story</loc>
+    <image:image><image:loc>https://www.example.com/sitemap-story.jpg</image:loc></image:image>
+    <news:news><news:publication_date>2024-10-18T10:00:00+00:00</news:publication_date></news:news></url>
+</urlset>'''
+
+SITEMAP_INDEX = b'''<?xml version="1.0"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://www.example.com/news-sitemap-1.xml</loc></sitemap>
+</sitemapindex>'''
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.text = content.decode('utf-8')
+        self.status_code = status_code
+
+
+@pytest.fixture
+def fake_site(monkeypatch):
+    cache.clear()
+    site = {}
+    requested = []
+
+    def make_request(session, url, url_class='article'):
+        requested.append(url)
+        return FakeResponse(site.get(url, b''), status_code=200 if url in site else 404)
+
+    monkeypatch.setattr(discovery, 'make_request', make_request)
+    yield site, requested
+    cache.clear()
+
+
+def test_parse_feed_reads_rss_atom_and_sitemaps():
+    entries, _ = parse_feed(RSS)
+    assert [entry['link'] for entry in entries] == [
+        'https://www.example.com/2024/10/17/older-story?utm_source=rss',
+        'https://www.example.com/2024/10/18/newer-story',
+    ]
+    assert entries[1]['published'] > entries[0]['published']
+
+    entries, _ = parse_feed(ATOM)
+    assert [entry['link'] for entry in entries] == ['https://www.example.com/atom-story']
+    assert entries[0]['published'] == datetime(2024, 10, 18, 9, tzinfo=timezone.utc)
+
+    entries, _ = parse_feed(NEWS_SITEMAP)
+    assert [entry['link'] for entry in entries] == ['https://www.example.com/sitemap-story']
+    assert entries[0]['published'] == datetime(2024, 10, 18, 10, tzinfo=timezone.utc)
+
+    entries, children = parse_feed(SITEMAP_INDEX)
+    assert entries == [] and children == ['https://www.example.com/news-sitemap-1.xml']
+
+
+def test_discovery_prefers_advertised_feeds_and_caches_them(fake_site):
+    site, requested = fake_site
+    site['https://www.example.com/'] = (
+        b'<html><head><link rel="alternate" type="application/rss+xml" href="/feed.xml"></head>'
+        b'<body><a href="/2024/10/18/anchor-only-story-link">Anchor</a></body></html>'
+    )
+    site['https://www.example.com/feed.xml'] = RSS
+    site['https://www.example.com/robots.txt'] = b'Sitemap: https://www.example.com/news-sitemap.xml\n'
+    site['https://www.example.com/news-sitemap.xml'] = SITEMAP_INDEX
+    site['https://www.example.com/news-sitemap-1.xml'] = NEWS_SITEMAP
+
+    links, method = discover_article_links(None, 'https://www.example.com/')
+    assert method == 'feed'
+    # Newest first across the feed and the news sitemap, with tracking parameters stripped
+    assert links == [
+        'https://www.example.com/sitemap-story',
+        'https://www.example.com/2024/10/18/newer-story',
+        'https://www.example.com/2024/10/17/older-story',
+    ]
+
+    requested.clear()
+    discover_article_links(None, 'https://www.example.com/')
+    assert 'https://www.example.com/' not in requested
+
+
+def test_discovery_falls_back_to_anchors(fake_site):
+    site, requested = fake_site
+    site['https://www.example.com/sports/'] = b'<html><body><a href="/sports/2024/10/18/match-report">Match</a></body></html>'
+
+    links, method = discover_article_links(None, 'https://www.example.com/sports/')
+    assert method == 'html'
+    assert links == {'https://www.example.com/sports/2024/10/18/match-report'}
+    # Section pages do not read robots.txt, whose sitemaps span every category
+    assert requested == ['https://www.example.com/sports/']
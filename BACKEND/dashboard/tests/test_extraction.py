@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pytest
+from dashboard.extraction import extract_page
+
+PAGES = Path(__file__).parent / 'fixtures' / 'pages'
+
+
+def extract(name, as_text=False):
+    path = PAGES / name
+    return extract_page(path.read_text('utf-8') if as_text else path.read_bytes(), 'https://example.com/politics/story')
+
+
+def test_article_page_is_extracted_in_one_pass():
+    page = extract('article_og.html')
+    assert page['title'] == 'City council approves transit budget & new bus routes | Example News'
+    assert page['media_url'] == 'https://example.com/images/2024/10/council-vote.jpg'
+    assert page['og'] == {
+        'type': 'article', 'title': 'City council approves transit budget', 'image': '/images/2024/10/council-vote.jpg',
+    }
+    assert page['content'].startswith('The city council approved the new transit budget on Tuesday')
+    # Inline markup is joined with spaces; blocks holding scripts, short bylines and script text are dropped
+    assert 'extend evening service on the busiest lines' in page['content']
+    assert 'What changes for commuters Riders in the northern districts' in page['content']
+    assert 'Advertisement placeholder' not in page['content']
+    assert 'Staff Reporter' not in page['content']
+    assert 'dataLayer' not in page['content']
+    assert page['paragraph_words'] == [3, 30, 36, 32, 8, 31, 29, 7]
+    assert 0 < page['link_chars'] < page['page_chars']
+
+
+@pytest.mark.parametrize('as_text', [False, True])
+def test_declared_encodings_and_fallback_media(as_text):
+    page = extract('article_itemprop.xhtml', as_text)
+    assert page['title'] == 'Zürich researchers map the café economy'
+    assert 'neighbourhoods with independent cafés' in page['content']
+    # itemprop image comes before the featured image when there is no og:image
+    assert page['media_url'] == 'https://cdn.example.org/images/cafe-study.jpg'
+    assert page['og'] == {}
+
+
+def test_index_pages_are_mostly_link_text():
+    page = extract('section_index.html')
+    assert page['media_url'] is None
+    assert page['link_chars'] / page['page_chars'] > 0.8
+
+
+def test_unparseable_markup_returns_none():
+    assert extract_page(b'', 'https://example.com/') is None
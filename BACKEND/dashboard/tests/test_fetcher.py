@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache.backends.locmem import LocMemCache
+from dashboard.fetcher import AsyncHostThrottle, HostThrottle, SharedHostThrottle, host_key
+
+
+def test_host_key_ignores_www_prefix():
+    assert host_key('https://www.news18.com/sports/') == host_key('https://news18.com/movies/')
+
+
+def test_throttle_spaces_requests_to_the_same_host():
+    throttle = HostThrottle(concurrency=2, min_interval=0.05)
+    starts = []
+    for _ in range(3):
+        with throttle.slot('https://example.com/article'):
+            starts.append(time.monotonic())
+    assert starts[2] - starts[0] >= 0.1
+
+
+def test_throttle_limits_concurrency_per_host_only():
+    throttle = HostThrottle(concurrency=1, min_interval=0)
+    in_flight = {'example.com': 0, 'example.org': 0}
+    peak = {'example.com': 0, 'example.org': 0}
+    lock = threading.Lock()
+
+    def fetch(host):
+        with throttle.slot(f'https://{host}/article'):
+            with lock:
+                in_flight[host] += 1
+                peak[host] = max(peak[host], in_flight[host])
+            time.sleep(0.05)
+            with lock:
+                in_flight[host] -= 1
+
+    threads = [threading.Thread(target=fetch, args=(host,)) for host in in_flight for _ in range(3)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == {'example.com': 1, 'example.org': 1}
+    # The two hosts run side by side, so the run takes about one host's serial time
+    assert time.monotonic() - started < 0.25
+
+
+def test_async_throttle_waits_in_the_event_loop_not_the_pool():
+    throttle = AsyncHostThrottle(HostThrottle(concurrency=1, min_interval=0.05))
+    starts = {}
+
+    async def fetch(pool, url):
+        async with throttle.turn(url):
+            starts.setdefault(host_key(url), []).append(
+                await asyncio.get_running_loop().run_in_executor(pool, time.monotonic)
+            )
+
+    async def run():
+        # A single fetch thread: had it slept out example.com's spacing, example.org would queue behind it
+        with ThreadPoolExecutor(1) as pool:
+            await asyncio.gather(*(fetch(pool, 'https://example.com/article') for _ in range(3)),
+                                 fetch(pool, 'https://example.org/article'))
+
+    asyncio.run(run())
+    assert starts['example.com'][2] - starts['example.com'][0] >= 0.1
+    assert starts['example.org'][0] < starts['example.com'][1]
+
+
+def test_shared_throttle_limits_a_host_across_processes():
+    # One throttle object per worker process, meeting only in the shared cache
+    cache = LocMemCache('host-throttle-test', {})
+    throttles = [SharedHostThrottle(cache, concurrency=1, min_interval=0.05) for _ in range(2)]
+    starts, in_flight, peak = [], [0], [0]
+    lock = threading.Lock()
+
+    def fetch(throttle):
+        with throttle.slot('https://www.news18.com/sports/story'):
+            with lock:
+                starts.append(time.time())
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+
+    threads = [threading.Thread(target=fetch, args=(throttle,)) for throttle in throttles for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    starts.sort()
+    assert peak[0] == 1
+    assert all(later - earlier >= 0.045 for earlier, later in zip(starts, starts[1:]))
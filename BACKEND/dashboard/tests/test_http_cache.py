@@ -0,0 +1,116 @@
+import sqlite3
+
+import requests
+from dashboard.http_cache import ScraperHttpCache
+
+TTLS = {'index': 60, 'article': 3600}
+
+
+def make_response(status_code, body=b'', headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = body
+    return response
+
+
+def test_fresh_entries_are_served_without_a_request(tmp_path):
+    http_cache = ScraperHttpCache(str(tmp_path / 'cache.sqlite3'), max_bytes=10_000, ttls=TTLS)
+    calls = []
+
+    def fetch(headers):
+        calls.append(headers)
+        return make_response(200, b'<html>article</html>', {'Content-Type': 'text/html; charset=utf-8'})
+
+    first = http_cache.get('https://example.com/a', 'article', fetch)
+    second = http_cache.get('https://example.com/a', 'article', fetch)
+    assert len(calls) == 1
+    assert second.text == first.text == '<html>article</html>'
+    assert (http_cache.stats['hits'], http_cache.stats['misses'], http_cache.stats['bytes_saved']) == (1, 1, 20)
+
+
+def test_stale_entries_are_revalidated_with_validators(tmp_path, monkeypatch):
+    http_cache = ScraperHttpCache(str(tmp_path / 'cache.sqlite3'), max_bytes=10_000, ttls=TTLS)
+    now = [1000.0]
+    monkeypatch.setattr('dashboard.http_cache.time.time', lambda: now[0])
+    calls = []
+
+    def fetch(headers):
+        calls.append(headers)
+        if headers:
+            return make_response(304)
+        return make_response(200, b'<rss></rss>', {'ETag': '"v1"', 'Last-Modified': 'Fri, 18 Oct 2024 08:00:00 GMT'})
+
+    http_cache.get('https://example.com/feed', 'index', fetch)
+    now[0] += 61
+    response = http_cache.get('https://example.com/feed', 'index', fetch)
+    assert calls[1] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Fri, 18 Oct 2024 08:00:00 GMT'}
+    assert response.status_code == 200 and response.content == b'<rss></rss>'
+    assert http_cache.stats['revalidated'] == 1
+
+    # The 304 renewed the entry for another index TTL
+    http_cache.get('https://example.com/feed', 'index', fetch)
+    assert len(calls) == 2
+
+
+
+def test_revalidate_checks_even_fresh_entries_with_the_server(tmp_path):
+    http_cache = ScraperHttpCache(str(tmp_path / 'cache.sqlite3'), max_bytes=10_000, ttls=TTLS)
+    calls = []
+
+    def fetch(headers):
+        calls.append(headers)
+        return make_response(304) if headers else make_response(200, b'<rss></rss>', {'ETag': '"v1"'})
+
+    http_cache.get('https://example.com/feed', 'index', fetch)
+    response = http_cache.get('https://example.com/feed', 'index', fetch, revalidate=True)
+    assert calls == [{}, {'If-None-Match': '"v1"'}]
+    assert response.content == b'<rss></rss>'
+    assert (http_cache.stats['hits'], http_cache.stats['revalidated']) == (0, 1)
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    http_cache = ScraperHttpCache(str(tmp_path / 'cache.sqlite3'), max_bytes=250, ttls=TTLS)
+    now = [1000.0]
+    monkeypatch.setattr('dashboard.http_cache.time.time', lambda: now[0])
+    fetch = lambda headers: make_response(200, b'x' * 100)
+
+    for name in ('a', 'b'):
+        http_cache.get(f'https://example.com/{name}', 'article', fetch)
+        now[0] += 1
+    http_cache.get('https://example.com/a', 'article', fetch)  # a is now more recent than b
+    now[0] += 1
+    http_cache.get('https://example.com/c', 'article', fetch)
+
+    assert http_cache.stats['evicted'] == 1
+    http_cache.reset_stats()
+    http_cache.get('https://example.com/a', 'article', fetch)
+    http_cache.get('https://example.com/b', 'article', fetch)
+    assert (http_cache.stats['hits'], http_cache.stats['misses']) == (1, 1)
+
+
+def test_size_limit_holds_across_processes_sharing_the_file(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    # One cache object per worker process; neither writes more than the limit on its own
+    workers = [ScraperHttpCache(path, max_bytes=250, ttls=TTLS) for _ in range(2)]
+    fetch = lambda headers: make_response(200, b'x' * 100)
+
+    for number, http_cache in enumerate(workers * 2):
+        http_cache.get(f'https://example.com/{number}', 'article', fetch)
+
+    stored = sqlite3.connect(path).execute('SELECT SUM(size) FROM responses').fetchone()[0]
+    assert stored <= 250
+    assert sum(http_cache.stats['evicted'] for http_cache in workers) >= 2
+
+
+def test_a_locked_database_falls_back_to_the_network(tmp_path, monkeypatch):
+    monkeypatch.setattr('dashboard.http_cache.BUSY_TIMEOUT', 0.01)
+    path = str(tmp_path / 'cache.sqlite3')
+    http_cache = ScraperHttpCache(path, max_bytes=10_000, ttls=TTLS)
+    http_cache.fresh('https://example.com/a')  # creates the schema
+    other_process = sqlite3.connect(path, isolation_level=None)
+    other_process.execute('BEGIN EXCLUSIVE')
+
+    response = http_cache.get('https://example.com/a', 'article', lambda headers: make_response(200, b'article'))
+    assert response.content == b'article'
+    assert http_cache.stats['errors'] == 1
+    other_process.execute('ROLLBACK')
@@ -0,0 +1,65 @@
+import pytest
+from dashboard.link_filter import learn_allow_patterns, normalize_url, rank_candidate_links, score_link
+from dashboard.models import Article
+
+PAGE_URL = 'https://www.example.com/technology/'
+
+
+def test_normalize_url_drops_tracking_fragments_and_trailing_slashes():
+    canonical = 'https://www.example.com/2024/10/18/sample-story?page=2&section=tech'
+    assert normalize_url(
+        'HTTPS://WWW.Example.com:443/2024/10/18/sample-story/?utm_source=x&section=tech&fbclid=1&page=2#comments'
+    ) == canonical
+    assert normalize_url(canonical) == canonical
+    assert normalize_url('https://www.example.com') == 'https://www.example.com/'
+
+
+def test_score_link_rejects_off_site_and_navigation_links():
+    assert score_link(PAGE_URL, 'https://twitter.com/example', {}) is None
+    assert score_link(PAGE_URL, 'https://www.example.com/tag/gadgets', {}) is None
+    assert score_link(PAGE_URL, 'https://www.example.com/about-us', {}) is None
+    assert score_link(PAGE_URL, 'https://www.example.com/images/logo.png', {}) is None
+    assert score_link(PAGE_URL, 'mailto:news@example.com', {}) is None
+
+
+def test_score_link_prefers_dated_slugged_article_urls():
+    article = score_link(PAGE_URL, 'https://www.example.com/2024/10/18/new-phone-launch-draws-crowds', {})
+    section = score_link(PAGE_URL, 'https://www.example.com/gadgets', {})
+    assert article > section
+    assert score_link(PAGE_URL, 'https://m.example.com/2024/10/18/new-phone-launch-draws-crowds', {}) == article
+
+
+@pytest.mark.django_db
+def test_learned_patterns_boost_known_article_shapes():
+    for i in range(3):
+        Article.objects.create(
+            title=f'Learned sample article {i}',
+            content='Learned sample article content.',
+            source_url=f'https://www.example.com/story/{1000 + i}',
+            category='technology'
+        )
+    patterns = learn_allow_patterns()
+    assert patterns == {'example.com': {('story', 2)}}
+    assert score_link(PAGE_URL, 'https://www.example.com/story/2000', patterns) == \
+        score_link(PAGE_URL, 'https://www.example.com/story/2000', {}) + 3
+
+
+@pytest.mark.django_db
+def test_rank_candidate_links_skips_saved_urls():
+    saved = 'https://www.example.com/2024/10/17/already-saved-sample-story-here'
+    Article.objects.create(
+        title='Saved sample article',
+        content='Saved sample article content.',
+        source_url=saved,
+        category='technology'
+    )
+    legacy = 'https://www.example.com/2024/10/16/legacy-saved-sample-story-here'
+    Article.objects.create(
+        title='Legacy sample article',
+        content='Saved before URLs were normalized.',
+        source_url=f'{legacy}/',
+        category='technology'
+    )
+    fresh = 'https://www.example.com/2024/10/18/fresh-sample-story-right-here'
+    links = {saved, legacy, fresh, 'https://www.example.com/gadgets'}
+    assert rank_candidate_links(PAGE_URL, links, {}) == [fresh]
@@ -1,4 +1,6 @@
 import pytest
+from io import StringIO
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from dashboard.models import Article, Bookmark, UserArticleView
 
@@ -87,3 +89,32 @@ def test_article_source_url_unique():
             source_url='http://example.com/unique-url',
             category='science'
         )
+
+@pytest.mark.django_db
+def test_article_is_listable_computed_on_save():
+    listable = Article.objects.create(
+        title='Listable Sample Article',
+        content='A listable sample article content.',
+        source_url='http://example.com/listable',
+        media_url='http://example.com/listable.jpg',
+        category='science'
+    )
+    placeholder = Article.objects.create(
+        title='Placeholder Sample Article',
+        content='No summary available',
+        source_url='http://example.com/placeholder',
+        media_url='http://example.com/placeholder.jpg',
+        category='science'
+    )
+    assert listable.is_listable
+    assert not placeholder.is_listable
+    assert list(Article.objects.listable()) == [listable]
+
+@pytest.mark.django_db
+def test_backfill_listable_command(article):
+    Article.objects.filter(id=article.id).update(
+        title='Backfilled Sample Article', media_url='http://example.com/media.jpg'
+    )
+    call_command('backfill_listable', batch_size=1, stdout=StringIO())
+    article.refresh_from_db()
+    assert article.is_listable
@@ -0,0 +1,66 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from dashboard.models import Article
+from dashboard.near_duplicates import SimHashIndex, hamming_distance, simhash
+
+STORY = (
+    'The city council approved the new transit budget on Tuesday after a long debate over how much '
+    'of the funding should go to expanding bus routes in the northern districts. Council members '
+    'said the plan would add twelve new routes by next spring and extend evening service on the '
+    'busiest lines, while critics argued that the money would be better spent repairing the aging '
+    'light rail network that carries most commuters into the city centre every weekday morning.'
+)
+OTHER_STORY = (
+    'The national football team secured a dramatic late victory in the qualifying match on Sunday, '
+    'with the substitute striker scoring twice in the final ten minutes to send the home crowd into '
+    'celebration. The coach praised the squad for keeping their composure after conceding early and '
+    'said the result puts the team in a strong position ahead of the final round of group games.'
+)
+
+
+def flip_bits(signature, bits):
+    for bit in bits:
+        signature ^= 1 << bit
+    return signature
+
+
+def test_simhash_matches_syndicated_copies_but_not_other_stories():
+    syndicated = 'Reporting by the wire desk. ' + STORY.replace('Tuesday', 'Tuesday evening')
+    assert hamming_distance(simhash(STORY), simhash(syndicated)) <= 7
+    assert hamming_distance(simhash(STORY), simhash(OTHER_STORY)) > 7
+    assert simhash(STORY) == simhash(STORY.upper())
+    assert simhash('Too short to sign reliably') is None
+
+
+def test_index_finds_signatures_within_the_distance_in_any_band():
+    signature = simhash(STORY)
+    index = SimHashIndex.from_rows([(1, simhash(OTHER_STORY)), (7, signature)], max_distance=3)
+    # Three flipped bits in three different bands still leave one band intact
+    assert index.find(flip_bits(signature, (0, 20, 40))) == 7
+    assert index.find(flip_bits(signature, (0, 20, 40, 60))) is None
+    assert index.find(flip_bits(signature, (63,))) == 7
+
+    index.add(flip_bits(signature, (1, 2, 3, 4)), 'https://example.com/copy')
+    assert index.find(flip_bits(signature, (1, 2, 3, 4, 63))) == 'https://example.com/copy'
+    assert len(index) == 3
+
+
+def test_empty_index_finds_nothing():
+    assert SimHashIndex().find(simhash(STORY)) is None
+
+
+@pytest.mark.django_db
+def test_articles_are_signed_on_save_and_by_the_backfill_command():
+    article = Article.objects.create(
+        title='Council approves transit budget',
+        content=STORY,
+        source_url='http://example.com/transit-budget',
+        category='politics'
+    )
+    assert article.simhash == simhash(STORY)
+
+    Article.objects.filter(id=article.id).update(simhash=None)
+    call_command('backfill_simhash', batch_size=1, stdout=StringIO())
+    article.refresh_from_db()
+    assert article.simhash == simhash(STORY)
@@ -0,0 +1,451 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import billiard
+import pytest
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from dashboard import discovery, pipeline, scrape_articles, tasks
+from dashboard.http_cache import ScraperHttpCache
+from dashboard.models import Article
+from dashboard.near_duplicates import simhash
+from dashboard.pipeline import parse_executor as real_parse_executor
+
+INDEX_HTML = '''
+<html><body>
+  <a href="/news/2024/10/18/first-sample-story-of-the-day">First</a>
+  <a href="/news/2024/10/18/second-sample-story-of-the-day">Second</a>
+  <a href="https://example.com/news/2024/10/18/third-sample-story-of-the-day">Third</a>
+  <a href="/news/2024/10/17/already-saved-sample-story">Saved</a>
+  <a href="/tag/politics">Tag</a>
+  <a href="https://twitter.com/example">Social</a>
+</body></html>
+'''
+
+
+class FakeResponse:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'text/html; charset=utf-8'}
+
+
+@pytest.fixture
+def fake_network(monkeypatch, tmp_path):
+    cache.clear()
+    caches['scraper'].clear()
+    requested = []
+
+    def make_request(session, url, url_class='article', throttled=True, revalidate=False):
+        if url.endswith('/robots.txt'):
+            return FakeResponse('', status_code=404)
+        requested.append(url)
+        return FakeResponse(INDEX_HTML if url.endswith('.com/') else f'<html>{url}</html>')
+
+    def parse_article(link, html, encoding=None):
+        return {
+            'title': f'Story at {link}',
+            'content': 'Parsed content',
+            'media_url': f'{link}.jpg',
+            'prescreen': (True, ''),
+            'simhash': None,
+        }
+
+    def process_article(category, link, parsed):
+        return {
+            'title': parsed['title'],
+            'content': 'Processed sample article content.',
+            'media_url': parsed['media_url'],
+            'source_url': link,
+            'category': category,
+            'keywords': 'news',
+            'created_at': timezone.now(),
+            'updated_at': timezone.now(),
+        }
+
+    monkeypatch.setattr(pipeline, 'make_request', make_request)
+    monkeypatch.setattr(discovery, 'make_request', make_request)
+    monkeypatch.setattr(pipeline.host_throttle, 'min_interval', 0)
+    monkeypatch.setattr(pipeline, 'http_cache', ScraperHttpCache(
+        str(tmp_path / 'http_cache.sqlite3'), max_bytes=1 << 20, ttls={'index': 60, 'article': 60},
+    ))
+    monkeypatch.setattr(pipeline, 'parse_article', parse_article)
+    # The fakes are not importable from worker processes
+    monkeypatch.setattr(pipeline, 'parse_executor', lambda workers: ThreadPoolExecutor(workers))
+    monkeypatch.setattr(
+        pipeline, 'process_articles', lambda items: [process_article(*item) for item in items]
+    )
+    monkeypatch.setattr(pipeline, 'index_articles', lambda ids: len(ids))
+    return requested
+
+
+def test_run_stage_drains_queue_and_closes_outbox():
+    async def run():
+        inbox, outbox = asyncio.Queue(2), asyncio.Queue(2)
+        seen = []
+
+        async def produce():
+            for item in range(10):
+                await inbox.put(item)
+            await inbox.put(pipeline.DONE)
+
+        async def handle(item):
+            seen.append(item)
+            await outbox.put(item * 2)
+
+        async def consume():
+            results = []
+            while (item := await outbox.get()) is not pipeline.DONE:
+                results.append(item)
+            return results
+
+        _, _, results = await asyncio.gather(produce(), pipeline.run_stage(inbox, handle, 3, outbox), consume())
+        return seen, results
+
+    seen, results = asyncio.run(run())
+    assert sorted(seen) == list(range(10))
+    assert sorted(results) == [item * 2 for item in range(10)]
+
+
+def test_run_host_stage_keeps_a_busy_host_from_holding_up_others():
+    async def run():
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        for url in [f'https://slow.example.com/{i}' for i in range(5)] + ['https://fast.example.org/1']:
+            inbox.put_nowait(url)
+        inbox.put_nowait(pipeline.DONE)
+        finished = []
+
+        async def handle(url):
+            await asyncio.sleep(0.05 if 'slow' in url else 0)
+            finished.append(url)
+
+        await pipeline.run_host_stage(inbox, handle, lambda url: url, 1, outbox)
+        assert outbox.get_nowait() is pipeline.DONE
+        return finished
+
+    finished = asyncio.run(run())
+    assert finished[0] == 'https://fast.example.org/1'
+    assert len(finished) == 6
+
+
+def test_batch_items_respects_size_and_token_budget():
+    async def run():
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        for cost in (3, 3, 3, 8, 1):
+            inbox.put_nowait(cost)
+        inbox.put_nowait(pipeline.DONE)
+        await pipeline.batch_items(inbox, outbox, batch_size=2, token_budget=10, cost=lambda item: item)
+        batches = []
+        while (batch := outbox.get_nowait()) is not pipeline.DONE:
+            batches.append(batch)
+        return batches
+
+    assert asyncio.run(run()) == [[3, 3], [3], [8, 1]]
+
+
+def test_batch_items_flushes_partial_batches_after_linger():
+    async def run():
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        task = asyncio.create_task(
+            pipeline.batch_items(inbox, outbox, batch_size=5, token_budget=100, cost=lambda item: 1, linger=0.01)
+        )
+        await inbox.put('first')
+        batch = await asyncio.wait_for(outbox.get(), 1)
+        await inbox.put(pipeline.DONE)
+        await task
+        return batch
+
+    assert asyncio.run(run()) == ['first']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pipeline_saves_up_to_the_category_limit(fake_network, monkeypatch):
+    monkeypatch.setattr(pipeline, 'ARTICLES_TO_SAVE_PER_CATEGORY', 2)
+    result = pipeline.run_scrape_pipeline({'technology': ['https://example.com/']})
+    assert result['saved'] == 2
+    assert Article.objects.filter(category='technology').count() == 2
+    assert 'https://example.com/' in fake_network
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pipeline_only_fetches_new_candidate_links(fake_network):
+    Article.objects.create(
+        title='Already saved sample story',
+        content='Already saved sample article content.',
+        source_url='https://example.com/news/2024/10/17/already-saved-sample-story',
+        media_url='https://example.com/saved.jpg',
+        category='technology'
+    )
+    result = pipeline.run_scrape_pipeline({'technology': ['https://example.com/']})
+    assert result['saved'] == 1
+    # Fetch workers run ahead of the writer, so every candidate may be fetched, but nothing else is
+    assert set(fake_network[1:]) <= {
+        f'https://example.com/news/2024/10/18/{slug}-sample-story-of-the-day' for slug in ('first', 'second', 'third')
+    }
+    stats = result['sources']['https://example.com/']
+    assert (stats['discovery'], stats['links'], stats['candidates'], stats['saved']) == ('html', 6, 3, 1)
+    assert stats['fetch_to_save'] == stats['fetched'] == len(fake_network) - 1
+    # No earlier poll of the source to compare its links with
+    assert stats['new_links'] is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pipeline_skips_near_duplicates_before_gemini_and_before_saving(fake_network, monkeypatch):
+    story = ' '.join(f'word{i}' for i in range(40))
+    Article.objects.create(
+        title='Stored sample story',
+        content=story,
+        source_url='https://example.com/news/2024/10/16/stored-sample-story',
+        media_url='https://example.com/stored.jpg',
+        category='technology'
+    )
+    sent_to_gemini = []
+
+    def parse_article(link, html, encoding=None):
+        # Every page carries the same wire story, so only the first one is worth a Gemini call
+        return {
+            'title': f'Story at {link}', 'content': story, 'media_url': f'{link}.jpg',
+            'prescreen': (True, ''), 'simhash': simhash(story),
+        }
+
+    def process_articles(items):
+        sent_to_gemini.extend(link for _, link, _ in items)
+        return [{
+            'title': parsed['title'], 'content': story, 'media_url': parsed['media_url'],
+            'source_url': link, 'category': category, 'keywords': 'news', 'source_simhash': parsed['simhash'],
+            'created_at': timezone.now(), 'updated_at': timezone.now(),
+        } for category, link, parsed in items]
+
+    monkeypatch.setattr(pipeline, 'parse_article', parse_article)
+    monkeypatch.setattr(pipeline, 'process_articles', process_articles)
+    result = pipeline.run_scrape_pipeline({'technology': ['https://example.com/']})
+
+    assert len(sent_to_gemini) == 1
+    # The summary is a near-duplicate of the stored article, so nothing new is saved
+    assert result['near_duplicates'] == {'before_ai': 3, 'before_save': 1}
+    assert result['saved'] == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_scheduled_polls_revalidate_a_cached_index_page(fake_network, monkeypatch):
+    # The real make_request and HTTP cache, with the index page changing between two close polls
+    index = {'html': INDEX_HTML}
+    conditional = []
+
+    class Session:
+        def get(self, url, headers=None, timeout=None, verify=None):
+            if url.endswith('/robots.txt'):
+                return FakeResponse('', status_code=404)
+            if url != 'https://example.com/':
+                return FakeResponse(f'<html>{url}</html>')
+            conditional.append(headers)
+            etag = f'"{len(index["html"])}"'
+            response = FakeResponse(index['html'], status_code=304 if headers.get('If-None-Match') == etag else 200)
+            response.headers = {**response.headers, 'ETag': etag}
+            return response
+
+    monkeypatch.setattr(scrape_articles, 'http_cache', pipeline.http_cache)
+    monkeypatch.setattr(pipeline, 'make_request', scrape_articles.make_request)
+    monkeypatch.setattr(discovery, 'make_request', scrape_articles.make_request)
+    monkeypatch.setattr(pipeline, 'build_session', Session)
+
+    first = pipeline.run_scrape_pipeline({'technology': ['https://example.com/']})
+    index['html'] = INDEX_HTML.replace('</body>', '<a href="/news/2024/10/18/fourth-sample-story-of-the-day">Fourth</a></body>')
+    second = pipeline.run_scrape_pipeline({'technology': ['https://example.com/']})
+
+    # Well within the index TTL, the second poll still asks the site and sees its new story
+    assert conditional == [{}, {'If-None-Match': f'"{len(INDEX_HTML)}"'}]
+    assert first['sources']['https://example.com/']['new_links'] is None
+    assert second['sources']['https://example.com/']['new_links'] == 1
+
+
+def test_parse_executor_parses_raw_bytes_in_worker_processes():
+    html = (Path(__file__).parent / 'fixtures' / 'pages' / 'article_og.html').read_bytes()
+    with pipeline.parse_executor(1) as pool:
+        article = pool.submit(pipeline.parse_article, 'https://example.com/politics/story', html, 'utf-8').result(60)
+    assert article['title'] == 'City council approves transit budget & new bus routes | Example News'
+    assert article['media_url'] == 'https://example.com/images/2024/10/council-vote.jpg'
+    assert article['prescreen'] == (True, '')
+    assert article['simhash'] is not None
+
+
+def parse_in_daemonic_process(html, results):
+    with pipeline.parse_executor(2) as pool:
+        article = pool.submit(pipeline.parse_article, 'https://example.com/politics/story', html, 'utf-8').result(60)
+        results.put((type(pool).__name__, article['title']))
+
+
+def test_parse_executor_uses_processes_inside_daemonic_workers():
+    # Celery prefork children are daemonic billiard processes
+    html = (Path(__file__).parent / 'fixtures' / 'pages' / 'article_og.html').read_bytes()
+    context = billiard.get_context('fork')
+    results = context.Queue()
+    worker = context.Process(target=parse_in_daemonic_process, args=(html, results), daemon=True)
+    worker.start()
+    try:
+        assert results.get(timeout=90) == (
+            'BilliardPoolExecutor', 'City council approves transit budget & new bus routes | Example News',
+        )
+    finally:
+        worker.join(10)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_category_task_parses_in_processes_inside_daemonic_workers(fake_network, monkeypatch):
+    page = (Path(__file__).parent / 'fixtures' / 'pages' / 'article_og.html').read_text()
+    fake_request = pipeline.make_request
+    executors = []
+
+    def make_request(session, url, url_class='article', throttled=True, revalidate=False):
+        response = fake_request(session, url, url_class, throttled, revalidate)
+        return FakeResponse(page) if url_class == 'article' else response
+
+    def parse_executor(workers):
+        # The fixture's thread pool replaces the module's parse_executor; use the real one here
+        executors.append(real_parse_executor(workers))
+        return executors[-1]
+
+    monkeypatch.setattr(pipeline, 'make_request', make_request)
+    # The real parse_article, since the pages are parsed in spawned processes
+    monkeypatch.setattr(pipeline, 'parse_article', scrape_articles.parse_article)
+    monkeypatch.setattr(pipeline, 'parse_executor', parse_executor)
+    monkeypatch.setattr(pipeline.multiprocessing, 'current_process', lambda: SimpleNamespace(daemon=True))
+
+    result = tasks.scrape_category_task.apply(args=('technology', ['https://example.com/'])).get()
+    assert [type(executor).__name__ for executor in executors] == ['BilliardPoolExecutor']
+    assert result['saved'] == 1
+    assert Article.objects.get().title == 'City council approves transit budget & new bus routes | Example News'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_category_tasks_of_one_run_share_host_limits_and_links(fake_network, monkeypatch):
+    # Both sources are on example.com and link to the same stories, like news18.com across categories
+    sources = {'technology': 'https://example.com/', 'science': 'https://example.com/science/'}
+    fake_request = pipeline.make_request
+    starts, in_flight, peak = [], [0], [0]
+    lock = threading.Lock()
+
+    def make_request(session, url, url_class='article', throttled=True, revalidate=False):
+        with lock:
+            starts.append(time.time())
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        return FakeResponse(INDEX_HTML) if url in sources.values() else fake_request(session, url, url_class, throttled, revalidate)
+
+    monkeypatch.setattr(pipeline, 'make_request', make_request)
+    monkeypatch.setattr(discovery, 'make_request', make_request)
+    # Worker processes meet in Redis or the database cache; one LocMem instance stands in for it
+    shared = LocMemCache('scrape-run-test', {})
+    monkeypatch.setattr(pipeline, 'caches', {'scraper': shared})
+    monkeypatch.setattr(pipeline.host_throttle, 'cache', shared)
+    monkeypatch.setattr(pipeline.host_throttle, 'concurrency', 1)
+    monkeypatch.setattr(pipeline.host_throttle, 'min_interval', 0.05)
+
+    with ThreadPoolExecutor(2) as workers:
+        results = list(workers.map(
+            lambda category: tasks.scrape_category_task.apply(args=(category, [sources[category]], 'run-1')).get(),
+            sources,
+        ))
+
+    starts.sort()
+    assert peak[0] == 1
+    # Starts are reserved 50 ms apart; the margin is for thread scheduling in the test
+    assert all(later - earlier >= 0.035 for earlier, later in zip(starts, starts[1:]))
+    # Each story is fetched by one of the two tasks only
+    articles = [url for url in fake_network if '/news/' in url]
+    assert articles and len(articles) == len(set(articles))
+    assert all('error' not in result for result in results)
+
+
+def test_run_claims_are_shared_by_the_tasks_of_one_run():
+    shared = LocMemCache('run-claims-test', {})
+    technology, science = (pipeline.RunClaims('run-1', owner, shared) for owner in ('technology', 'science'))
+    links = ['https://example.com/a', 'https://example.com/b']
+    story = ' '.join(f'word{i}' for i in range(40))
+
+    assert technology.claim_links(links) == links
+    assert science.claim_links(links + ['https://example.com/c']) == ['https://example.com/c']
+    # A retried task still owns the links it claimed before
+    assert technology.claim_links(links) == links
+
+    assert technology.claim_signature(simhash(story), 'https://example.com/a') is None
+    assert science.claim_signature(simhash(story + ' updated'), 'https://example.com/c') == 'https://example.com/a'
+    assert pipeline.RunClaims('run-2', 'science', shared).claim_links(links) == links
+
+
+@pytest.mark.django_db
+def test_save_batch_inserts_with_a_fixed_number_of_queries(monkeypatch):
+    monkeypatch.setattr(pipeline, 'ARTICLES_TO_SAVE_PER_CATEGORY', 3)
+    Article.objects.create(
+        title='Already saved sample story',
+        content='Already saved sample article content.',
+        source_url='https://example.com/news/saved',
+        category='technology'
+    )
+
+    def row(slug):
+        return ('https://example.com/', {
+            'title': f'Sample story {slug}', 'content': f'Processed sample article content about {slug}.',
+            'media_url': f'https://example.com/{slug}.jpg', 'source_url': f'https://example.com/news/{slug}',
+            'category': 'technology', 'keywords': 'news', 'source_simhash': 42,
+        })
+
+    scrape = pipeline.ScrapePipeline({'technology': []})
+    batch = [row('saved'), row('first'), row('first'), row('second'), row('third'), row('over-the-limit')]
+    with CaptureQueriesContext(connection) as queries:
+        created_sources = scrape.save_batch(batch)
+
+    # Existing URLs, the bulk insert and the new ids, whatever the batch size
+    assert len([query for query in queries if 'SAVEPOINT' not in query['sql']]) == 3
+    assert created_sources == ['https://example.com/'] * 2
+    assert dict(scrape.write_stats) == {'batches': 1, 'created': 2, 'existing': 1}
+    assert scrape.saved['technology'] == 2
+    created = Article.objects.filter(id__in=scrape.created_ids)
+    assert sorted(created.values_list('source_url', flat=True)) == [
+        'https://example.com/news/first', 'https://example.com/news/second',
+    ]
+    assert set(created.values_list('source_simhash', 'is_listable')) == {(42, True)}
+
+
+@pytest.mark.django_db
+def test_save_batch_does_not_count_urls_a_concurrent_run_saved(monkeypatch):
+    monkeypatch.setattr(pipeline, 'ARTICLES_TO_SAVE_PER_CATEGORY', 3)
+    atomic_blocks = []
+
+    def atomic(*args, **kwargs):
+        atomic_blocks.append(args)
+        if len(atomic_blocks) == 2:
+            # Another run commits the first URL between the existing-URL SELECT and the INSERT
+            Article.objects.create(
+                title='Saved by another run', content='Saved by another run meanwhile.',
+                source_url='https://example.com/news/first', category='technology',
+            )
+        return transaction.atomic(*args, **kwargs)
+
+    monkeypatch.setattr(pipeline, 'transaction', SimpleNamespace(atomic=atomic))
+    scrape = pipeline.ScrapePipeline({'technology': []})
+    scrape.save_batch([
+        ('https://example.com/', {
+            'title': f'Sample story {slug}', 'content': f'Processed sample article content about {slug}.',
+            'media_url': f'https://example.com/{slug}.jpg', 'source_url': f'https://example.com/news/{slug}',
+            'category': 'technology', 'keywords': 'news',
+        })
+        for slug in ('first', 'second')
+    ])
+
+    assert dict(scrape.write_stats) == {'batches': 1, 'created': 1, 'existing': 1}
+    assert list(Article.objects.filter(id__in=scrape.created_ids).values_list('source_url', flat=True)) == [
+        'https://example.com/news/second',
+    ]
+    assert Article.objects.get(source_url='https://example.com/news/first').title == 'Saved by another run'
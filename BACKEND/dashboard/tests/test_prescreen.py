@@ -0,0 +1,41 @@
+from dashboard.extraction import extract_page
+from dashboard.prescreen import page_signals, prescreen, prescreen_report
+
+PARAGRAPH = (
+    'The city council approved the new transit budget on Tuesday after a long debate over '
+    'how much of the funding should go to expanding bus routes in the northern districts.'
+)
+
+
+def screen(html):
+    return prescreen(page_signals(extract_page(html, 'https://example.com/story')))
+
+
+def test_article_pages_pass():
+    html = '<html><body><h1>Council approves budget</h1>' + f'<p>{PARAGRAPH}</p>' * 6 + '</body></html>'
+    assert screen(html) == (True, '')
+
+
+def test_short_and_link_heavy_pages_are_rejected():
+    assert screen(f'<html><body><p>{PARAGRAPH}</p></body></html>') == (False, 'too short')
+
+    teasers = ''.join(f'<h3><a href="/story/{i}">{PARAGRAPH}</a></h3>' for i in range(8))
+    assert screen(f'<html><body>{teasers}<p>{PARAGRAPH}</p></body></html>') == (False, 'mostly links')
+
+
+def test_og_article_relaxes_the_paragraph_rule():
+    blurbs = ''.join(f'<h3>{PARAGRAPH[:60]} {i}</h3>' for i in range(25))
+    page = f'<html><head>{{}}</head><body>{blurbs}</body></html>'
+    assert screen(page.format('')) == (False, 'few paragraphs')
+    assert screen(page.format('<meta property="og:type" content="article">')) == (True, '')
+
+
+def test_report_measures_avoided_calls_and_precision():
+    report = prescreen_report({
+        'screened': 10, 'rejected': 4, 'shadow_sent': 1,
+        'shadow_gemini_rejected': 1, 'shadow_gemini_accepted': 0,
+        'passed_gemini_accepted': 3, 'passed_gemini_rejected': 3,
+    })
+    assert report['llm_calls_avoided_share'] == 0.3
+    assert report['rejection_precision'] == 1.0
+    assert report['pass_precision'] == 0.5
@@ -0,0 +1,107 @@
+import os
+import time
+
+import pytest
+from django.core.cache import cache, caches
+from django.contrib.auth import get_user_model
+from dashboard import recommender
+from dashboard.models import Article, Bookmark, UserArticleView
+
+User = get_user_model()
+
+@pytest.fixture(autouse=True)
+def index_file(settings, tmp_path, db):
+    settings.RECOMMENDER_INDEX_PATH = str(tmp_path / 'recommender_index.npz')
+    caches['scraper'].delete(recommender.WRITE_LOCK_KEY)
+    recommender._index = None
+    yield settings.RECOMMENDER_INDEX_PATH
+    recommender._index = None
+
+def create_article(slug, title, content):
+    return Article.objects.create(
+        title=title,
+        content=content,
+        source_url=f'http://example.com/{slug}',
+        media_url=f'http://example.com/{slug}.jpg',
+        category='science'
+    )
+
+@pytest.mark.django_db
+def test_recommendations_follow_reading_history():
+    user = User.objects.create_user(email='reader@example.com', password='password123')
+    read = create_article('read', 'Mars rover finds water ice', 'The Mars rover found water ice near the pole of Mars.')
+    similar = create_article('similar', 'Water ice mapped on Mars', 'Scientists mapped water ice deposits across Mars.')
+    create_article('other', 'Football league final result', 'The football league final ended after extra time.')
+    Bookmark.objects.create(user=user, article=read)
+    UserArticleView.objects.create(user=user, article=read)
+    recommender.rebuild_index()
+
+    assert recommender.recommend_for_user(user, k=2) == [similar.id]
+
+@pytest.mark.django_db
+def test_missing_index_is_built_by_the_task_not_the_request(monkeypatch, index_file):
+    user = User.objects.create_user(email='reader@example.com', password='password123')
+    create_article('read', 'Mars rover finds water ice', 'The Mars rover found water ice near the pole of Mars.')
+    queued = []
+    monkeypatch.setattr('dashboard.tasks.rebuild_recommender_index_task.delay', lambda: queued.append(True))
+    cache.delete(recommender.REBUILD_QUEUED_KEY)
+
+    assert recommender.recommend_for_user(user) is None
+    assert recommender.recommend_for_user(user) is None
+    assert queued == [True]
+    assert not os.path.exists(index_file)
+
+@pytest.mark.django_db
+def test_index_articles_appends_and_persists(index_file):
+    first = create_article('first', 'Solar storm hits satellites', 'A solar storm disrupted several satellites.')
+    assert len(recommender.get_index(build_missing=True)) == 1
+
+    second = create_article('second', 'Satellites recover after storm', 'Operators say satellites recovered after the solar storm.')
+    assert recommender.index_articles([second.id]) == 1
+
+    reloaded = recommender.ArticleIndex.load(index_file)
+    assert sorted(reloaded.article_ids.tolist()) == [first.id, second.id]
+
+def write_from_another_process(path, articles):
+    # Stands in for a Celery process that appended to the index file after this one loaded it
+    index = recommender.ArticleIndex.load(path)
+    index.add([(article.id, article.title, article.content, article.keywords) for article in articles])
+    index.save(path)
+    later = os.path.getmtime(path) + 10
+    os.utime(path, (later, later))
+
+@pytest.mark.django_db
+def test_newer_index_file_is_loaded_in_the_background(index_file):
+    first = create_article('first', 'Solar storm hits satellites', 'A solar storm disrupted several satellites.')
+    recommender.rebuild_index()
+    current = recommender.get_index()
+    second = create_article('second', 'Satellites recover after storm', 'Operators say satellites recovered after the solar storm.')
+    write_from_another_process(index_file, [second])
+
+    # The request that notices the newer file is still served the index already in memory
+    assert recommender.get_index() is current
+    for _ in range(200):
+        if not recommender._reloading:
+            break
+        time.sleep(0.01)
+    assert sorted(recommender.get_index().article_ids.tolist()) == [first.id, second.id]
+
+@pytest.mark.django_db
+def test_index_writers_append_to_the_latest_file(monkeypatch, index_file):
+    first = create_article('first', 'Solar storm hits satellites', 'A solar storm disrupted several satellites.')
+    recommender.rebuild_index()
+    second = create_article('second', 'Satellites recover after storm', 'Operators say satellites recovered after the solar storm.')
+    third = create_article('third', 'Storm season forecast', 'Forecasters expect a stormy solar season for satellites.')
+    write_from_another_process(index_file, [second])
+    # Another writer holds the lock until this one has waited for it once
+    caches['scraper'].set(recommender.WRITE_LOCK_KEY, 'other-writer')
+    waits = []
+    monkeypatch.setattr(recommender.time, 'sleep', lambda seconds: (
+        waits.append(seconds), caches['scraper'].delete(recommender.WRITE_LOCK_KEY)
+    ))
+
+    assert recommender.index_articles([third.id]) == 1
+    assert waits == [recommender.WRITE_LOCK_POLL_INTERVAL]
+    reloaded = recommender.ArticleIndex.load(index_file)
+    assert sorted(reloaded.article_ids.tolist()) == [first.id, second.id, third.id]
+    assert caches['scraper'].get(recommender.WRITE_LOCK_KEY) is None
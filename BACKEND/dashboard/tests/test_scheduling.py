@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+from django.utils import timezone
+from dashboard import scheduling
+from dashboard.models import SourceSchedule
+
+WEBSITES = {
+    'sports': ['https://sports.example.com/'],
+    'science': ['https://science.example.com/', 'https://lab.example.com/'],
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(db):
+    caches['scraper'].clear()
+
+
+def test_count_new_links_compares_with_the_previous_poll():
+    source = 'https://sports.example.com/'
+    assert scheduling.count_new_links(source, ['https://sports.example.com/a', 'https://sports.example.com/b']) is None
+    assert scheduling.count_new_links(source, ['https://sports.example.com/b', 'https://sports.example.com/c']) == 1
+
+
+def test_next_interval_targets_new_articles_per_poll_within_bounds():
+    # Six new articles an hour: a poll every 30 minutes finds the target of three
+    assert scheduling.next_interval(6.0, 1200) == 1800
+    assert scheduling.next_interval(1000.0, 1200) == scheduling.MIN_INTERVAL
+    assert scheduling.next_interval(0.01, 1200) == scheduling.MAX_INTERVAL
+    # Sources that have never yielded anything back off exponentially
+    assert scheduling.next_interval(0.0, 1200) == 2400
+
+
+@pytest.mark.django_db
+def test_due_sources_are_claimed_once_and_rescheduled_by_yield():
+    now = timezone.now()
+    assert scheduling.claim_due_sources(WEBSITES, now) == WEBSITES
+    assert scheduling.claim_due_sources(WEBSITES, now) == {}
+    # Claimed but never recorded, e.g. the run died: due again after the minimum interval
+    assert scheduling.claim_due_sources(WEBSITES, now + timedelta(seconds=scheduling.MIN_INTERVAL)) == WEBSITES
+
+    polled = now + timedelta(seconds=scheduling.MIN_INTERVAL)
+    scheduling.record_polls({
+        'https://sports.example.com/': {'new_links': 10},
+        'https://science.example.com/': {'new_links': 0},
+        'https://lab.example.com/': {'new_links': None},
+    }, polled)
+
+    sports, science, lab = (SourceSchedule.objects.get(url=url) for url in (
+        'https://sports.example.com/', 'https://science.example.com/', 'https://lab.example.com/',
+    ))
+    # Ten new links over the default 20 minutes is 30 an hour, smoothed to 9
+    assert sports.yield_per_hour == pytest.approx(9.0)
+    assert sports.interval == 1200
+    assert (sports.last_new_articles, sports.new_articles, sports.polls) == (10, 10, 1)
+    assert science.interval == 2400
+    # No earlier link set to compare with: the interval is kept and no yield recorded
+    assert (lab.interval, lab.yield_per_hour, lab.polls) == (1200, 0.0, 1)
+    assert lab.next_run_at == polled + timedelta(seconds=1200)
+    assert scheduling.claim_due_sources(WEBSITES, polled + timedelta(seconds=1200)) == {
+        'sports': ['https://sports.example.com/'], 'science': ['https://lab.example.com/'],
+    }
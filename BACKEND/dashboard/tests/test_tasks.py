@@ -0,0 +1,71 @@
+import pytest
+from django.core.cache import caches
+from dashboard import pipeline, tasks
+from dashboard.scrape_articles import WEBSITES
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(db):
+    caches['scraper'].clear()
+
+
+def category_result(category, saved, created_ids):
+    return {
+        'saved': saved, 'elapsed_seconds': float(saved), 'saved_by_category': {category: saved},
+        'sources': {f'https://{category}.example.com/': {'saved': saved}}, 'created_ids': created_ids,
+        'http_cache': {'hits': 1}, 'ai': {'calls': saved}, 'near_duplicates': {'before_ai': 0},
+        'writes': {'created': saved},
+    }
+
+
+@pytest.mark.django_db
+def test_overlapping_ticks_are_skipped_until_the_run_finishes(monkeypatch):
+    launched = []
+    monkeypatch.setattr(tasks, 'chord', lambda header: lambda body: launched.append((list(header), body)))
+    monkeypatch.setattr(pipeline, 'finish_scrape_run', lambda created_ids, categories: 0)
+
+    assert tasks.scrape_articles_task() == {'skipped': False, 'categories': WEBSITES}
+    assert tasks.scrape_articles_task() == {'skipped': True}
+    header, body = launched[0]
+    # Every category task of the run carries its lock token, to share link claims with the others
+    assert [task.args for task in header] == [(category, urls, body.args[0]) for category, urls in WEBSITES.items()]
+
+    # The aggregating task releases the lock; the next tick finds no source due yet
+    tasks.finish_scrape_task(results=[], lock_token=body.args[0])
+    assert tasks.scrape_articles_task() == {'skipped': False, 'categories': {}}
+    assert len(launched) == 1
+    assert caches['scraper'].get(tasks.SCRAPE_LOCK_KEY) is None
+
+
+def test_category_task_returns_an_error_after_retries(monkeypatch):
+    calls = []
+
+    def failing_pipeline(websites, finalize, run_id):
+        calls.append(websites)
+        raise RuntimeError('source unreachable')
+
+    monkeypatch.setattr(pipeline, 'run_scrape_pipeline', failing_pipeline)
+    result = tasks.scrape_category_task.apply(args=('sports', ['https://sports.example.com/'])).get()
+    assert result == {'category': 'sports', 'error': 'source unreachable'}
+    assert len(calls) == 1 + tasks.SCRAPE_MAX_RETRIES
+
+
+@pytest.mark.django_db
+def test_finish_task_aggregates_and_indexes_once(monkeypatch):
+    finished = []
+    monkeypatch.setattr(pipeline, 'finish_scrape_run', lambda created_ids, categories: finished.append((created_ids, categories)))
+    caches['scraper'].set(tasks.SCRAPE_LOCK_KEY, 'token')
+
+    summary = tasks.finish_scrape_task([
+        category_result('sports', 2, [1, 2]),
+        {'category': 'politics', 'error': 'time limit exceeded'},
+        category_result('science', 0, []),
+    ], 'token')
+
+    assert finished == [([1, 2], ['sports'])]
+    assert summary['saved'] == 2
+    assert summary['saved_by_category'] == {'sports': 2, 'science': 0}
+    assert summary['failed'] == {'politics': 'time limit exceeded'}
+    assert summary['http_cache'] == {'hits': 2}
+    assert summary['ai'] == {'calls': 2}
+    assert caches['scraper'].get(tasks.SCRAPE_LOCK_KEY) is None
@@ -165,7 +165,27 @@ from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
-from dashboard.models import Article, Bookmark
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from datetime import timedelta
+from django.utils import timezone
+from django.core.cache import cache
+from dashboard import article_cache, view_buffer
+from dashboard.trending import refresh_trending_scores
+from dashboard.models import Article, Bookmark, UserArticleView
+
+@pytest.fixture(autouse=True)
+def local_view_buffer(settings):
+    settings.ARTICLE_VIEW_BUFFER_URL = None
+    view_buffer._buffer = None
+    yield
+    view_buffer._buffer = None
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
 
 @pytest.fixture
 def api_client():
@@ -202,6 +222,47 @@ class TestArticlesView:
         assert len(response.data['results']) > 0
         assert any(article['title'] in ['Sample Article 1', 'Sample Article 2'] for article in response.data['results'])
 
+    def test_get_articles_filters_and_orders(self, user):
+        client, _ = user
+        older = Article.objects.create(
+            title='Older Sample Article',
+            content='An older sample article content.',
+            source_url='http://example.com/older',
+            media_url='http://example.com/older.jpg',
+            category='technology'
+        )
+        newer = Article.objects.create(
+            title='Newer Sample Article',
+            content='A newer sample article content.',
+            source_url='http://example.com/newer',
+            media_url='http://example.com/newer.jpg',
+            category='technology'
+        )
+        Article.objects.create(
+            title='No Media Article',
+            content='An article without media.',
+            source_url='http://example.com/no-media',
+            category='technology'
+        )
+        Article.objects.create(
+            title='Short title',
+            content='Short title but long enough content.',
+            source_url='http://example.com/short',
+            media_url='http://example.com/short.jpg',
+            category='technology'
+        )
+        Article.objects.create(
+            title='Placeholder Content Article',
+            content='No summary available',
+            source_url='http://example.com/placeholder',
+            media_url='http://example.com/placeholder.jpg',
+            category='technology'
+        )
+        response = client.get(reverse('articles'), {'category': 'technology'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 2
+        assert [article['id'] for article in response.data['results']] == [newer.id, older.id]
+
     def test_get_article_by_id(self, user):
         client, _ = user
         article = Article.objects.create(
@@ -214,6 +275,195 @@ class TestArticlesView:
         response = client.get(reverse('article-detail', args=[article.id]))
         assert response.status_code == status.HTTP_200_OK
         assert response.data['title'] == 'Sample Article'
+        assert not {'is_listable', 'simhash', 'source_simhash'} & set(response.data)
+
+    def test_list_query_count_independent_of_page_size(self, user):
+        client, user_obj = user
+        for i in range(12):
+            article = Article.objects.create(
+                title=f'Bookmarkable Sample Article {i}',
+                content='A bookmarkable sample article content.',
+                source_url=f'http://example.com/bookmarkable{i}',
+                media_url=f'http://example.com/bookmarkable{i}.jpg',
+                category='technology'
+            )
+            if i % 2:
+                Bookmark.objects.create(user=user_obj, article=article)
+
+        with CaptureQueriesContext(connection) as small_page:
+            response = client.get(reverse('articles'), {'page_size': 2})
+        assert len(response.data['results']) == 2
+        cache.clear()
+        with CaptureQueriesContext(connection) as large_page:
+            response = client.get(reverse('articles'), {'page_size': 12})
+        assert len(response.data['results']) == 12
+        assert len(large_page) == len(small_page)
+        assert sum(article['is_bookmarked'] for article in response.data['results']) == 6
+
+    def test_list_articles_served_from_cache(self, user):
+        client, _ = user
+        Article.objects.create(
+            title='Cached Sample Article',
+            content='A cached sample article content.',
+            source_url='http://example.com/cached',
+            media_url='http://example.com/cached.jpg',
+            category='technology'
+        )
+        response = client.get(reverse('articles'), {'category': 'technology'})
+        assert response.data['count'] == 1
+
+        Article.objects.create(
+            title='Fresh Sample Article',
+            content='A fresh sample article content.',
+            source_url='http://example.com/fresh',
+            media_url='http://example.com/fresh.jpg',
+            category='technology'
+        )
+        with CaptureQueriesContext(connection) as cached:
+            response = client.get(reverse('articles'), {'category': 'technology'})
+        assert response.data['count'] == 1
+        assert not any('dashboard_article' in query['sql'] for query in cached)
+
+        article_cache.invalidate_article_feeds(['technology'])
+        response = client.get(reverse('articles'), {'category': 'technology'})
+        assert response.data['count'] == 2
+        stats = article_cache.cache_stats()['list']
+        assert (stats['hits'], stats['misses']) == (1, 2)
+
+    def test_unknown_category_is_not_cached(self, user):
+        client, _ = user
+        response = client.get(reverse('articles'), {'category': 'no-such-category'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 0
+        assert cache.get(f'{article_cache.PREFIX}:generation:no-such-category') is None
+        assert article_cache.cache_stats()['list']['misses'] == 0
+
+    def test_article_detail_served_from_cache_without_query(self, user):
+        client, _ = user
+        article = Article.objects.create(
+            title='Detail Sample Article',
+            content='A detail sample article content.',
+            source_url='http://example.com/detail',
+            media_url='http://example.com/detail.jpg',
+            category='technology'
+        )
+        client.get(reverse('article-detail', args=[article.id]))
+        with CaptureQueriesContext(connection) as cached:
+            response = client.get(reverse('article-detail', args=[article.id]))
+        assert response.data['title'] == 'Detail Sample Article'
+        assert not any('dashboard_article"' in query['sql'] for query in cached)
+        assert client.get(reverse('article-detail', args=[article.id + 1])).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_cached_list_overlays_bookmarks_per_user(self, user):
+        client, _ = user
+        article = Article.objects.create(
+            title='Overlay Sample Article',
+            content='An overlay sample article content.',
+            source_url='http://example.com/overlay',
+            media_url='http://example.com/overlay.jpg',
+            category='technology'
+        )
+        response = client.get(reverse('articles'))
+        assert response.data['results'][0]['is_bookmarked'] is False
+
+        client.post(reverse('bookmarks'), {'article_id': article.id})
+        response = client.get(reverse('articles'))
+        assert response.data['results'][0]['is_bookmarked'] is True
+        assert article_cache.cache_stats()['list']['hits'] == 1
+
+    def test_list_articles_cursor_pagination(self, user):
+        client, _ = user
+        articles = [
+            Article.objects.create(
+                title=f'Cursor Sample Article {i}',
+                content='A cursor sample article content.',
+                source_url=f'http://example.com/cursor{i}',
+                media_url=f'http://example.com/cursor{i}.jpg',
+                category='sports'
+            )
+            for i in range(5)
+        ]
+        response = client.get(reverse('articles'), {'pagination': 'cursor', 'page_size': 3, 'category': 'sports'})
+        assert response.status_code == status.HTTP_200_OK
+        first_page = [article['id'] for article in response.data['results']]
+
+        # A new article arriving mid-scroll must not shift the next page
+        Article.objects.create(
+            title='Fresh Cursor Sample Article',
+            content='A fresh cursor sample article content.',
+            source_url='http://example.com/cursor-fresh',
+            media_url='http://example.com/cursor-fresh.jpg',
+            category='sports'
+        )
+        response = client.get(response.data['next'])
+        second_page = [article['id'] for article in response.data['results']]
+        assert first_page + second_page == [article.id for article in reversed(articles)]
+        assert response.data['next'] is None
+
+    def test_article_views_are_buffered(self, user):
+        client, user_obj = user
+        article = Article.objects.create(
+            title='Buffered Sample Article',
+            content='A buffered sample article content.',
+            source_url='http://example.com/buffered',
+            media_url='http://example.com/buffered.jpg',
+            category='technology'
+        )
+        for _ in range(3):
+            response = client.get(reverse('article-detail', args=[article.id]))
+            assert response.status_code == status.HTTP_200_OK
+        assert UserArticleView.objects.count() == 0
+
+        response = client.get(reverse('user-article-view-count'))
+        assert response.data['view_count'] == 3
+
+        assert view_buffer.flush_article_views() == 3
+        assert UserArticleView.objects.filter(user=user_obj, article=article).count() == 3
+        response = client.get(reverse('user-article-view-count'))
+        assert response.data['view_count'] == 3
+
+    def test_interrupted_view_flush_is_resumed_without_duplicates(self, user, monkeypatch):
+        client, user_obj = user
+        article = Article.objects.create(
+            title='Interrupted Sample Article',
+            content='An interrupted sample article content.',
+            source_url='http://example.com/interrupted',
+            media_url='http://example.com/interrupted.jpg',
+            category='technology'
+        )
+        buffer = view_buffer.get_view_buffer()
+        buffer.push([[user_obj.id, article.id, (timezone.now() - timedelta(seconds=i)).isoformat()] for i in range(5)])
+
+        # The flusher dies after committing the first batch but before acknowledging it
+        def die(events):
+            raise RuntimeError('flusher killed')
+        monkeypatch.setattr(buffer, 'ack', die)
+        with pytest.raises(RuntimeError):
+            view_buffer.flush_article_views(batch_size=3)
+        monkeypatch.undo()
+        assert UserArticleView.objects.count() == 3
+
+        assert view_buffer.flush_article_views(batch_size=3) == 2
+        assert UserArticleView.objects.filter(user=user_obj, article=article).count() == 5
+        response = client.get(reverse('user-article-view-count'))
+        assert response.data['view_count'] == 5
+
+    def test_full_view_buffer_queues_one_flush(self, user, monkeypatch):
+        client, user_obj = user
+        article = Article.objects.create(
+            title='Queued Sample Article',
+            content='A queued sample article content.',
+            source_url='http://example.com/queued',
+            media_url='http://example.com/queued.jpg',
+            category='technology'
+        )
+        queued = []
+        monkeypatch.setattr(view_buffer, 'FLUSH_BATCH_SIZE', 1)
+        monkeypatch.setattr(view_buffer.LocalViewBuffer, 'should_flush_inline', lambda self, buffered: False)
+        monkeypatch.setattr('dashboard.tasks.flush_article_views_task.delay', lambda: queued.append(True))
+        for _ in range(3):
+            view_buffer.record_article_view(user_obj, article.id)
+        assert queued == [True]
 
 @pytest.mark.django_db
 class TestBookmarksView:
@@ -300,3 +550,31 @@ class TestTrendingArticlesView:
         response = client.get(reverse('trending-articles'))
         assert response.status_code == status.HTTP_200_OK
         assert isinstance(response.data, list)
+
+    def test_trending_articles_use_materialized_scores(self, user):
+        client, user_obj = user
+        articles = [
+            Article.objects.create(
+                title=f'Trending Sample Article {i}',
+                content='A trending sample article content.',
+                source_url=f'http://example.com/trending-scored{i}',
+                media_url=f'http://example.com/trending-scored{i}.jpg',
+                category='politics' if i < 3 else 'science'
+            )
+            for i in range(6)
+        ]
+        now = timezone.now()
+        for article in articles:
+            Bookmark.objects.create(user=user_obj, article=article)
+        # More recent views outweigh a larger number of old ones
+        UserArticleView.objects.bulk_create(
+            [UserArticleView(user=user_obj, article=articles[0], viewed_at=now - timedelta(days=20))] * 10 +
+            [UserArticleView(user=user_obj, article=articles[1], viewed_at=now - timedelta(hours=1))] * 4 +
+            [UserArticleView(user=user_obj, article=articles[4], viewed_at=now - timedelta(hours=2))] * 8
+        )
+        assert refresh_trending_scores(now=now) == 3
+
+        response = client.get(reverse('trending-articles'))
+        assert [article['id'] for article in response.data] == [articles[4].id, articles[1].id, articles[0].id]
+        response = client.get(reverse('trending-articles'), {'category': 'politics'})
+        assert [article['id'] for article in response.data] == [articles[1].id, articles[0].id]
@@ -0,0 +1,50 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from dashboard.article_cache import invalidate_trending
+from dashboard.models import Article, TrendingArticle, UserArticleView
+
+logger = logging.getLogger(__name__)
+
+TRENDING_WINDOW_DAYS = getattr(settings, 'TRENDING_WINDOW_DAYS', 30)
+TRENDING_HALF_LIFE_HOURS = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 48)
+
+
+def decayed_score(view_count, age_hours, half_life_hours=TRENDING_HALF_LIFE_HOURS):
+    # A view loses half its weight every half_life_hours
+    return view_count * 0.5 ** (max(age_hours, 0) / half_life_hours)
+
+
+def refresh_trending_scores(now=None):
+    """Rebuild TrendingArticle from hourly view counts over the trending window."""
+    now = now or timezone.now()
+    window_start = now - timedelta(days=TRENDING_WINDOW_DAYS)
+
+    hourly_counts = (
+        UserArticleView.objects.filter(viewed_at__gte=window_start)
+        .annotate(hour=TruncHour('viewed_at'))
+        .values('article_id', 'hour')
+        .annotate(view_count=Count('id'))
+    )
+    scores = {}
+    for row in hourly_counts.iterator():
+        age_hours = (now - row['hour']).total_seconds() / 3600
+        scores[row['article_id']] = scores.get(row['article_id'], 0.0) + decayed_score(row['view_count'], age_hours)
+
+    categories = dict(Article.objects.filter(id__in=scores).values_list('id', 'category'))
+    rows = [
+        TrendingArticle(article_id=article_id, category=categories[article_id], score=score)
+        for article_id, score in scores.items()
+        if article_id in categories
+    ]
+    with transaction.atomic():
+        TrendingArticle.objects.all().delete()
+        TrendingArticle.objects.bulk_create(rows, batch_size=1000)
+    invalidate_trending()
+    logger.info(f"Refreshed trending scores for {len(rows)} articles")
+    return len(rows)
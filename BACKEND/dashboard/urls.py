@@ -4,7 +4,7 @@ from dashboard.views import (
     NotificationsView, CommentsView, LogoutView, 
     UserArticleViewCountView, BookmarkCountView, 
     RecommendedArticlesView, TrendingArticlesView,
-    WeatherView,
+    WeatherView, ArticleCacheStatsView,
 )
 
 urlpatterns = [
@@ -20,4 +20,5 @@ urlpatterns = [
     path('bookmarks/count/', BookmarkCountView.as_view(), name='bookmark-count'),
     path('articles/recommended/', RecommendedArticlesView.as_view(), name='recommended-articles'),
     path('articles/trending/', TrendingArticlesView.as_view(), name='trending-articles'),
+    path('articles/cache-stats/', ArticleCacheStatsView.as_view(), name='article-cache-stats'),
 ]
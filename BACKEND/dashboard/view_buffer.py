@@ -0,0 +1,225 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from uuid import uuid4
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from dashboard.models import Article, UserArticleView
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = getattr(settings, 'ARTICLE_VIEW_FLUSH_BATCH_SIZE', 500)
+FLUSH_INTERVAL = getattr(settings, 'ARTICLE_VIEW_FLUSH_INTERVAL', 5)
+FLUSH_LOCK_TIMEOUT = 300  # seconds; frees the flush lock of a flusher that died
+FLUSH_QUEUED_KEY = 'dashboard:article_views:flush-queued'
+
+
+class RedisViewBuffer:
+    """
+    View events shared by every web process and flushed by the Celery worker. A flush claims a
+    batch by moving it to a processing list and acknowledges it once the rows are committed, so a
+    flusher killed in between leaves the batch there for the next flush instead of losing it.
+    """
+
+    EVENTS_KEY = 'dashboard:article_views:events'
+    PROCESSING_KEY = 'dashboard:article_views:processing'
+    PENDING_KEY = 'dashboard:article_views:pending'
+    FLUSH_LOCK_KEY = 'dashboard:article_views:flush-lock'
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def push(self, events):
+        pipe = self.client.pipeline()
+        pipe.rpush(self.EVENTS_KEY, *(json.dumps(event) for event in events))
+        for user_id, count in Counter(event[0] for event in events).items():
+            pipe.hincrby(self.PENDING_KEY, user_id, count)
+        return pipe.execute()[0]
+
+    def claim(self, limit):
+        """(events, recovered): the batch a previous flusher left unacknowledged, else up to limit new events."""
+        raw_events = self.client.lrange(self.PROCESSING_KEY, 0, -1)
+        if raw_events:
+            return [json.loads(raw) for raw in raw_events], True
+        # The LMOVEs run in one MULTI, so the batch reaches the processing list as a whole
+        pipe = self.client.pipeline()
+        for _ in range(limit):
+            pipe.lmove(self.EVENTS_KEY, self.PROCESSING_KEY, 'LEFT', 'RIGHT')
+        return [json.loads(raw) for raw in pipe.execute() if raw is not None], False
+
+    def ack(self, events):
+        # Dropping the batch and its pending counts together keeps the counts equal to the events held
+        pipe = self.client.pipeline()
+        pipe.delete(self.PROCESSING_KEY)
+        for user_id, count in Counter(event[0] for event in events).items():
+            pipe.hincrby(self.PENDING_KEY, user_id, -count)
+        pipe.execute()
+
+    @contextmanager
+    def flush_lock(self):
+        # One flusher at a time, since the processing list holds a single batch
+        token = uuid4().hex
+        acquired = bool(self.client.set(self.FLUSH_LOCK_KEY, token, nx=True, ex=FLUSH_LOCK_TIMEOUT))
+        try:
+            yield acquired
+        finally:
+            if acquired and self.client.get(self.FLUSH_LOCK_KEY) == token.encode():
+                self.client.delete(self.FLUSH_LOCK_KEY)
+
+    def pending_for_user(self, user_id):
+        return int(self.client.hget(self.PENDING_KEY, user_id) or 0)
+
+    def should_flush_inline(self, buffered):
+        return False
+
+
+class LocalViewBuffer:
+    """
+    In-process fallback used when no Redis URL is configured, for development with a single web
+    process. The Celery flush task runs in another process and never sees these events, so the
+    request thread flushes them itself; views still buffered when the process exits are lost.
+    """
+
+    def __init__(self):
+        self.events = deque()
+        self.processing = []
+        self.pending = Counter()
+        self.lock = threading.Lock()
+        self.flushing = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def push(self, events):
+        with self.lock:
+            self.events.extend(events)
+            self.pending.update(event[0] for event in events)
+            return len(self.events)
+
+    def claim(self, limit):
+        with self.lock:
+            self.last_flush = time.monotonic()
+            if self.processing:
+                return list(self.processing), True
+            self.processing = [self.events.popleft() for _ in range(min(limit, len(self.events)))]
+            return list(self.processing), False
+
+    def ack(self, events):
+        with self.lock:
+            self.processing = []
+            self.pending.subtract(event[0] for event in events)
+
+    @contextmanager
+    def flush_lock(self):
+        acquired = self.flushing.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.flushing.release()
+
+    def pending_for_user(self, user_id):
+        with self.lock:
+            return self.pending[user_id]
+
+    def should_flush_inline(self, buffered):
+        return buffered >= FLUSH_BATCH_SIZE or time.monotonic() - self.last_flush >= FLUSH_INTERVAL
+
+
+_buffer = None
+
+
+def get_view_buffer():
+    global _buffer
+    if _buffer is None:
+        url = getattr(settings, 'ARTICLE_VIEW_BUFFER_URL', None)
+        if url:
+            _buffer = RedisViewBuffer(url)
+        else:
+            if not settings.DEBUG:
+                logger.warning("ARTICLE_VIEW_BUFFER_URL is not set; buffering article views per process")
+            _buffer = LocalViewBuffer()
+    return _buffer
+
+
+def record_article_view(user, article_id):
+    """Queue a view event instead of inserting it in the request path."""
+    event = [user.id, article_id, timezone.now().isoformat()]
+    view_buffer = get_view_buffer()
+    try:
+        buffered = view_buffer.push([event])
+    except redis.RedisError as e:
+        logger.warning(f"View buffer unavailable, writing view synchronously: {e}")
+        UserArticleView.objects.create(user=user, article_id=article_id)
+        return
+
+    if view_buffer.should_flush_inline(buffered):
+        flush_article_views()
+    elif buffered >= FLUSH_BATCH_SIZE and cache.add(FLUSH_QUEUED_KEY, True, FLUSH_INTERVAL):
+        # One queued flush per interval is enough; every request past the threshold would queue another
+        from dashboard.tasks import flush_article_views_task
+        try:
+            flush_article_views_task.delay()
+        except Exception as e:
+            logger.warning(f"Could not schedule view flush, leaving it to the periodic task: {e}")
+
+
+def pending_view_count(user):
+    try:
+        return get_view_buffer().pending_for_user(user.id)
+    except redis.RedisError as e:
+        logger.warning(f"View buffer unavailable, counting flushed views only: {e}")
+        return 0
+
+
+def flush_article_views(batch_size=FLUSH_BATCH_SIZE):
+    """Move buffered view events into UserArticleView with bulk_create. Returns the number written."""
+    view_buffer = get_view_buffer()
+    flushed = 0
+    with view_buffer.flush_lock() as acquired:
+        if not acquired:
+            return 0
+        while True:
+            events, recovered = view_buffer.claim(batch_size)
+            if not events:
+                break
+            views = build_views(events, skip_written=recovered)
+            # A failed insert leaves the batch claimed; the next flush retries it
+            UserArticleView.objects.bulk_create(views, batch_size=batch_size)
+            view_buffer.ack(events)
+            flushed += len(views)
+
+            if len(events) < batch_size and not recovered:
+                break
+    return flushed
+
+
+def build_views(events, skip_written=False):
+    """
+    UserArticleView rows for events, leaving out those whose user or article was deleted while
+    they sat in the buffer. With skip_written, also those already inserted by a flush that died
+    before acknowledging the batch; an event's timestamp is precise enough to identify its row.
+    """
+    user_ids = set(get_user_model().objects.filter(
+        id__in={event[0] for event in events}
+    ).values_list('id', flat=True))
+    article_ids = set(Article.objects.filter(
+        id__in={event[1] for event in events}
+    ).values_list('id', flat=True))
+    views = [
+        UserArticleView(user_id=user_id, article_id=article_id, viewed_at=parse_datetime(viewed_at))
+        for user_id, article_id, viewed_at in events
+        if user_id in user_ids and article_id in article_ids
+    ]
+    if skip_written and views:
+        written = set(UserArticleView.objects.filter(
+            user_id__in=user_ids, viewed_at__in={view.viewed_at for view in views},
+        ).values_list('user_id', 'article_id', 'viewed_at'))
+        views = [view for view in views if (view.user_id, view.article_id, view.viewed_at) not in written]
+    return views
@@ -12,15 +12,20 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import logout as django_logout
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from dashboard.article_cache import (
+    CATEGORIES, USER_CACHE_TIMEOUT, cache_stats, cached_payload, generation, invalidate_user, overlay_bookmarks,
+)
 from dashboard.models import Article, Bookmark, UserArticleView
 from dashboard.serializers import ArticleSerializer, BookmarkSerializer
+from dashboard.recommender import recommend_for_user
+from dashboard.sampling import sample_listable_article_ids
+from dashboard.view_buffer import pending_view_count, record_article_view
 from users.serializers import UserSerializer
 from django.shortcuts import get_object_or_404
 import logging
 import random
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -460,10 +465,17 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+class ArticleCursorPagination(CursorPagination):
+    page_size = 9
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
 class ArticlesView(APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
+    cursor_pagination_class = ArticleCursorPagination
 
     def get(self, request, article_id=None):
         if article_id is not None:
@@ -472,58 +484,64 @@ class ArticlesView(APIView):
             return self.list_articles(request)
 
     def retrieve_article(self, request, article_id):
-        # Fetch a specific article by ID
-        article = get_object_or_404(Article, id=article_id)
+        # Keyed on the id so a hit skips the article query; the scraper's saves bump generation('all')
+        payload = cached_payload(
+            'detail',
+            (article_id, generation('all')),
+            lambda: dict(ArticleSerializer(get_object_or_404(Article, id=article_id)).data),
+        )
 
         # Check if the article has a valid media_url
-        if not article.media_url:
+        if not payload['media_url']:
             return Response({"error": "Article has no valid media URL"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Log the article view
-        UserArticleView.objects.create(user=request.user, article=article)
+        # Log the article view; buffered and flushed in bulk outside the request path
+        record_article_view(request.user, article_id)
 
-        serializer = ArticleSerializer(article, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(overlay_bookmarks([payload], request.user)[0], status=status.HTTP_200_OK)
 
     def list_articles(self, request):
         # Get the category from the query parameters
         category = request.query_params.get('category')
 
-        # Fetch all articles or filter by category if provided
-        queryset = Article.objects.filter(category=category) if category else Article.objects.all()
-
-        # Filter articles based on content relevance
-        filtered_articles = [
-            article for article in queryset
-            if article.content.strip() != 'No summary available' and
-            len(article.title.split()) > 2 and
-            article.media_url and
-            self.is_content_relevant(article)
-        ]
-
-        # Sort articles by creation date (newest first)
-        filtered_articles.sort(key=lambda x: x.created_at, reverse=True)
-
-        # Paginate the results
-        paginator = self.pagination_class()
-        paginated_articles = paginator.paginate_queryset(filtered_articles, request)
+        if category and category not in CATEGORIES:
+            # Matches no article; not cached, so arbitrary values cannot add keys
+            payload = self.build_article_page(request, category)
+        else:
+            # Shared page payloads are cached per category and query; is_bookmarked is per user
+            payload = cached_payload(
+                'list',
+                (generation(category or 'all'), request.get_host(), sorted(request.query_params.lists())),
+                lambda: self.build_article_page(request, category),
+            )
+        return Response({**payload, 'results': overlay_bookmarks(payload['results'], request.user)})
+
+    def build_article_page(self, request, category):
+        # Filter, order and paginate in the database so a page only reads page_size rows
+        queryset = Article.objects.listable()
+        if category:
+            queryset = queryset.filter(category=category)
+        queryset = queryset.order_by('-created_at', '-id')
+
+        # Cursor (keyset) mode is opt-in; page/page_size stays the default contract
+        if request.query_params.get('pagination') == 'cursor' or 'cursor' in request.query_params:
+            paginator = self.cursor_pagination_class()
+        else:
+            paginator = self.pagination_class()
+        paginated_articles = paginator.paginate_queryset(queryset, request)
 
-        # Serialize and return paginated articles
-        serializer = ArticleSerializer(paginated_articles, many=True, context={'request': request})
-        return paginator.get_paginated_response(serializer.data)
-    
-    def is_content_relevant(self, article):
-        # Example relevance check: content should include keywords from the title
-        title_keywords = set(article.title.lower().split())
-        content_keywords = set(article.content.lower().split())
-        return any(keyword in content_keywords for keyword in title_keywords)
+        # Serialize without the request; is_bookmarked is overlaid per user by the caller
+        serializer = ArticleSerializer(paginated_articles, many=True)
+        payload = paginator.get_paginated_response(serializer.data).data
+        return {**payload, 'results': [dict(article) for article in payload['results']]}
 
 class UserArticleViewCountView(APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        view_count = UserArticleView.objects.filter(user=request.user).count()
+        # Include views that are still waiting in the write-behind buffer
+        view_count = UserArticleView.objects.filter(user=request.user).count() + pending_view_count(request.user)
         return Response({'view_count': view_count}, status=status.HTTP_200_OK)
 class BookmarksView(APIView):
     authentication_classes = [JWTAuthentication]
@@ -547,6 +565,7 @@ class BookmarksView(APIView):
             return Response({'error': 'Article not found'}, status=status.HTTP_404_NOT_FOUND)
 
         bookmark, created = Bookmark.objects.get_or_create(user=request.user, article=article)
+        invalidate_user(request.user)
         if not created:
             return Response({'message': 'Article already bookmarked'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -576,6 +595,7 @@ class BookmarksView(APIView):
         bookmark = Bookmark.objects.filter(user=request.user, article=article).first()
         if bookmark:
             bookmark.delete()
+            invalidate_user(request.user)
             return Response({'message': 'Bookmark removed'}, status=status.HTTP_204_NO_CONTENT)
         else:
             return Response({'error': 'Bookmark not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -642,38 +662,33 @@ class RecommendedArticlesView(APIView):
         article_view_count = UserArticleView.objects.filter(user=user).count()
 
         if bookmark_count > 5 and article_view_count > 20:
-            # Example logic for recommendations when criteria are met
-            recent_views = UserArticleView.objects.filter(user=user).order_by('-viewed_at')[:5]
-            viewed_articles = [view.article for view in recent_views]
-
-            # Find articles that are not in the recently viewed list
-            recommended_articles = Article.objects.exclude(id__in=[article.id for article in viewed_articles])
-
-            # Filter articles based on content relevance
-            filtered_articles = [
-                article for article in recommended_articles
-                if self.is_content_relevant(article)
-            ]
+            # Content-based recommendations, cached per user until new articles or bookmarks arrive
+            payload = cached_payload(
+                'recommended',
+                (user.id, generation('all'), generation(f'user:{user.id}')),
+                lambda: self.build_recommendations(user),
+                timeout=USER_CACHE_TIMEOUT,
+            )
+            if payload:
+                return Response(overlay_bookmarks(payload, user), status=status.HTTP_200_OK)
 
-            # Limit to top 3 articles
-            top_recommended_articles = filtered_articles[:3]
-        else:
-            # Show 3 random articles if criteria are not met
-            all_articles = Article.objects.all()
-            filtered_articles = [
-                article for article in all_articles
-                if self.is_content_relevant(article)
-            ]
-            top_recommended_articles = random.sample(filtered_articles, min(3, len(filtered_articles)))
+        # Show 3 random articles if criteria are not met
+        sampled_ids = sample_listable_article_ids(3)
+        top_recommended_articles = list(Article.objects.filter(id__in=sampled_ids).with_bookmark_flag(user))
+        random.shuffle(top_recommended_articles)
 
         serializer = ArticleSerializer(top_recommended_articles, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    def is_content_relevant(self, article):
-        # Example relevance check: content should include keywords from the title
-        title_keywords = set(article.title.lower().split())
-        content_keywords = set(article.content.lower().split())
-        return any(keyword in content_keywords for keyword in title_keywords)
+    def build_recommendations(self, user):
+        recommended_ids = recommend_for_user(user, k=3)
+        if recommended_ids is None:
+            return None  # index not built yet; the caller samples instead and nothing is cached
+        articles = sorted(
+            Article.objects.filter(id__in=recommended_ids),
+            key=lambda article: recommended_ids.index(article.id)
+        )
+        return [dict(article) for article in ArticleSerializer(articles, many=True).data]
 
 class TrendingArticlesView(APIView):
     authentication_classes = [JWTAuthentication]
@@ -686,26 +701,38 @@ class TrendingArticlesView(APIView):
         bookmark_count = Bookmark.objects.filter(user=user).count()
         article_view_count = UserArticleView.objects.filter(user=user).count()
 
+        category = request.query_params.get('category')
+
         if bookmark_count > 5 and article_view_count > 20:
-            # Trending articles based on view count in the last 30 days
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            trending_articles = Article.objects.filter(
-                userarticleview__viewed_at__gte=thirty_days_ago
-            ).annotate(view_count=Count('userarticleview')).order_by('-view_count')[:5]
-        else:
-            # Show 5 random articles if criteria are not met
-            all_articles = Article.objects.all()
-            filtered_articles = [
-                article for article in all_articles
-                if self.is_content_relevant(article)
-            ]
-            trending_articles = random.sample(filtered_articles, min(3, len(filtered_articles)))
+            # Trending articles from the materialized time-decayed scores, shared by all users
+            if category and category not in CATEGORIES:
+                payload = self.build_trending(category)
+            else:
+                payload = cached_payload(
+                    'trending',
+                    (category, generation('trending')),
+                    lambda: self.build_trending(category),
+                )
+            return Response(overlay_bookmarks(payload, user), status=status.HTTP_200_OK)
+
+        # Show 3 random articles if criteria are not met
+        sampled_ids = sample_listable_article_ids(3, category=category)
+        trending_articles = list(Article.objects.filter(id__in=sampled_ids).with_bookmark_flag(user))
+        random.shuffle(trending_articles)
 
         serializer = ArticleSerializer(trending_articles, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    def is_content_relevant(self, article):
-        # Example relevance check: content should include keywords from the title
-        title_keywords = set(article.title.lower().split())
-        content_keywords = set(article.content.lower().split())
-        return any(keyword in content_keywords for keyword in title_keywords)
+    def build_trending(self, category):
+        trending_articles = Article.objects.filter(trending__isnull=False)
+        if category:
+            trending_articles = trending_articles.filter(trending__category=category)
+        trending_articles = trending_articles.order_by('-trending__score')[:5]
+        return [dict(article) for article in ArticleSerializer(trending_articles, many=True).data]
+
+class ArticleCacheStatsView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats(), status=status.HTTP_200_OK)
@@ -171,10 +171,102 @@ CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_BEAT_SCHEDULE = {
     'scrape-articles-task': {
         'task': 'dashboard.tasks.scrape_articles',
-        'schedule': 1200.0,  # 30 minutes in seconds
-        # Alternative: using crontab
-        # 'schedule': crontab(minute='*/30'),
+        # Scrapes the sources that are due; each has its own adaptive interval (SCRAPER_SCHEDULE_*)
+        'schedule': 300.0,
     },
+    'flush-article-views-task': {
+        'task': 'dashboard.tasks.flush_article_views',
+        'schedule': 5.0,  # Write buffered article views every 5 seconds
+    },
+    'refresh-trending-scores-task': {
+        'task': 'dashboard.tasks.refresh_trending_scores',
+        'schedule': 300.0,  # Rebuild materialized trending scores every 5 minutes
+    },
+    'rebuild-recommender-index-task': {
+        'task': 'dashboard.tasks.rebuild_recommender_index',
+        'schedule': crontab(hour=3, minute=0),  # Refresh IDF weights over the whole corpus nightly
+    },
+}
+
+# Write-behind buffer for article view events. Without it views are buffered per process, which
+# only suits a single-process development server: the Celery flush task cannot see that buffer.
+ARTICLE_VIEW_BUFFER_URL = os.environ.get('ARTICLE_VIEW_BUFFER_URL')
+ARTICLE_VIEW_FLUSH_BATCH_SIZE = 500
+ARTICLE_VIEW_FLUSH_INTERVAL = 5  # seconds
+
+# Trending scores: views over the window, each losing half its weight every half-life
+TRENDING_WINDOW_DAYS = 30
+TRENDING_HALF_LIFE_HOURS = 48
+
+# Content-based recommendations: TF-IDF index shared by the scraper and the web processes
+RECOMMENDER_INDEX_PATH = os.environ.get('RECOMMENDER_INDEX_PATH', str(BASE_DIR / 'recommender_index.npz'))
+
+# Shared cache for article payloads; local memory when no Redis URL is configured (tests, dev)
+CACHE_URL = os.environ.get('CACHE_URL')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': CACHE_URL,
+            'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient'},
+        }
+    }
+    CACHES['scraper'] = CACHES['default']
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        # Scraper locks, host throttle slots, run claims and per-source link sets are shared by every
+        # Celery worker process, which a per-process LocMem cache is not; see `manage.py createcachetable`
+        'scraper': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'scraper_cache',
+        },
+    }
+ARTICLE_CACHE_TIMEOUT = 1200  # seconds; shared list, detail and trending payloads
+ARTICLE_USER_CACHE_TIMEOUT = 300  # seconds; per-user bookmark sets and recommendations
+
+# Scraper: sources are fetched in parallel, each host limited to a few polite requests
+SCRAPER_MAX_WORKERS = 8
+SCRAPER_HOST_CONCURRENCY = 2
+SCRAPER_HOST_MIN_INTERVAL = 1.0  # seconds between request starts to the same host
+# Each beat tick fans out into one Celery task per category; the lock keeps runs from overlapping
+SCRAPER_TASK_SOFT_TIME_LIMIT = 900  # seconds before a category task is stopped
+SCRAPER_TASK_TIME_LIMIT = 960  # seconds before its worker process is killed
+SCRAPER_TASK_MAX_RETRIES = 2
+SCRAPER_LOCK_TIMEOUT = 3600  # seconds a run's lock is kept if its results are never aggregated
+# Per-source polling intervals adapt to how often each source publishes, within these bounds
+SCRAPER_SCHEDULE_MIN_INTERVAL = 300  # seconds; also the beat tick of the scrape task
+SCRAPER_SCHEDULE_MAX_INTERVAL = 6 * 3600
+SCRAPER_SCHEDULE_DEFAULT_INTERVAL = 1200  # for sources without a yield history
+SCRAPER_SCHEDULE_TARGET_NEW = 3  # new articles a poll should find on average
+# Streaming scrape pipeline: workers per stage and the bound on each queue between stages
+# Parsing and language detection run in separate processes, one per core by default
+SCRAPER_PARSE_WORKERS = int(os.environ.get('SCRAPER_PARSE_WORKERS', os.cpu_count() or 2))
+SCRAPER_AI_WORKERS = 4
+SCRAPER_QUEUE_SIZE = 32
+SCRAPER_AI_BATCH_SIZE = 5  # articles packed into one Gemini request
+SCRAPER_WRITE_BATCH_SIZE = 20  # articles inserted per database transaction
+SCRAPER_AI_TOKEN_BUDGET = 12000  # estimated prompt tokens per batched Gemini request
+# Gemini results cached by content hash and prompt version, rejections included
+SCRAPER_AI_CACHE_PATH = os.environ.get('SCRAPER_AI_CACHE_PATH', str(BASE_DIR / 'scraper_ai_cache.sqlite3'))
+SCRAPER_AI_CACHE_TTL = 30 * 86400  # seconds
+SCRAPER_AI_CACHE_MAX_ENTRIES = 50000
+SCRAPER_LANGDETECT_CHARS = 2000  # leading characters of an article's text used to detect its language
+SCRAPER_PRESCREEN_SHADOW_RATE = 0.05  # share of pre-screen rejections still checked by Gemini
+SCRAPER_NEAR_DUPLICATE_DISTANCE = 7  # max differing SimHash bits for two articles to count as the same story
+SCRAPER_MIN_LINK_SCORE = 2  # link classifier score an index page link needs before it is fetched
+SCRAPER_DISCOVERY_TTL = 86400  # seconds before a source's RSS/sitemap list is looked up again
+SCRAPER_MAX_FEED_ENTRIES = 50  # newest feed entries considered per source
+# Scraper-only HTTP cache with conditional revalidation and LRU eviction past the size limit
+SCRAPER_HTTP_CACHE_PATH = os.environ.get('SCRAPER_HTTP_CACHE_PATH', str(BASE_DIR / 'scraper_http_cache.sqlite3'))
+SCRAPER_HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+SCRAPER_HTTP_CACHE_TTLS = {
+    # Index pages, feeds, sitemaps and robots.txt: seconds before revalidating. Scheduled polls
+    # revalidate them regardless, since a source may be polled again sooner than this.
+    'index': 600,
+    'article': 7 * 86400,  # article pages rarely change once published
 }
 
 